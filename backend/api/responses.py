@@ -0,0 +1,9 @@
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered by orjson (datetimes as ISO 8601, like the pydantic output)."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
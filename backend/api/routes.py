@@ -1,64 +1,330 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
-from backend.core.database import get_db
-from sqlalchemy import func
-from backend.schemas.weather import WeatherOut
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Literal
+import httpx
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from backend.api.responses import ORJSONResponse
+from backend.core.config import settings
+from backend.core.database import get_async_db, get_async_read_db, get_read_db
+from backend.core.metrics import render_metrics
+from backend.schemas.weather import WeatherOut, LocationOut, RollupOut
 from backend.models.weather import Weather
-from backend.services.weather_service import fetch_current_weather, save_weather_record
+from backend.services.archive_service import get_archived, purge_archive
+from backend.services.dashboard_service import dashboard_snapshot
+from backend.services.history_service import (
+    EXPORT_COLUMNS,
+    InvalidCursor,
+    data_version,
+    iter_export,
+    latest_reading,
+    list_readings,
+)
+from backend.services.location_service import get_location_by_name, list_locations, resolve_location_id
+from backend.services.retention_service import reset_readings
+from backend.services.series_service import downsample_series
+from backend.services.stats_service import get_rollups, get_stats
+from backend.services.resilience import CircuitOpenError
+from backend.services.weather_service import (
+    current_weather_cache,
+    get_current_weather,
+    save_weather_record_async,
+    upstream_stats,
+)
 
 router = APIRouter()
 
 
 @router.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
 
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    payload, content_type = render_metrics()
+    return Response(payload, media_type=content_type)
+
+
 @router.post("/weather/fetch", response_model=WeatherOut)
-def fetch_and_store_weather(
+async def fetch_and_store_weather(
+    response: Response,
     lat: float = Query(None),
     lon: float = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    t, w, la, lo = fetch_current_weather(lat, lon)
-    rec = save_weather_record(db, t, w, la, lo)
+    try:
+        t, w, la, lo = await get_current_weather(lat, lon)
+    except (CircuitOpenError, httpx.HTTPError) as e:
+        # az upstream nem elérhető: a legutóbb tárolt mérés, ha van
+        return await _last_stored_or_503(db, response, lat, lon, e)
+
+    location_id = await db.run_sync(resolve_location_id, la, lo)
+    rec = await save_weather_record_async(db, t, w, la, lo, location_id=location_id)
+    # a location_name-hez kell; async sessionben nincs lazy load
+    await db.refresh(rec, ["location"])
     return rec
 
 
-@router.get("/weather", response_model=list[WeatherOut])
-def list_weather(limit: int = 50, db: Session = Depends(get_db)):
-    q = db.query(Weather).order_by(Weather.id.desc()).limit(limit).all()
-    return list(reversed(q))  # időrendbe
+@router.get("/locations", response_model=list[LocationOut])
+async def get_locations(db: AsyncSession = Depends(get_async_read_db)):
+    return await db.run_sync(list_locations)
+
+
+async def _last_stored_or_503(db: AsyncSession, response: Response, lat, lon, error: Exception):
+    la, lo = lat or settings.default_lat, lon or settings.default_lon
+    location_id = await db.run_sync(resolve_location_id, la, lo)
+    rec = await db.run_sync(latest_reading, location_id, la, lo)
+    if rec is None:
+        raise HTTPException(status_code=503, detail=f"Weather upstream unavailable: {error}")
+    response.headers["X-Weather-Source"] = "last-stored"
+    return rec
+
+
+@router.get("/weather/cache/stats")
+async def get_weather_cache_stats():
+    return current_weather_cache.stats()
+
+
+@router.get("/weather/upstream/stats")
+async def get_upstream_stats():
+    # megszakító, rate limiter és retry keret állapota monitorozáshoz
+    return upstream_stats()
+
+
+@router.get("/weather", response_model=list[WeatherOut], response_class=ORJSONResponse)
+async def list_weather(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=10000),
+    cursor: str | None = None,
+    after_id: int | None = None,
+    before_id: int | None = None,
+    from_: datetime | None = Query(None, alias="from"),
+    to: datetime | None = None,
+    location: str | None = None,
+    fields: str | None = Query(None, description="Comma-separated subset of the reading fields"),
+    db: AsyncSession = Depends(get_async_read_db),
+    sync_db: Session = Depends(get_read_db),
+):
+    columns = _parse_fields(fields)
+    not_modified = await _check_etag(request, response, db)
+    if not_modified:
+        return not_modified
+
+    location_id = await _location_id_or_404(db, location) if location else None
+    try:
+        # oszlop tuple-ök ORM objektumok és soronkénti pydantic validálás helyett;
+        # threadpoolban, mert az oldal az archívumból is olvashat (pyarrow I/O)
+        rows, next_cursor = await run_in_threadpool(
+            list_readings, sync_db, limit, cursor, after_id, before_id, from_, to, location_id, True
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # a következő oldal kurzora fejlécben, hogy a válasz törzse lista maradjon
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return ORJSONResponse(_as_dicts(rows, columns), headers=dict(response.headers))
+
+
+def _as_dicts(rows: list[tuple], columns: tuple[str, ...] = EXPORT_COLUMNS) -> list[dict]:
+    indexes = [EXPORT_COLUMNS.index(name) for name in columns]
+    return [{name: row[i] for name, i in zip(columns, indexes)} for row in rows]
+
+
+def _parse_fields(fields: str | None) -> tuple[str, ...]:
+    if not fields:
+        return EXPORT_COLUMNS
+    columns = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in columns if name not in EXPORT_COLUMNS]
+    if unknown or not columns:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}; allowed: {', '.join(EXPORT_COLUMNS)}")
+    return columns
+
+
+@router.get("/dashboard", response_class=ORJSONResponse)
+async def get_dashboard(
+    request: Request,
+    response: Response,
+    after_id: int | None = Query(None, description="Only readings with a larger id (incremental sync)"),
+    limit: int = Query(500, ge=1, le=10000),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    # statisztika, városonkénti utolsó mérés és az új sorok egy kérésben
+    not_modified = await _check_etag(request, response, db)
+    if not_modified:
+        return not_modified
+
+    snapshot = await db.run_sync(dashboard_snapshot, after_id, limit)
+    snapshot["latest"] = _as_dicts(snapshot["latest"])
+    snapshot["readings"] = _as_dicts(snapshot["readings"])
+    return ORJSONResponse(snapshot, headers=dict(response.headers))
+
+
+@router.get("/weather/series", response_class=ORJSONResponse)
+async def get_weather_series(
+    request: Request,
+    response: Response,
+    location: str | None = None,
+    from_: datetime | None = Query(None, alias="from"),
+    to: datetime | None = None,
+    points: int = Query(500, ge=3, le=5000, description="Maximum points per location"),
+    metric: Literal["temperature_c", "windspeed_kmh"] = Query("temperature_c", description="Column LTTB preserves"),
+    db: AsyncSession = Depends(get_async_read_db),
+    sync_db: Session = Depends(get_read_db),
+):
+    # grafikonokhoz: helyenként legfeljebb `points` pont (LTTB), bármekkora az előzmény
+    not_modified = await _check_etag(request, response, db)
+    if not_modified:
+        return not_modified
+
+    location_id = await _location_id_or_404(db, location) if location else None
+    # a teljes beolvasás, a NumPy feldolgozás és a Parquet olvasás másodpercekig is tarthat:
+    # szinkron sessionnel threadpoolban, hogy ne állítsa meg az event loopot (a run_sync azon futna)
+    series = await run_in_threadpool(downsample_series, sync_db, points, metric, from_, to, location_id)
+    return ORJSONResponse({"points": points, "metric": metric, "series": series}, headers=dict(response.headers))
+
+
+@router.get("/weather/export")
+def export_weather(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    from_: datetime | None = Query(None, alias="from"),
+    to: datetime | None = None,
+    location: str | None = None,
+    db: Session = Depends(get_read_db),
+):
+    # soronként streamelve; a session a válasz végéig nyitva marad.
+    # Szándékosan sync: a generátor darabjai threadpoolban futnak, nem blokkolják az event loopot.
+    location_id = _location_id_or_404_sync(db, location) if location else None
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        iter_export(db, format, from_, to, location_id),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="weather.{format}"'},
+    )
+
 
 @router.get("/weather/stats")
-def get_weather_stats(db: Session = Depends(get_db)):
-    q = db.query(
-        func.count(Weather.id).label("count"),
-        func.avg(Weather.temperature_c).label("avg_temp"),
-        func.min(Weather.temperature_c).label("min_temp"),
-        func.max(Weather.temperature_c).label("max_temp"),
-        func.avg(Weather.windspeed_kmh).label("avg_wind"),
-    ).one()
-
-    return {
-        "count": q.count,
-        "avg_temp": round(q.avg_temp or 0, 2),
-        "min_temp": round(q.min_temp or 0, 2),
-        "max_temp": round(q.max_temp or 0, 2),
-        "avg_wind": round(q.avg_wind or 0, 2),
+async def get_weather_stats(
+    request: Request,
+    response: Response,
+    location: str | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    not_modified = await _check_etag(request, response, db)
+    if not_modified:
+        return not_modified
+
+    # előre karbantartott aggregátumokból, teljes táblaszkennelés nélkül
+    location_id = await _location_id_or_404(db, location) if location else None
+    return await db.run_sync(get_stats, location_id)
+
+
+@router.get("/weather/aggregate", response_model=list[RollupOut])
+async def get_weather_aggregate(
+    location: str | None = None,
+    bucket: Literal["hour", "day"] = "hour",
+    from_: datetime | None = Query(None, alias="from"),
+    to: datetime | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    # órás/napi rollup sorok, a nyers mérések érintése nélkül
+    location_id = await _location_id_or_404(db, location) if location else None
+    return await db.run_sync(_rollup_rows, bucket, location_id, from_, to)
+
+
+def _rollup_rows(db: Session, bucket: str, location_id: int | None, start, end) -> list[RollupOut]:
+    names = {loc.id: loc.name for loc in list_locations(db)}
+    return [
+        RollupOut(
+            location_id=r.location_id,
+            location_name=names.get(r.location_id),
+            bucket=r.bucket,
+            bucket_start=r.bucket_start,
+            count=r.count,
+            avg_temp=round(r.temp_sum / r.count, 2),
+            min_temp=r.temp_min,
+            max_temp=r.temp_max,
+            avg_wind=round(r.wind_sum / r.count, 2),
+            min_wind=r.wind_min,
+            max_wind=r.wind_max,
+        )
+        for r in get_rollups(db, bucket, location_id, start, end)
+    ]
+
+
+async def _location_id_or_404(db: AsyncSession, name: str) -> int:
+    return await db.run_sync(_location_id_or_404_sync, name)
+
+
+async def _check_etag(request: Request, response: Response, db: AsyncSession) -> Response | None:
+    """Set ETag/Last-Modified/Cache-Control; a 304 response if the client's copy is current.
+
+    The ETag hashes the table fingerprint (``data_version``) with the path
+    and query, so the check costs one index lookup and nothing is serialized
+    on a match. Only If-None-Match is honoured: deletes do not move
+    Last-Modified, so If-Modified-Since alone could serve stale data.
+    """
+    version, newest = await db.run_sync(data_version)
+    digest = hashlib.sha1(f"{version}|{request.url.path}|{request.url.query}".encode()).hexdigest()[:20]
+    headers = {
+        "ETag": f'W/"{digest}"',
+        "Cache-Control": f"private, max-age={settings.http_cache_max_age_s}, must-revalidate",
     }
+    if newest:
+        headers["Last-Modified"] = format_datetime(newest.replace(tzinfo=timezone.utc), usegmt=True)
+
+    if _etag_matches(request.headers.get("if-none-match"), digest):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def _etag_matches(if_none_match: str | None, digest: str) -> bool:
+    if not if_none_match:
+        return False
+    # gyenge összehasonlítás: a W/ előtag nem számít
+    tags = {tag.strip().removeprefix("W/").strip('"') for tag in if_none_match.split(",")}
+    return "*" in tags or digest in tags
+
+
+def _location_id_or_404_sync(db: Session, name: str) -> int:
+    loc = get_location_by_name(db, name)
+    if not loc:
+        raise HTTPException(status_code=404, detail="Location not found")
+    return loc.id
 
 @router.get("/weather/{weather_id}", response_model=WeatherOut)
-def get_weather_detail(weather_id: int, db: Session = Depends(get_db)):
-    rec = db.query(Weather).filter(Weather.id == weather_id).first()
+async def get_weather_detail(
+    weather_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    sync_db: Session = Depends(get_read_db),
+):
+    not_modified = await _check_etag(request, response, db)
+    if not_modified:
+        return not_modified
+
+    rec = await db.get(Weather, weather_id, options=[joinedload(Weather.location)])
+    if not rec:
+        # a hot táblában nincs: az archívumban keressük, mielőtt 404
+        rec = await run_in_threadpool(get_archived, sync_db, weather_id)
     if not rec:
         raise HTTPException(status_code=404, detail="Record not found")
     return rec
 
 @router.delete("/weather/reset")
-def reset_database(db: Session = Depends(get_db)):
-    """Delete all weather records from the database"""
-    count = db.query(Weather).count()
-    db.query(Weather).delete()
-    db.commit()
+async def reset_database(db: AsyncSession = Depends(get_async_db)):
+    """Delete all weather records from the database (and the Parquet archive)"""
+    # DROP + CREATE a teljes tábla végigolvasása és soronkénti törlése helyett
+    count = await db.run_sync(reset_readings)
+    await run_in_threadpool(purge_archive)
     return {"message": f"Database reset successfully. Deleted {count} records."}
\ No newline at end of file
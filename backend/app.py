@@ -1,20 +1,48 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from backend.core.database import engine, Base
+from fastapi.middleware.gzip import GZipMiddleware
+from backend.core.config import settings
+from backend.core.database import dispose_async_engines, engine
+from backend.core.migrations import run_migrations
 from backend.api.routes import router
 from backend.core.logging_conf import logger
-from backend.services.scheduler import start_scheduler, stop_scheduler
+from backend.services.weather_service import open_http_client, close_http_client
 
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Python Beadandó – Weather API")
-app.include_router(router)
-
-@app.on_event("startup")
-def on_startup():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
     logger.info("App starting up…")
-    start_scheduler()
+    # séma és törzsadatok induláskor, nem importkor; külön migrációs lépés esetén kihagyható
+    if settings.run_migrations:
+        await asyncio.to_thread(run_migrations, engine)
+    await open_http_client()
+
+    # APScheduler, SMTP és pyarrow csak akkor töltődik be, ha ez a worker ütemez
+    scheduler = None
+    if settings.scheduler_enabled:
+        from backend.services import scheduler
+        scheduler.start_scheduler()
+    else:
+        logger.info("Scheduler disabled: web-only worker.")
+
+    try:
+        yield
+    finally:
+        if scheduler is not None:
+            scheduler.stop_scheduler()
+        await close_http_client()
+        await dispose_async_engines()
+        logger.info("App shutting down…")
+
+
+app = FastAPI(title="Python Beadandó – Weather API", lifespan=lifespan)
+app.include_router(router)
+# nagy listák és exportok tömörítve, ha a kliens kéri
+app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_min_size)
+if settings.metrics_enabled:
+    from backend.core.metrics import MetricsMiddleware, install_query_metrics
 
-@app.on_event("shutdown")
-def on_shutdown():
-    stop_scheduler()
-    logger.info("App shutting down…")
\ No newline at end of file
+    # legkülső réteg: a mért idő a tömörítést is tartalmazza
+    app.add_middleware(MetricsMiddleware)
+    install_query_metrics()
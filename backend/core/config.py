@@ -7,10 +7,65 @@ load_dotenv()
 class Settings(BaseModel):
     app_env: str = os.getenv("APP_ENV", "dev")
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./weather.db")
+    async_database_url: str | None = os.getenv("ASYNC_DATABASE_URL")
+    run_migrations: bool = os.getenv("RUN_MIGRATIONS", "true").lower() == "true"
+    db_profile: str = os.getenv("DB_PROFILE", "dev")
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", 10))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    sqlite_mmap_size: int = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    sqlite_cache_size_kb: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", 64 * 1024))
+    sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    slow_query_ms: float = float(os.getenv("SLOW_QUERY_MS", 200))
     default_lat: float = float(os.getenv("DEFAULT_LAT", 47.4979))
     default_lon: float = float(os.getenv("DEFAULT_LON", 19.0402))
     scheduler_enabled: bool = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
     scheduler_interval_min: int = int(os.getenv("SCHEDULER_INTERVAL_MIN", 60))
+    scheduler_mode: str = os.getenv("SCHEDULER_MODE", "per_location")
+    scheduler_jitter_s: int = int(os.getenv("SCHEDULER_JITTER_S", 30))
+    scheduler_job_timeout_s: float = float(os.getenv("SCHEDULER_JOB_TIMEOUT_S", 30))
+    scheduler_max_workers: int = int(os.getenv("SCHEDULER_MAX_WORKERS", 4))
+    scheduler_lease_ttl_s: float = float(os.getenv("SCHEDULER_LEASE_TTL_S", 30))
+    scheduler_lease_renew_s: float = float(os.getenv("SCHEDULER_LEASE_RENEW_S", 10))
+    open_meteo_url: str = os.getenv("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+    open_meteo_batch_size: int = int(os.getenv("OPEN_METEO_BATCH_SIZE", 100))
+    open_meteo_archive_url: str = os.getenv("OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive")
+    backfill_chunk_days: int = int(os.getenv("BACKFILL_CHUNK_DAYS", 90))
+    backfill_concurrency: int = int(os.getenv("BACKFILL_CONCURRENCY", 4))
+    http_timeout_s: float = float(os.getenv("HTTP_TIMEOUT_S", 10))
+    http_max_connections: int = int(os.getenv("HTTP_MAX_CONNECTIONS", 20))
+    http_keepalive_expiry_s: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_S", 30))
+    http_max_concurrency: int = int(os.getenv("HTTP_MAX_CONCURRENCY", 10))
+    http_rate_per_s: float = float(os.getenv("HTTP_RATE_PER_S", 10))
+    http_rate_burst: int = int(os.getenv("HTTP_RATE_BURST", 20))
+    http_max_retries: int = int(os.getenv("HTTP_MAX_RETRIES", 2))
+    http_retry_base_s: float = float(os.getenv("HTTP_RETRY_BASE_S", 0.2))
+    http_retry_max_s: float = float(os.getenv("HTTP_RETRY_MAX_S", 2))
+    http_retry_budget_ratio: float = float(os.getenv("HTTP_RETRY_BUDGET_RATIO", 0.2))
+    breaker_failure_threshold: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+    breaker_reset_timeout_s: float = float(os.getenv("BREAKER_RESET_TIMEOUT_S", 30))
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    gzip_min_size: int = int(os.getenv("GZIP_MIN_SIZE", 1000))
+    http_cache_max_age_s: int = int(os.getenv("HTTP_CACHE_MAX_AGE_S", 0))
+    weather_cache_ttl_s: float = float(os.getenv("WEATHER_CACHE_TTL_S", 900))
+    weather_cache_maxsize: int = int(os.getenv("WEATHER_CACHE_MAXSIZE", 1024))
+    weather_cache_precision: int = int(os.getenv("WEATHER_CACHE_PRECISION", 2))
+    archive_dir: str = os.getenv("ARCHIVE_DIR", "./archive")
+    archive_after_days: int = int(os.getenv("ARCHIVE_AFTER_DAYS", 0))
+    archive_batch_size: int = int(os.getenv("ARCHIVE_BATCH_SIZE", 10000))
+    archive_interval_hours: int = int(os.getenv("ARCHIVE_INTERVAL_HOURS", 24))
+    retention_days: int = int(os.getenv("RETENTION_DAYS", 0))
+    retention_batch_size: int = int(os.getenv("RETENTION_BATCH_SIZE", 1000))
+    retention_interval_hours: int = int(os.getenv("RETENTION_INTERVAL_HOURS", 24))
+    smtp_host: str = os.getenv("SMTP_HOST", "smtp.gmail.com")
+    smtp_port: int = int(os.getenv("SMTP_PORT", 465))
+    smtp_security: str = os.getenv("SMTP_SECURITY", "ssl")
+    smtp_timeout_s: float = float(os.getenv("SMTP_TIMEOUT_S", 30))
+    email_send_interval_s: int = int(os.getenv("EMAIL_SEND_INTERVAL_S", 30))
+    email_digest_window_min: int = int(os.getenv("EMAIL_DIGEST_WINDOW_MIN", 0))
+    email_digest_max: int = int(os.getenv("EMAIL_DIGEST_MAX", 20))
+    email_max_attempts: int = int(os.getenv("EMAIL_MAX_ATTEMPTS", 8))
+    email_retry_base_s: float = float(os.getenv("EMAIL_RETRY_BASE_S", 30))
+    email_retry_max_s: float = float(os.getenv("EMAIL_RETRY_MAX_S", 3600))
     email_user: str = os.getenv("EMAIL_USER")
     email_pass: str = os.getenv("EMAIL_PASS")
     email_to: str = os.getenv("EMAIL_TO")
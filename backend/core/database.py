@@ -1,20 +1,133 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from backend.core.config import settings
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
-)
+
+def _sqlite_file(url: str) -> str | None:
+    """Path of a file-backed SQLite database, None for anything else (incl. :memory:)."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database in (None, "", ":memory:"):
+        return None
+    return parsed.database
+
+
+def create_db_engine(url: str, profile: str = "dev", read_only: bool = False) -> Engine:
+    """Engine for ``url``; the "production" profile tunes file-backed SQLite.
+
+    Production: WAL journal, ``synchronous=NORMAL``, memory-mapped I/O, a
+    larger page cache and a busy timeout on every connection, plus a bigger
+    pool. ``read_only`` opens the file with ``mode=ro`` for GET routes.
+    """
+    url, kwargs, production = _engine_options(url, profile, read_only)
+    engine = create_engine(url, **kwargs)
+    if production:
+        _install_sqlite_pragmas(engine, read_only)
+    return engine
+
+
+def create_async_db_engine(url: str, profile: str = "dev", read_only: bool = False) -> AsyncEngine:
+    """Async counterpart of ``create_db_engine`` (aiosqlite for SQLite URLs)."""
+    url, kwargs, production = _engine_options(url, profile, read_only)
+    engine = create_async_engine(async_url(url), **kwargs)
+    if production:
+        _install_sqlite_pragmas(engine.sync_engine, read_only)
+    return engine
+
+
+def async_url(url: str) -> str:
+    """Async driver URL: plain ``sqlite://`` becomes ``sqlite+aiosqlite://``."""
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+def _engine_options(url: str, profile: str, read_only: bool) -> tuple[str, dict, bool]:
+    is_sqlite = url.startswith("sqlite")
+    path = _sqlite_file(url) if is_sqlite else None
+    production = profile == "production" and path is not None
+    kwargs = {"connect_args": {"check_same_thread": False} if is_sqlite else {}}
+
+    if production:
+        kwargs.update(pool_size=settings.db_pool_size, max_overflow=settings.db_max_overflow)
+        if read_only:
+            url = f"sqlite:///file:{path}?mode=ro&uri=true"
+    return url, kwargs, production
+
+
+def _install_sqlite_pragmas(engine: Engine, read_only: bool) -> None:
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        if not read_only:
+            # a WAL mód az adatbázisfájlban marad, csak az író kapcsolat állítja
+            cur.execute("PRAGMA journal_mode=WAL")
+        else:
+            cur.execute("PRAGMA query_only=ON")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+        cur.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_kb}")
+        cur.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.close()
+
+
+engine = create_db_engine(settings.database_url, settings.db_profile)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# GET végpontokhoz; dev profilban ugyanaz az engine
+read_engine = (
+    create_db_engine(settings.database_url, settings.db_profile, read_only=True)
+    if settings.db_profile == "production" and _sqlite_file(settings.database_url)
+    else engine
+)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# ===== Async engine-ek a kérésútvonalhoz =====
+_async_database_url = settings.async_database_url or settings.database_url
+async_engine = create_async_db_engine(_async_database_url, settings.db_profile)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async_read_engine = (
+    create_async_db_engine(_async_database_url, settings.db_profile, read_only=True)
+    if settings.db_profile == "production" and _sqlite_file(settings.database_url)
+    else async_engine
+)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency for FastAPI routes
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 def get_db() -> Generator:
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_read_db() -> Generator:
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engines() -> None:
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
@@ -0,0 +1,144 @@
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from backend.core.config import settings
+from backend.core.logging_conf import logger
+
+# adatbázis-lekérdezésekhez finomabb felbontás kell, mint a HTTP kérésekhez
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# ===== HTTP =====
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ["method", "route", "status"]
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests being served", ["method"])
+
+# ===== Open-Meteo =====
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "weather_upstream_request_duration_seconds", "Open-Meteo request latency (one attempt)", ["client"]
+)
+UPSTREAM_REQUESTS = Counter(
+    "weather_upstream_requests_total", "Open-Meteo requests by outcome", ["client", "outcome"]
+)
+
+# ===== Adatbázis =====
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "SQL statement execution time", ["operation"], buckets=DB_BUCKETS
+)
+DB_SLOW_QUERIES = Counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS", ["operation"])
+
+# ===== Ütemező =====
+SCHEDULER_JOB_DURATION = Histogram(
+    "scheduler_job_duration_seconds", "Scheduler job run time", ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+)
+SCHEDULER_CITY_FETCHES = Counter(
+    "scheduler_city_fetches_total", "Scheduled fetch outcome per city", ["city", "outcome"]
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """The exposition-format payload and its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """Per-route latency histogram and in-flight gauge.
+
+    The route template (``/weather/{weather_id}``), not the raw path, is the
+    label, so the number of series stays bounded. The template is only known
+    once the router has matched, so the in-flight gauge is per method.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # a router a scope-ba írja az illesztett útvonalat (405 esetén is)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            HTTP_REQUEST_DURATION.labels(method, route, str(status)).observe(time.perf_counter() - start)
+            in_progress.dec()
+
+
+def observe_upstream(client: str, outcome: str, seconds: float | None = None) -> None:
+    if seconds is not None:
+        UPSTREAM_REQUEST_DURATION.labels(client).observe(seconds)
+    UPSTREAM_REQUESTS.labels(client, outcome).inc()
+
+
+# ===== SQLAlchemy lekérdezés-időzítés =====
+
+def install_query_metrics() -> None:
+    """Time every SQL statement on every engine; log slow ones with their query plan.
+
+    Statements slower than ``settings.slow_query_ms`` (0 disables) are logged
+    together with SQLite's ``EXPLAIN QUERY PLAN``. Safe to call more than once.
+    """
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    operation = _operation(statement)
+    DB_QUERY_DURATION.labels(operation).observe(elapsed)
+
+    if settings.slow_query_ms and elapsed * 1000 >= settings.slow_query_ms:
+        DB_SLOW_QUERIES.labels(operation).inc()
+        plan = None if executemany else _query_plan(conn, statement, parameters)
+        logger.warning(
+            f"Slow query ({elapsed * 1000:.1f} ms): {' '.join(statement.split())}"
+            + (f"\nQuery plan:\n{plan}" if plan else "")
+        )
+
+
+def _operation(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    operation = words[0].upper() if words else ""
+    return operation if operation in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "PRAGMA") else "OTHER"
+
+
+def _query_plan(conn, statement: str, parameters) -> str | None:
+    if conn.dialect.name != "sqlite" or _operation(statement) in ("PRAGMA", "OTHER"):
+        return None
+    try:
+        # nyers DBAPI kurzor, hogy a terv lekérése ne fusson újra ezeken az eseményeken
+        cur = conn.connection.dbapi_connection.cursor()
+        try:
+            cur.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            return "\n".join(f"  {row[-1]}" for row in cur.fetchall())
+        finally:
+            cur.close()
+    except Exception as e:
+        return f"  (unavailable: {e})"
@@ -0,0 +1,71 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from backend.core.database import Base
+from backend.core.logging_conf import logger
+
+
+def run_migrations(engine: Engine) -> None:
+    """Create/upgrade the schema and seed reference data.
+
+    ``create_all`` only creates missing tables, so columns and indexes added
+    to existing tables since the database was created are applied here.
+    """
+    # a modellek importja regisztrálja a táblákat a metadata-ban
+    import backend.models.location  # noqa: F401
+    import backend.models.weather  # noqa: F401
+    import backend.models.aggregate  # noqa: F401
+    import backend.models.backfill  # noqa: F401
+    import backend.models.outbox  # noqa: F401
+    import backend.models.lease  # noqa: F401
+    from backend.services.location_service import seed_locations
+    from backend.services.stats_service import rebuild_aggregates
+
+    existing_tables = set(inspect(engine).get_table_names())
+    if not existing_tables:
+        _enable_incremental_vacuum(engine)
+    Base.metadata.create_all(bind=engine)
+    _add_missing_columns(engine)
+    _create_missing_indexes(engine)
+
+    with Session(engine) as db:
+        seed_locations(db)
+
+        # meglévő adatbázisnál az aggregátumokat egyszer fel kell tölteni
+        if "weather" in existing_tables and not {"weather_aggregates", "weather_rollups"} <= existing_tables:
+            logger.info("Migration: building weather aggregates from existing rows")
+            rebuild_aggregates(db)
+
+
+def _enable_incremental_vacuum(engine: Engine) -> None:
+    # üres SQLite fájlon azonnal érvényes; meglévőn csak VACUUM után (scripts.retention)
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+
+
+def _add_missing_columns(engine: Engine) -> None:
+    insp = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing = {c["name"] for c in insp.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable and column.server_default is None:
+                raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} without a server default")
+
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+            for fk in column.foreign_keys:
+                ddl += f" REFERENCES {fk.column.table.name}({fk.column.name})"
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+
+            with engine.begin() as conn:
+                conn.execute(text(ddl))
+            logger.info(f"Migration: added column {table.name}.{column.name}")
+
+
+def _create_missing_indexes(engine: Engine) -> None:
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, Float, String, DateTime
+from backend.core.database import Base
+
+# a location_id = 0 sor az összesített (minden helyre vonatkozó) aggregátum
+OVERALL_LOCATION_ID = 0
+
+# rollup időablakok
+ROLLUP_BUCKETS = ("hour", "day")
+
+
+class StatsMixin:
+    count = Column(Integer, nullable=False, default=0)
+    temp_sum = Column(Float, nullable=False, default=0.0)
+    temp_min = Column(Float, nullable=True)
+    temp_max = Column(Float, nullable=True)
+    wind_sum = Column(Float, nullable=False, default=0.0)
+    wind_min = Column(Float, nullable=True)
+    wind_max = Column(Float, nullable=True)
+
+
+class WeatherAggregate(StatsMixin, Base):
+    __tablename__ = "weather_aggregates"
+
+    location_id = Column(Integer, primary_key=True)
+
+
+class WeatherRollup(StatsMixin, Base):
+    __tablename__ = "weather_rollups"
+
+    # a PK sorrendje adja az (hely, ablak, idő) szerinti range scant
+    location_id = Column(Integer, primary_key=True)
+    bucket = Column(String, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
@@ -0,0 +1,15 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, Date, DateTime
+from backend.core.database import Base
+
+
+class BackfillCheckpoint(Base):
+    __tablename__ = "backfill_checkpoints"
+
+    # egy sor helyenként és kért időszakonként; ugyanazzal az időszakkal újraindítva next_date-től folytatja
+    location_id = Column(Integer, primary_key=True)
+    start_date = Column(Date, primary_key=True)
+    end_date = Column(Date, primary_key=True)
+    next_date = Column(Date, nullable=False)
+    rows = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
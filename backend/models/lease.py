@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime
+from backend.core.database import Base
+
+
+class SchedulerLease(Base):
+    __tablename__ = "scheduler_leases"
+
+    # egy sor szerepkörönként (pl. "scheduler"); a holder a futó worker azonosítója
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    acquired_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
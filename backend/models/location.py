@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, Float, String
+from backend.core.database import Base
+
+class Location(Base):
+    __tablename__ = "locations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False, unique=True)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    # megőrzési idő napokban; NULL esetén a RETENTION_DAYS beállítás érvényes
+    retention_days = Column(Integer, nullable=True)
+    # lekérési időköz percben; NULL esetén a SCHEDULER_INTERVAL_MIN beállítás érvényes
+    fetch_interval_min = Column(Integer, nullable=True)
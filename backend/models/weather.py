@@ -1,13 +1,26 @@
-from sqlalchemy import Column, Integer, Float, DateTime
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
 from backend.core.database import Base
+from backend.models.location import Location
 from datetime import datetime
 
 class Weather(Base):
     __tablename__ = "weather"
+    __table_args__ = (
+        # városonkénti idősor-lekérdezések index range scannel
+        Index("ix_weather_location_fetched_at", "location_id", "fetched_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     temperature_c = Column(Float, nullable=False)
     windspeed_kmh = Column(Float, nullable=False)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
-    fetched_at = Column(DateTime, default=datetime.utcnow, nullable=False)
\ No newline at end of file
+    fetched_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)
+
+    location = relationship(Location)
+
+    @property
+    def location_name(self) -> str | None:
+        return self.location.name if self.location else None
@@ -8,6 +8,31 @@ class WeatherOut(BaseModel):
     latitude: float
     longitude: float
     fetched_at: datetime
+    location_id: int | None = None
+    location_name: str | None = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class LocationOut(BaseModel):
+    id: int
+    name: str
+    latitude: float
+    longitude: float
+
+    class Config:
+        from_attributes = True
+
+
+class RollupOut(BaseModel):
+    location_id: int
+    location_name: str | None = None
+    bucket: str
+    bucket_start: datetime
+    count: int
+    avg_temp: float
+    min_temp: float
+    max_temp: float
+    avg_wind: float
+    min_wind: float
+    max_wind: float
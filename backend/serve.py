@@ -0,0 +1,35 @@
+"""Start the API under uvicorn.
+
+    python -m backend.serve --no-scheduler --workers 4 --skip-migrations
+
+``--no-scheduler`` runs a web-only worker: APScheduler, SMTP and the archive
+code are never imported. ``--skip-migrations`` is for autoscaled workers when
+``python -m scripts.migrate`` already ran as a separate deploy step.
+"""
+import argparse
+import os
+
+import uvicorn
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--reload", action="store_true")
+    parser.add_argument("--no-scheduler", action="store_true", help="web-only worker (SCHEDULER_ENABLED=false)")
+    parser.add_argument("--skip-migrations", action="store_true", help="do not migrate on startup (RUN_MIGRATIONS=false)")
+    args = parser.parse_args(argv)
+
+    # a beállítások importkor olvasódnak, ezért a backend importja előtt; a workerek öröklik
+    if args.no_scheduler:
+        os.environ["SCHEDULER_ENABLED"] = "false"
+    if args.skip_migrations:
+        os.environ["RUN_MIGRATIONS"] = "false"
+
+    uvicorn.run("backend.app:app", host=args.host, port=args.port, workers=args.workers, reload=args.reload)
+
+
+if __name__ == "__main__":
+    main()
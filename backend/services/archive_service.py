@@ -0,0 +1,339 @@
+import os
+import re
+import shutil
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import cache
+from typing import TYPE_CHECKING, Iterator
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from backend.core.config import settings
+from backend.core.logging_conf import logger
+from backend.models.location import Location
+from backend.models.weather import Weather
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+# a pyarrow importja lassú (~0.5 s): csak akkor töltjük be, ha tényleg archiválunk
+# vagy van mit olvasni, így a webes worker indulását nem terheli
+ARCHIVE_COLUMNS = ("id", "temperature_c", "windspeed_kmh", "latitude", "longitude", "fetched_at", "location_id")
+
+# partíciók: <archive_dir>/date=YYYY-MM-DD/part-<min id>-<max id>-<uuid>.parquet
+_PARTITION_PREFIX = "date="
+# az id tartomány a fájlnévben: id szerinti keresésnél a fájl megnyitása nélkül kihagyható
+_PART_IDS = re.compile(r"part-(\d+)-(\d+)-[0-9a-f]+\.parquet$")
+
+
+@dataclass
+class ArchivedReading:
+    id: int
+    temperature_c: float
+    windspeed_kmh: float
+    latitude: float
+    longitude: float
+    fetched_at: datetime
+    location_id: int | None
+    location_name: str | None = None
+
+
+def archive_old_readings(db: Session, older_than_days: int | None = None) -> int:
+    """Move readings older than ``older_than_days`` from the weather table to Parquet.
+
+    Works in batches of ``settings.archive_batch_size``: each batch is written
+    to date partitions first and deleted from the hot table afterwards, so a
+    crash can at worst leave a row in both tiers, never in neither.
+    """
+    days = settings.archive_after_days if older_than_days is None else older_than_days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    moved = 0
+
+    while True:
+        rows = db.execute(
+            select(*(getattr(Weather, name) for name in ARCHIVE_COLUMNS))
+            .where(Weather.fetched_at < cutoff)
+            .order_by(Weather.fetched_at, Weather.id)
+            .limit(settings.archive_batch_size)
+        ).all()
+        if not rows:
+            break
+
+        _write_partitions([dict(zip(ARCHIVE_COLUMNS, row)) for row in rows])
+
+        db.execute(delete(Weather).where(Weather.id.in_([row.id for row in rows])))
+        db.commit()
+        moved += len(rows)
+
+    if moved:
+        logger.info(f"Archived {moved} readings older than {cutoff:%Y-%m-%d %H:%M}")
+    return moved
+
+
+@cache
+def archive_schema() -> "pa.Schema":
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.int64()),
+        ("temperature_c", pa.float64()),
+        ("windspeed_kmh", pa.float64()),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("fetched_at", pa.timestamp("us")),
+        ("location_id", pa.int64()),
+    ])
+
+
+def _write_partitions(rows: list[dict]) -> None:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pylist(rows, schema=archive_schema())
+    dates = pc.strftime(table["fetched_at"], format="%Y-%m-%d")
+    for date in pc.unique(dates).to_pylist():
+        part = table.filter(pc.equal(dates, date))
+        directory = os.path.join(settings.archive_dir, f"{_PARTITION_PREFIX}{date}")
+        os.makedirs(directory, exist_ok=True)
+
+        # pontos fájlnév: a reader a "."-tal kezdődő félkész fájlokat kihagyja
+        ids = pc.min_max(part["id"])
+        name = f"part-{ids['min'].as_py()}-{ids['max'].as_py()}-{uuid.uuid4().hex}.parquet"
+        tmp_path = os.path.join(directory, f".{name}")
+        pq.write_table(part, tmp_path)
+        os.replace(tmp_path, os.path.join(directory, name))
+
+
+def partition_dates() -> list[str]:
+    if not os.path.isdir(settings.archive_dir):
+        return []
+    return sorted(
+        entry[len(_PARTITION_PREFIX):]
+        for entry in os.listdir(settings.archive_dir)
+        if entry.startswith(_PARTITION_PREFIX)
+    )
+
+
+def query_archive(
+    db: Session,
+    limit: int,
+    direction: str = "b",
+    key: tuple[datetime, int] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    location_id: int | None = None,
+) -> list[ArchivedReading]:
+    """Keyset page over the archive, mirroring ``history_service.list_readings``.
+
+    Date partitions outside the requested window are skipped, and location and
+    time predicates are pushed down to the Parquet scan. Partitions are read
+    newest-first ("b") or oldest-first ("a") until ``limit`` rows are found.
+    Results are in chronological order.
+    """
+    dates = _candidate_dates(direction, key, start, end)
+    if direction == "b":
+        dates.reverse()
+
+    expr = _filter_expression(direction, key, start, end, location_id)
+    found: list[dict] = []
+    for date in dates:
+        table = _partition_dataset(date).to_table(filter=expr)
+        if table.num_rows == 0:
+            continue
+
+        order = "descending" if direction == "b" else "ascending"
+        table = table.sort_by([("fetched_at", order), ("id", order)])
+        found.extend(table.slice(0, limit - len(found)).to_pylist())
+        if len(found) >= limit:
+            break
+
+    if direction == "b":
+        found.reverse()
+    return _with_location_names(db, found)
+
+
+def get_archived(db: Session, weather_id: int) -> ArchivedReading | None:
+    """One archived reading by id, or ``None``.
+
+    Only files whose id range (kept in the file name) covers ``weather_id``
+    are opened, so an unknown id costs a directory listing; older files
+    without a range in their name are always read. The id predicate is
+    pushed down to the Parquet scan. Blocking I/O: call it off the event loop.
+    """
+    import pyarrow.dataset as ds
+
+    for date in reversed(partition_dates()):
+        directory = os.path.join(settings.archive_dir, f"{_PARTITION_PREFIX}{date}")
+        files = [
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if not name.startswith(".") and _may_hold_id(name, weather_id)
+        ]
+        if not files:
+            continue
+        dataset = ds.dataset(files, schema=archive_schema(), format="parquet")
+        table = dataset.to_table(filter=ds.field("id") == weather_id)
+        if table.num_rows:
+            return _with_location_names(db, table.slice(0, 1).to_pylist())[0]
+    return None
+
+
+def _may_hold_id(name: str, weather_id: int) -> bool:
+    match = _PART_IDS.match(name)
+    return match is None or int(match[1]) <= weather_id <= int(match[2])
+
+
+def iter_archive(
+    start: datetime | None = None,
+    end: datetime | None = None,
+    location_id: int | None = None,
+) -> Iterator[tuple]:
+    """Archived rows in (fetched_at, id) order as export tuples, one partition in memory at a time."""
+    expr = _filter_expression("a", None, start, end, location_id)
+    for date in _candidate_dates("a", None, start, end):
+        table = _partition_dataset(date).to_table(filter=expr)
+        table = table.sort_by([("fetched_at", "ascending"), ("id", "ascending")])
+        for row in table.to_pylist():
+            yield tuple(row[name] for name in ARCHIVE_COLUMNS)
+
+
+def archive_columns(
+    start: datetime | None = None,
+    end: datetime | None = None,
+    location_id: int | None = None,
+    with_unlocated: bool = False,
+) -> tuple["np.ndarray", ...] | None:
+    """Archived ``(location_id, fetched_at, temperature_c, windspeed_kmh)`` as NumPy arrays, unordered.
+
+    Rows without a location are skipped, or kept with location id 0 when
+    ``with_unlocated`` is set. ``None`` when no partition can match.
+    """
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    dates = _candidate_dates("a", None, start, end)
+    if not dates:
+        return None
+    expr = _filter_expression("a", None, start, end, location_id)
+    if not with_unlocated:
+        expr = ds.field("location_id").is_valid() if expr is None else expr & ds.field("location_id").is_valid()
+    columns = ["location_id", "fetched_at", "temperature_c", "windspeed_kmh"]
+    table = pa.concat_tables(_partition_dataset(d).to_table(columns=columns, filter=expr) for d in dates)
+    return (
+        pc.fill_null(table["location_id"], 0).to_numpy().astype(np.int64),
+        table["fetched_at"].to_numpy().astype("datetime64[us]"),
+        table["temperature_c"].to_numpy().astype(np.float64),
+        table["windspeed_kmh"].to_numpy().astype(np.float64),
+    )
+
+
+def may_contain(
+    direction: str = "a",
+    key: tuple[datetime, int] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> bool:
+    return bool(_candidate_dates(direction, key, start, end))
+
+
+def prune_archive(cutoffs: dict[int | None, datetime]) -> Iterator[list[dict]]:
+    """Delete archived readings older than their location's cutoff, one date partition at a time.
+
+    ``cutoffs`` maps location ids (``None``: readings without a location) to
+    the oldest timestamp to keep; other locations are left alone. Partitions
+    with nothing left are removed whole, boundary ones rewritten with the
+    remaining rows. Yields the deleted rows of each changed partition.
+    """
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if not cutoffs:
+        return
+    last = max(cutoffs.values()).date().isoformat()
+    for date in partition_dates():
+        if date > last:
+            break
+        table = _partition_dataset(date).to_table()
+        loc = pc.fill_null(table["location_id"], -1).to_numpy()
+        fetched_at = table["fetched_at"].to_numpy().astype("datetime64[us]")
+        expired = np.zeros(table.num_rows, dtype=bool)
+        for location_id, cutoff in cutoffs.items():
+            expired |= (loc == (-1 if location_id is None else location_id)) & (fetched_at < np.datetime64(cutoff, "us"))
+        if not expired.any():
+            continue
+
+        directory = os.path.join(settings.archive_dir, f"{_PARTITION_PREFIX}{date}")
+        if expired.all():
+            shutil.rmtree(directory)
+        else:
+            # előbb az új fájl, utána a régiek törlése: összeomláskor legfeljebb duplikátum marad
+            old_files = [name for name in os.listdir(directory) if not name.startswith(".")]
+            _write_partitions(table.filter(pa.array(~expired)).to_pylist())
+            for name in old_files:
+                os.remove(os.path.join(directory, name))
+        yield table.filter(pa.array(expired)).to_pylist()
+
+
+def purge_archive() -> None:
+    if os.path.isdir(settings.archive_dir):
+        shutil.rmtree(settings.archive_dir)
+
+
+def _candidate_dates(direction, key, start, end) -> list[str]:
+    lo = start.date().isoformat() if start else None
+    hi = end.date().isoformat() if end else None
+    if key is not None:
+        key_date = key[0].date().isoformat()
+        if direction == "a":
+            lo = max(lo, key_date) if lo else key_date
+        else:
+            hi = min(hi, key_date) if hi else key_date
+
+    return [d for d in partition_dates() if (lo is None or d >= lo) and (hi is None or d <= hi)]
+
+
+def _filter_expression(direction, key, start, end, location_id):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    expr = None
+
+    def both(a, b):
+        return b if a is None else a & b
+
+    if location_id is not None:
+        expr = both(expr, ds.field("location_id") == location_id)
+    if start is not None:
+        expr = both(expr, ds.field("fetched_at") >= pa.scalar(start, type=pa.timestamp("us")))
+    if end is not None:
+        expr = both(expr, ds.field("fetched_at") <= pa.scalar(end, type=pa.timestamp("us")))
+    if key is not None:
+        ts = pa.scalar(key[0], type=pa.timestamp("us"))
+        if direction == "a":
+            keyset = (ds.field("fetched_at") > ts) | ((ds.field("fetched_at") == ts) & (ds.field("id") > key[1]))
+        else:
+            keyset = (ds.field("fetched_at") < ts) | ((ds.field("fetched_at") == ts) & (ds.field("id") < key[1]))
+        expr = both(expr, keyset)
+    return expr
+
+
+def _partition_dataset(date: str) -> "ds.Dataset":
+    import pyarrow.dataset as ds
+
+    return ds.dataset(
+        os.path.join(settings.archive_dir, f"{_PARTITION_PREFIX}{date}"), schema=archive_schema(), format="parquet"
+    )
+
+
+def _with_location_names(db: Session, rows: list[dict]) -> list[ArchivedReading]:
+    if not rows:
+        return []
+    names = dict(db.execute(select(Location.id, Location.name)).all())
+    return [ArchivedReading(**row, location_name=names.get(row["location_id"])) for row in rows]
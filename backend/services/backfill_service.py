@@ -0,0 +1,173 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from backend.core.config import settings
+from backend.core.database import SessionLocal
+from backend.core.logging_conf import logger
+from backend.models.backfill import BackfillCheckpoint
+from backend.models.location import Location
+from backend.models.weather import Weather
+from backend.services.archive_service import archive_columns
+from backend.services.weather_service import fetch_hourly_history_async, save_weather_records
+
+
+@dataclass
+class BackfillResult:
+    location: str
+    rows: int = 0
+    chunks: int = 0
+    # ettől a naptól kell folytatni; None, ha a kért időszak kész
+    next_date: date | None = None
+    error: str | None = None
+
+
+def date_chunks(start: date, end: date, days: int) -> list[tuple[date, date]]:
+    """``start``..``end`` split into consecutive inclusive ranges of at most ``days`` days."""
+    step = timedelta(days=max(1, days))
+    chunks = []
+    while start <= end:
+        chunks.append((start, min(end, start + step - timedelta(days=1))))
+        start += step
+    return chunks
+
+
+def hourly_arrays(hourly: dict) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Open-Meteo's ``hourly`` block as ``(times, temperatures, wind speeds)`` arrays; nulls become NaN."""
+    times = np.array(hourly["time"], dtype="datetime64[us]")
+    temps = np.array(hourly["temperature_2m"], dtype=np.float64)
+    winds = np.array(hourly["wind_speed_10m"], dtype=np.float64)
+    return times, temps, winds
+
+
+def resume_date(db: Session, location_id: int, start: date, end: date) -> date:
+    """Where a backfill of ``start``..``end`` for the location continues (``start`` if never run)."""
+    checkpoint = db.get(BackfillCheckpoint, (location_id, start, end))
+    return checkpoint.next_date if checkpoint else start
+
+
+def store_chunk(
+    db: Session,
+    loc: Location,
+    start: date,
+    end: date,
+    chunk: tuple[date, date],
+    times: np.ndarray,
+    temps: np.ndarray,
+    winds: np.ndarray,
+) -> tuple[int, date]:
+    """Insert one fetched chunk and advance the checkpoint in the same transaction.
+
+    Hours without values are dropped, and so are hours the location already
+    has a reading for, in the table or in the Parquet archive, so a
+    re-fetched day is never stored twice. When the values stop before the end
+    of the chunk (the archive lags a few days behind), the checkpoint stays
+    on the last day with data; gaps inside the chunk are skipped. Returns the
+    number of inserted rows and the next date to fetch.
+    """
+    valid = ~(np.isnan(temps) | np.isnan(winds))
+    if len(valid) and valid[-1]:
+        next_date = chunk[1] + timedelta(days=1)
+    elif valid.any():
+        # a részleges napot a következő futás újra lekéri
+        next_date = times[np.flatnonzero(valid)[-1]].astype(datetime).date()
+    else:
+        next_date = chunk[0]
+
+    times, temps, winds = times[valid], temps[valid], winds[valid]
+    if len(times):
+        existing = db.scalars(
+            select(Weather.fetched_at).where(
+                Weather.location_id == loc.id,
+                Weather.fetched_at >= times[0].astype(datetime),
+                Weather.fetched_at <= times[-1].astype(datetime),
+            )
+        ).all()
+        existing = np.array(existing, dtype="datetime64[us]")
+        archived = archive_columns(times[0].astype(datetime), times[-1].astype(datetime), loc.id)
+        if archived is not None:
+            existing = np.concatenate([existing, archived[1]])
+        if len(existing):
+            new = ~np.isin(times, existing)
+            times, temps, winds = times[new], temps[new], winds[new]
+
+    checkpoint = db.get(BackfillCheckpoint, (loc.id, start, end))
+    if checkpoint is None:
+        checkpoint = BackfillCheckpoint(location_id=loc.id, start_date=start, end_date=end, rows=0)
+        db.add(checkpoint)
+    checkpoint.next_date = next_date
+    checkpoint.rows += len(times)
+    checkpoint.updated_at = datetime.utcnow()
+
+    if len(times):
+        # a checkpoint és a sorok (aggregátumokkal együtt) egy commitban
+        rows = list(zip(temps.tolist(), winds.tolist(), [loc.latitude] * len(times), [loc.longitude] * len(times)))
+        save_weather_records(db, rows, location_ids=[loc.id] * len(times), fetched_at=times.tolist())
+    else:
+        db.commit()
+    return len(times), next_date
+
+
+async def backfill(
+    locations: list[Location],
+    start: date,
+    end: date,
+    chunk_days: int | None = None,
+    concurrency: int | None = None,
+    source: str = "archive",
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> list[BackfillResult]:
+    """Load hourly history from Open-Meteo for ``locations`` between ``start`` and ``end``.
+
+    Each location is fetched in ``chunk_days`` requests, one after the other,
+    and every chunk is stored in one transaction together with its
+    checkpoint; up to ``concurrency`` locations run at once. Running the same
+    range again resumes where it stopped. A failing location is reported in
+    its result and does not stop the others. Needs ``open_http_client()``.
+    """
+    chunk_days = chunk_days or settings.backfill_chunk_days
+    slots = asyncio.Semaphore(concurrency or settings.backfill_concurrency)
+    # SQLite egyszerre egy írót enged: a lekérések párhuzamosak, az írások sorban
+    write_lock = asyncio.Lock()
+
+    async def run(loc: Location) -> BackfillResult:
+        async with slots:
+            return await _backfill_location(loc, start, end, chunk_days, source, session_factory, write_lock)
+
+    return list(await asyncio.gather(*(run(loc) for loc in locations)))
+
+
+async def _backfill_location(loc, start, end, chunk_days, source, session_factory, write_lock) -> BackfillResult:
+    result = BackfillResult(loc.name)
+    next_date = await asyncio.to_thread(_with_session, session_factory, resume_date, loc.id, start, end)
+    try:
+        for chunk in date_chunks(next_date, end, chunk_days):
+            hourly = await fetch_hourly_history_async(loc.latitude, loc.longitude, *chunk, source=source)
+            times, temps, winds = hourly_arrays(hourly)
+            async with write_lock:
+                inserted, next_date = await asyncio.to_thread(
+                    _with_session, session_factory, store_chunk, loc, start, end, chunk, times, temps, winds
+                )
+            result.rows += inserted
+            result.chunks += 1
+            if next_date <= chunk[1]:
+                logger.info(f"{loc.name}: no data after {next_date} yet, stopping")
+                break
+    except Exception as e:
+        result.error = repr(e)
+        logger.warning(f"{loc.name}: backfill stopped at {next_date}: {e!r}")
+
+    result.next_date = next_date if next_date <= end else None
+    logger.info(f"{loc.name}: backfilled {result.rows} readings in {result.chunks} chunks")
+    return result
+
+
+def _with_session(session_factory, fn, *args):
+    db = session_factory()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
@@ -0,0 +1,22 @@
+from sqlalchemy.orm import Session
+from backend.services.history_service import latest_per_location, readings_after
+from backend.services.stats_service import get_stats
+
+
+def dashboard_snapshot(db: Session, after_id: int | None = None, limit: int = 500) -> dict:
+    """Everything the dashboard shows, in one round trip.
+
+    ``readings`` holds the rows newer than ``after_id`` (or the newest
+    ``limit`` rows on the first call); the client appends them and sends
+    ``last_id`` next time. ``has_more`` means the next call has more to
+    fetch. ``stats.count`` dropping below the previous value means the data
+    was reset and the client should start over.
+    """
+    readings, has_more = readings_after(db, after_id, limit)
+    return {
+        "stats": get_stats(db),
+        "latest": latest_per_location(db),
+        "readings": readings,
+        "last_id": readings[-1][0] if readings else after_id,
+        "has_more": has_more,
+    }
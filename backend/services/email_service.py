@@ -1,22 +1,163 @@
+import random
 import smtplib
 import ssl
+from datetime import datetime, timedelta
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
 from backend.core.config import settings
+from backend.core.logging_conf import logger
+from backend.models.outbox import EmailOutbox, OUTBOX_FAILED, OUTBOX_PENDING, OUTBOX_SENT
+
+# az elküldött leveleket ennyi napig tartjuk meg a táblában
+SENT_KEEP_DAYS = 7
 
-def send_email(subject: str, message: str):
-    email_user = settings.email_user
-    email_pass = settings.email_pass
-    email_to = settings.email_to
 
+def _build_message(subject: str, message: str) -> MIMEMultipart:
     msg = MIMEMultipart()
-    msg["From"] = email_user
-    msg["To"] = email_to
+    msg["From"] = settings.email_user
+    msg["To"] = settings.email_to
     msg["Subject"] = subject
 
     msg.attach(MIMEText(message, "plain"))
+    return msg
+
+
+class SmtpConnection:
+    """One SMTP session reused across sends; reconnects once if the server dropped it."""
+
+    def __init__(self):
+        self._server: smtplib.SMTP | None = None
+
+    def send(self, subject: str, message: str) -> None:
+        msg = _build_message(subject, message)
+        try:
+            self._connected().sendmail(settings.email_user, settings.email_to, msg.as_string())
+        except smtplib.SMTPServerDisconnected:
+            # a szerver bontotta a tétlen kapcsolatot: egy új kapcsolattal még egyszer
+            self.close()
+            self._connected().sendmail(settings.email_user, settings.email_to, msg.as_string())
+
+    def close(self) -> None:
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+    def _connected(self) -> smtplib.SMTP:
+        if self._server is None:
+            self._server = _open_smtp()
+        return self._server
+
+
+def _open_smtp() -> smtplib.SMTP:
+    host, port, timeout = settings.smtp_host, settings.smtp_port, settings.smtp_timeout_s
+    if settings.smtp_security == "ssl":
+        server = smtplib.SMTP_SSL(host, port, timeout=timeout, context=ssl.create_default_context())
+    else:
+        server = smtplib.SMTP(host, port, timeout=timeout)
+        if settings.smtp_security == "starttls":
+            server.starttls(context=ssl.create_default_context())
+
+    try:
+        if settings.email_pass:
+            server.login(settings.email_user, settings.email_pass)
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def send_email(subject: str, message: str):
+    """Send one message right away on a short-lived connection."""
+    conn = SmtpConnection()
+    try:
+        conn.send(subject, message)
+    finally:
+        conn.close()
+
+
+# ===== Outbox =====
+
+def enqueue_email(db: Session, subject: str, message: str) -> EmailOutbox:
+    """Store a message for the background sender; the caller's tick never talks to SMTP."""
+    item = EmailOutbox(subject=subject, body=message, next_attempt_at=datetime.utcnow())
+    db.add(item)
+    db.commit()
+    return item
+
+
+def deliver_outbox(db: Session, conn: SmtpConnection, now: datetime | None = None) -> int:
+    """Send the due outbox messages over ``conn``, several at a time as digests.
+
+    Pending messages wait until the oldest is ``settings.email_digest_window_min``
+    minutes old or ``settings.email_digest_max`` of them are due, then go out
+    as one email. A failed send is retried with exponential backoff; after
+    ``settings.email_max_attempts`` the messages are marked failed. Returns the
+    number of messages delivered.
+    """
+    now = now or datetime.utcnow()
+    delivered = 0
+
+    while True:
+        batch = db.scalars(
+            select(EmailOutbox)
+            .where(EmailOutbox.status == OUTBOX_PENDING, EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.id)
+            .limit(max(1, settings.email_digest_max))
+        ).all()
+        if not batch or not _digest_ready(batch, now):
+            break
+
+        subject, message = _digest(batch)
+        try:
+            conn.send(subject, message)
+        except Exception as e:
+            conn.close()
+            _schedule_retry(batch, now, e)
+            db.commit()
+            logger.warning(f"Email delivery failed ({len(batch)} messages): {e}")
+            break
+
+        for item in batch:
+            item.status = OUTBOX_SENT
+            item.sent_at = now
+            item.attempts += 1
+        db.commit()
+        delivered += len(batch)
+        logger.info(f"Email sent ({len(batch)} reports).")
+
+    db.execute(delete(EmailOutbox).where(
+        EmailOutbox.status == OUTBOX_SENT, EmailOutbox.sent_at < now - timedelta(days=SENT_KEEP_DAYS)
+    ))
+    db.commit()
+    return delivered
+
+
+def _digest_ready(batch: list[EmailOutbox], now: datetime) -> bool:
+    if len(batch) >= settings.email_digest_max:
+        return True
+    return batch[0].created_at <= now - timedelta(minutes=settings.email_digest_window_min)
+
+
+def _digest(batch: list[EmailOutbox]) -> tuple[str, str]:
+    if len(batch) == 1:
+        return batch[0].subject, batch[0].body
+
+    parts = [f"=== {item.subject} ({item.created_at:%Y-%m-%d %H:%M} UTC) ===\n{item.body}" for item in batch]
+    return f"Időjárás riport összesítő ({len(batch)} jelentés)", "\n\n".join(parts)
+
 
-    context = ssl.create_default_context()
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as server:
-        server.login(email_user, email_pass)
-        server.sendmail(email_user, email_to, msg.as_string())
+def _schedule_retry(batch: list[EmailOutbox], now: datetime, error: Exception) -> None:
+    for item in batch:
+        item.attempts += 1
+        item.last_error = str(error)[:500]
+        if item.attempts >= settings.email_max_attempts:
+            item.status = OUTBOX_FAILED
+            continue
+        # exponenciális várakozás, véletlen szórással
+        delay = min(settings.email_retry_base_s * 2 ** (item.attempts - 1), settings.email_retry_max_s)
+        item.next_attempt_at = now + timedelta(seconds=delay * random.uniform(0.8, 1.2))
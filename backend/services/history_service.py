@@ -0,0 +1,269 @@
+import base64
+import csv
+import heapq
+import io
+import json
+from dataclasses import astuple
+from datetime import datetime
+from itertools import islice
+from typing import Iterator
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session, joinedload
+from backend.models.aggregate import OVERALL_LOCATION_ID, WeatherAggregate
+from backend.models.location import Location
+from backend.models.weather import Weather
+from backend.services import archive_service
+
+EXPORT_COLUMNS = (
+    "id", "temperature_c", "windspeed_kmh", "latitude", "longitude", "fetched_at", "location_id", "location_name",
+)
+# ennyi sort kér le egyszerre a szerveroldali kurzor
+EXPORT_BATCH_SIZE = 1000
+
+# EXPORT_COLUMNS sorrendben; ORM objektumok helyett sima tuple-ök
+_ROW_COLUMNS = (
+    Weather.id,
+    Weather.temperature_c,
+    Weather.windspeed_kmh,
+    Weather.latitude,
+    Weather.longitude,
+    Weather.fetched_at,
+    Weather.location_id,
+    Location.name.label("location_name"),
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# (fetched_at, id) szerinti rendezés: a fetched_at és a (location_id, fetched_at)
+# indexek is ebben a sorrendben tárolják a sorokat (a rowid az index végén van)
+_ORDER_KEY = tuple_(Weather.fetched_at, Weather.id)
+
+
+def data_version(db: Session) -> tuple[str, datetime | None]:
+    """Cheap fingerprint of the weather table for HTTP validators, plus its newest timestamp.
+
+    Built from min/max id, the newest ``fetched_at`` and the running row
+    count, each answered from an index or a primary-key lookup (separate
+    scalar subqueries, so SQLite can use its min/max optimisation). Any
+    insert, delete, archive run or reset changes it.
+    """
+    min_id, max_id, newest, count = db.execute(select(
+        select(func.min(Weather.id)).scalar_subquery(),
+        select(func.max(Weather.id)).scalar_subquery(),
+        select(func.max(Weather.fetched_at)).scalar_subquery(),
+        select(WeatherAggregate.count).where(WeatherAggregate.location_id == OVERALL_LOCATION_ID).scalar_subquery(),
+    )).one()
+    return f"{min_id}-{max_id}-{count}-{newest.isoformat() if newest else ''}", newest
+
+
+def encode_cursor(direction: str, rec: Weather) -> str:
+    raw = json.dumps({"d": direction, "t": rec.fetched_at.isoformat(), "id": rec.id})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, tuple[datetime, int]]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = data["d"]
+        key = (datetime.fromisoformat(data["t"]), int(data["id"]))
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+    if direction not in ("a", "b"):
+        raise InvalidCursor("Malformed cursor")
+    return direction, key
+
+
+def list_readings(
+    db: Session,
+    limit: int = 50,
+    cursor: str | None = None,
+    after_id: int | None = None,
+    before_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    location_id: int | None = None,
+    as_tuples: bool = False,
+) -> tuple[list, str | None]:
+    """One page of readings in chronological order, plus the cursor of the next page.
+
+    Keyset pagination on ``(fetched_at, id)``: without a cursor the newest
+    ``limit`` rows are returned and the next cursor walks backwards in time;
+    ``after_id`` (or an "after" cursor) walks forwards. Every page is an index
+    range scan, however deep it is. Archived readings are merged in when the
+    page can reach into archived date partitions.
+
+    With ``as_tuples`` the rows are plain tuples in ``EXPORT_COLUMNS`` order
+    instead of ``Weather`` objects (no ORM identity map, no relationship load).
+    """
+    direction, key = "b", None
+    if cursor:
+        direction, key = decode_cursor(cursor)
+    elif after_id is not None:
+        direction, key = "a", _key_of(db, after_id)
+    elif before_id is not None:
+        direction, key = "b", _key_of(db, before_id)
+
+    if as_tuples:
+        q = select(*_ROW_COLUMNS).outerjoin(Location, Location.id == Weather.location_id)
+    else:
+        q = select(Weather).options(joinedload(Weather.location))
+    if location_id is not None:
+        q = q.where(Weather.location_id == location_id)
+    if start is not None:
+        q = q.where(Weather.fetched_at >= start)
+    if end is not None:
+        q = q.where(Weather.fetched_at <= end)
+
+    if direction == "a":
+        if key is not None:
+            q = q.where(_ORDER_KEY > key)
+        q = q.order_by(Weather.fetched_at, Weather.id)
+    else:
+        if key is not None:
+            q = q.where(_ORDER_KEY < key)
+        q = q.order_by(Weather.fetched_at.desc(), Weather.id.desc())
+
+    rows = list(db.execute(q.limit(limit)).all() if as_tuples else db.scalars(q.limit(limit)))
+    if direction == "b":
+        rows.reverse()  # időrendbe
+
+    rows = _merge_archive(db, rows, limit, direction, key, start, end, location_id)
+
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = encode_cursor("a", rows[-1]) if direction == "a" else encode_cursor("b", rows[0])
+    if as_tuples:
+        # az archív sorok dataclassok, ugyanabban a mezősorrendben
+        rows = [astuple(row) if isinstance(row, archive_service.ArchivedReading) else tuple(row) for row in rows]
+    return rows, next_cursor
+
+
+def latest_reading(db: Session, location_id: int | None, lat: float, lon: float) -> Weather | None:
+    """Newest stored reading for a location (or, without one, for the exact coordinates)."""
+    q = select(Weather).options(joinedload(Weather.location))
+    if location_id is not None:
+        q = q.where(Weather.location_id == location_id)
+    else:
+        q = q.where(Weather.latitude == lat, Weather.longitude == lon)
+    return db.scalars(q.order_by(Weather.fetched_at.desc(), Weather.id.desc()).limit(1)).first()
+
+
+def readings_after(db: Session, after_id: int | None, limit: int) -> tuple[list[tuple], bool]:
+    """Rows with ``id > after_id`` in id order, as ``EXPORT_COLUMNS`` tuples, and whether more follow.
+
+    Without ``after_id`` the newest ``limit`` rows are returned. Meant for
+    clients that keep a local copy and only append what is new (primary key
+    range scan, no archive merge: archived rows are never new).
+    """
+    q = select(*_ROW_COLUMNS).outerjoin(Location, Location.id == Weather.location_id)
+    if after_id is None:
+        rows = db.execute(q.order_by(Weather.id.desc()).limit(limit)).all()
+        return [tuple(row) for row in reversed(rows)], False
+
+    rows = db.execute(q.where(Weather.id > after_id).order_by(Weather.id).limit(limit + 1)).all()
+    return [tuple(row) for row in rows[:limit]], len(rows) > limit
+
+
+def latest_per_location(db: Session) -> list[tuple]:
+    """Newest reading of every location that has one, as ``EXPORT_COLUMNS`` tuples."""
+    # helyenként egy indexes keresés a (location_id, fetched_at) indexen, nem teljes scan
+    newest_id = (
+        select(Weather.id)
+        .where(Weather.location_id == Location.id)
+        .order_by(Weather.fetched_at.desc(), Weather.id.desc())
+        .limit(1)
+        .correlate(Location)
+        .scalar_subquery()
+    )
+    rows = db.execute(
+        select(*_ROW_COLUMNS).select_from(Location).join(Weather, Weather.id == newest_id).order_by(Location.id)
+    ).all()
+    return [tuple(row) for row in rows]
+
+
+def _merge_archive(db, rows, limit, direction, key, start, end, location_id) -> list:
+    lo, hi = start, end
+    if len(rows) == limit:
+        # teli oldalt csak a hot sorok időablakába eső archív sorok módosíthatnak
+        if direction == "b":
+            lo = max(lo, rows[0].fetched_at) if lo else rows[0].fetched_at
+        else:
+            hi = min(hi, rows[-1].fetched_at) if hi else rows[-1].fetched_at
+
+    if not archive_service.may_contain(direction, key, lo, hi):
+        return rows
+
+    archived = archive_service.query_archive(db, limit, direction, key, lo, hi, location_id)
+    merged = sorted(rows + archived, key=lambda r: (r.fetched_at, r.id))
+    return merged[-limit:] if direction == "b" else merged[:limit]
+
+
+def _key_of(db: Session, weather_id: int) -> tuple[datetime, int]:
+    fetched_at = db.scalar(select(Weather.fetched_at).where(Weather.id == weather_id))
+    if fetched_at is None:
+        # archivált azonosítótól is lehet lapozni
+        archived = archive_service.get_archived(db, weather_id)
+        if archived is None:
+            raise InvalidCursor(f"Unknown weather id: {weather_id}")
+        fetched_at = archived.fetched_at
+    return fetched_at, weather_id
+
+
+def iter_export(
+    db: Session,
+    fmt: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    location_id: int | None = None,
+) -> Iterator[str]:
+    """Stream readings as NDJSON lines or CSV, one chunk per fetched batch.
+
+    Plain column tuples are read through a streaming cursor (``yield_per``),
+    so memory use does not depend on the number of exported rows.
+    """
+    q = (
+        select(*_ROW_COLUMNS)
+        .outerjoin(Location, Location.id == Weather.location_id)
+        .order_by(Weather.fetched_at, Weather.id)
+    )
+    if location_id is not None:
+        q = q.where(Weather.location_id == location_id)
+    if start is not None:
+        q = q.where(Weather.fetched_at >= start)
+    if end is not None:
+        q = q.where(Weather.fetched_at <= end)
+
+    result = db.execute(q.execution_options(yield_per=EXPORT_BATCH_SIZE, stream_results=True))
+    rows: Iterator[tuple] = (tuple(row) for row in result)
+
+    # az archív sorok időrendben összefésülve a hot sorokkal
+    if archive_service.may_contain("a", None, start, end):
+        names = dict(db.execute(select(Location.id, Location.name)).all())
+        archived = ((*row, names.get(row[6])) for row in archive_service.iter_archive(start, end, location_id))
+        rows = heapq.merge(rows, archived, key=lambda row: (row[5], row[0]))
+
+    if fmt == "csv":
+        yield ",".join(EXPORT_COLUMNS) + "\n"
+        for batch in _batched(rows, EXPORT_BATCH_SIZE):
+            buf = io.StringIO()
+            csv.writer(buf, lineterminator="\n").writerows(_export_values(row) for row in batch)
+            yield buf.getvalue()
+    else:
+        for batch in _batched(rows, EXPORT_BATCH_SIZE):
+            yield "".join(
+                json.dumps(dict(zip(EXPORT_COLUMNS, _export_values(row))), ensure_ascii=False) + "\n"
+                for row in batch
+            )
+
+
+def _batched(rows: Iterator[tuple], size: int) -> Iterator[list[tuple]]:
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def _export_values(row) -> tuple:
+    return (*row[:5], row[5].isoformat(), *row[6:])
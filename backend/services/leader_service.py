@@ -0,0 +1,61 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import case, delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from backend.models.lease import SchedulerLease
+
+SCHEDULER_LEASE = "scheduler"
+
+# ez a folyamat azonosítója a lease táblában
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def try_acquire_lease(
+    db: Session, name: str, holder: str, ttl_s: float, now: datetime | None = None
+) -> datetime | None:
+    """Take or renew the lease ``name`` for ``holder``.
+
+    Succeeds when the lease is free, expired or already held by ``holder``;
+    the conditional UPDATE (or the INSERT on the primary key) makes the
+    check-and-take atomic across processes. Returns the new expiry time, or
+    None if another holder has a valid lease. Expiry uses the workers' own
+    clocks, so they are assumed to be roughly in sync.
+    """
+    now = now or datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl_s)
+
+    result = db.execute(
+        update(SchedulerLease)
+        .where(
+            SchedulerLease.name == name,
+            (SchedulerLease.holder == holder) | (SchedulerLease.expires_at < now),
+        )
+        .values(
+            # megújításkor az eredeti megszerzési idő marad
+            acquired_at=case((SchedulerLease.holder == holder, SchedulerLease.acquired_at), else_=now),
+            holder=holder,
+            expires_at=expires_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 1:
+        db.commit()
+        return expires_at
+
+    try:
+        db.add(SchedulerLease(name=name, holder=holder, acquired_at=now, expires_at=expires_at))
+        db.commit()
+    except IntegrityError:
+        # más worker tartja (vagy épp most szerezte meg)
+        db.rollback()
+        return None
+    return expires_at
+
+
+def release_lease(db: Session, name: str, holder: str) -> None:
+    """Give up the lease so another worker can take over without waiting for expiry."""
+    db.execute(delete(SchedulerLease).where(SchedulerLease.name == name, SchedulerLease.holder == holder))
+    db.commit()
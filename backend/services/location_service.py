@@ -0,0 +1,58 @@
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from backend.models.location import Location
+from backend.models.weather import Weather
+
+# ===== 5 város koordinátái (a locations tábla kezdeti tartalma) =====
+CITIES = [
+    ("Budapest", 47.4979, 19.0402),
+    ("Eger", 47.902534, 20.377228),
+    ("Debrecen", 47.531605, 21.627312),
+    ("Szeged", 46.253, 20.141),
+    ("Pécs", 46.0727, 18.2323),
+]
+
+# ennyin belül számít egyezőnek két koordináta
+COORD_TOLERANCE = 1e-4
+
+
+def seed_locations(db: Session) -> None:
+    """Insert the missing ``CITIES`` and link legacy weather rows to them."""
+    existing = {name for (name,) in db.query(Location.name)}
+    for name, lat, lon in CITIES:
+        if name not in existing:
+            db.add(Location(name=name, latitude=lat, longitude=lon))
+    db.flush()
+
+    # régi, location_id nélküli sorok hozzárendelése koordináta alapján
+    for loc in db.query(Location).all():
+        db.execute(
+            update(Weather)
+            .where(
+                Weather.location_id.is_(None),
+                func.abs(Weather.latitude - loc.latitude) < COORD_TOLERANCE,
+                func.abs(Weather.longitude - loc.longitude) < COORD_TOLERANCE,
+            )
+            .values(location_id=loc.id)
+        )
+    db.commit()
+
+
+def list_locations(db: Session) -> list[Location]:
+    return db.query(Location).order_by(Location.id).all()
+
+
+def resolve_location_id(db: Session, lat: float, lon: float) -> int | None:
+    row = (
+        db.query(Location.id)
+        .filter(
+            func.abs(Location.latitude - lat) < COORD_TOLERANCE,
+            func.abs(Location.longitude - lon) < COORD_TOLERANCE,
+        )
+        .first()
+    )
+    return row.id if row else None
+
+
+def get_location_by_name(db: Session, name: str) -> Location | None:
+    return db.query(Location).filter(Location.name == name).first()
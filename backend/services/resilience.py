@@ -0,0 +1,145 @@
+import asyncio
+import random
+import time
+from typing import Callable
+
+# megszakító állapotok
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling upstream while the circuit breaker is open."""
+
+
+class TokenBucket:
+    """Client-side rate limiter: ``rate_per_s`` calls on average, bursts up to ``burst``.
+
+    Meant for a single event loop; ``rate_per_s <= 0`` disables limiting.
+    """
+
+    def __init__(self, rate_per_s: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate_per_s = rate_per_s
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+
+    async def acquire(self) -> None:
+        if self.rate_per_s <= 0:
+            return
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate_per_s)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_s)
+        self._updated = now
+
+    def stats(self) -> dict:
+        self._refill()
+        return {"rate_per_s": self.rate_per_s, "burst": self.burst, "tokens": round(self._tokens, 2)}
+
+
+class RetryBudget:
+    """Caps retries at ``ratio`` of recent calls so retries cannot multiply an outage.
+
+    Every call deposits ``ratio`` tokens and every retry spends one; ``reserve``
+    retries are always available for low-traffic periods.
+    """
+
+    def __init__(self, ratio: float, reserve: int = 3):
+        self.ratio = ratio
+        self.reserve = reserve
+        self._tokens = float(reserve)
+        self.exhausted = 0
+
+    def deposit(self) -> None:
+        self._tokens = min(self._tokens + self.ratio, self.reserve + 100 * self.ratio)
+
+    def try_spend(self) -> bool:
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        self.exhausted += 1
+        return False
+
+    def stats(self) -> dict:
+        return {"ratio": self.ratio, "tokens": round(self._tokens, 2), "exhausted": self.exhausted}
+
+
+class CircuitBreaker:
+    """Fails fast after ``failure_threshold`` consecutive failures.
+
+    After ``reset_timeout_s`` one probe call is let through (half-open): success
+    closes the circuit, failure opens it for another timeout.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout_s: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout_s = reset_timeout_s
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout_s:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == CLOSED:
+            return True
+        # beragadt (pl. megszakított) próbahívás után újabb próbát enged
+        if state == HALF_OPEN and (
+            not self._probe_in_flight or self._clock() - self._probe_started >= self.reset_timeout_s
+        ):
+            self._probe_in_flight = True
+            self._probe_started = self._clock()
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self._state = CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probe_in_flight = False
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._state = OPEN
+            self._opened_at = self._clock()
+
+    def reset(self) -> None:
+        self.record_success()
+        self.rejected = 0
+
+    def stats(self) -> dict:
+        state = self.state
+        retry_in = self.reset_timeout_s - (self._clock() - self._opened_at) if state == OPEN else 0.0
+        return {
+            "state": state,
+            "consecutive_failures": self._failures,
+            "failure_threshold": self.failure_threshold,
+            "retry_in_s": round(max(0.0, retry_in), 2),
+            "rejected": self.rejected,
+        }
+
+
+def backoff_delay(attempt: int, base_s: float, max_s: float) -> float:
+    """Full-jitter exponential backoff for retry number ``attempt`` (1-based)."""
+    return random.uniform(0, min(max_s, base_s * 2 ** (attempt - 1)))
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select, text
+from sqlalchemy.orm import Session
+from backend.core.config import settings
+from backend.core.logging_conf import logger
+from backend.models.aggregate import OVERALL_LOCATION_ID, WeatherAggregate
+from backend.models.backfill import BackfillCheckpoint
+from backend.models.location import Location
+from backend.models.weather import Weather
+from backend.services.archive_service import prune_archive
+from backend.services.stats_service import clear_aggregates, remove_readings
+
+
+def retention_policies(db: Session, default_days: int | None = None) -> list[tuple[int | None, int]]:
+    """``(location_id, days)`` pairs to enforce; ``None`` stands for readings without a location."""
+    default_days = settings.retention_days if default_days is None else default_days
+    policies = [
+        (loc_id, days if days is not None else default_days)
+        for loc_id, days in db.execute(select(Location.id, Location.retention_days).order_by(Location.id))
+    ]
+    policies.append((None, default_days))
+    return [(loc_id, days) for loc_id, days in policies if days > 0]
+
+
+def enforce_retention(db: Session, default_days: int | None = None, batch_size: int | None = None) -> int:
+    """Delete readings older than each location's retention period.
+
+    Deletes go in batches of ``settings.retention_batch_size`` rows, each in
+    its own short transaction, picked through the ``(location_id,
+    fetched_at)`` index so writers are never blocked for long. Expired
+    readings in the Parquet archive are pruned too, partition by partition.
+    Deleted rows are taken out of the running aggregates and rollups, so
+    stats only count readings that still exist (in the table or the archive).
+    """
+    batch_size = batch_size or settings.retention_batch_size
+    now = datetime.utcnow()
+    cutoffs = {loc_id: now - timedelta(days=days) for loc_id, days in retention_policies(db, default_days)}
+    deleted = 0
+
+    for loc_id, cutoff in cutoffs.items():
+        location_filter = Weather.location_id.is_(None) if loc_id is None else Weather.location_id == loc_id
+
+        while True:
+            rows = db.execute(
+                select(Weather.id, Weather.temperature_c, Weather.windspeed_kmh, Weather.location_id, Weather.fetched_at)
+                .where(location_filter, Weather.fetched_at < cutoff)
+                .order_by(Weather.fetched_at)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            db.execute(delete(Weather).where(Weather.id.in_([row.id for row in rows])))
+            remove_readings(db, [row._asdict() for row in rows])
+            db.commit()
+            deleted += len(rows)
+
+    for rows in prune_archive(cutoffs):
+        remove_readings(db, rows)
+        db.commit()
+        deleted += len(rows)
+
+    if deleted:
+        logger.info(f"Retention: deleted {deleted} readings")
+        incremental_vacuum(db)
+    return deleted
+
+
+def incremental_vacuum(db: Session) -> int:
+    """Return free pages to the OS; no-op unless the SQLite file uses ``auto_vacuum=INCREMENTAL``."""
+    if db.get_bind().dialect.name != "sqlite":
+        return 0
+    if db.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+        return 0
+
+    free_pages = db.execute(text("PRAGMA freelist_count")).scalar()
+    db.commit()
+    if free_pages:
+        # a pragma lépésenként egy lapot szabadít fel; az executescript végigléptet rajta
+        raw = db.get_bind().raw_connection()
+        try:
+            raw.driver_connection.executescript("PRAGMA incremental_vacuum")
+        finally:
+            raw.close()
+        logger.info(f"Retention: released {free_pages} free pages")
+    return free_pages
+
+
+def reset_readings(db: Session) -> int:
+    """Empty the weather table by dropping and recreating it, without a row scan.
+
+    Returns the number of stored readings (table and archive), taken from
+    the running aggregates instead of a ``count()``; retention deletes are
+    already subtracted from them.
+    """
+    overall = db.get(WeatherAggregate, OVERALL_LOCATION_ID)
+    count = overall.count if overall else 0
+
+    conn = db.connection()
+    Weather.__table__.drop(conn)
+    Weather.__table__.create(conn)
+    clear_aggregates(db)
+    # a visszatöltés újrakezdhető legyen, ne jelezzen kész időszakot üres táblára
+    db.execute(delete(BackfillCheckpoint))
+    db.commit()
+    return count
@@ -1,74 +1,392 @@
-from apscheduler.schedulers.background import BackgroundScheduler
+import asyncio
+from datetime import datetime, timedelta
+from apscheduler.executors.asyncio import AsyncIOExecutor
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from backend.core.database import SessionLocal
 from backend.core.config import settings
 from backend.core.logging_conf import logger
-from backend.services.weather_service import fetch_current_weather, save_weather_record
-from backend.services.email_service import send_email
+from backend.core.metrics import SCHEDULER_CITY_FETCHES, SCHEDULER_JOB_DURATION
+from backend.models.location import Location
+from backend.models.weather import Weather
+from backend.services.location_service import list_locations
+from backend.services.archive_service import archive_old_readings
+from backend.services.leader_service import SCHEDULER_LEASE, WORKER_ID, release_lease, try_acquire_lease
+from backend.services.retention_service import enforce_retention
+from backend.services.weather_service import (
+    fetch_current_weather_many_async,
+    refresh_current_weather,
+    save_weather_records,
+)
+from backend.services.email_service import SmtpConnection, deliver_outbox, enqueue_email
 
-# ===== 5 város koordinátái =====
-CITIES = [
-    ("Budapest", 47.4979, 19.0402),
-    ("Eger", 47.902534, 20.377228),
-    ("Debrecen", 47.531605, 21.627312),
-    ("Szeged", 46.253, 20.141),
-    ("Pécs", 46.0727, 18.2323),
-]
+scheduler: AsyncIOScheduler | None = None
 
-scheduler: BackgroundScheduler | None = None
+# ===== Vezérválasztás: több worker közül csak a lease birtokosa futtat jobokat =====
+_leader_task: asyncio.Task | None = None
+_lease_until: datetime | None = None
 
+# a küldő job újrahasználja ugyanazt az SMTP kapcsolatot
+_smtp = SmtpConnection()
 
-def _job():
-    logger.info("Scheduler tick: fetching weather for 5 cities…")
-    db: Session = SessionLocal()
+# ===== Helyenkénti ütemezés =====
+LOCATION_JOB_PREFIX = "location:"
+# ennyi percenként veszi át a locations tábla változásait
+LOCATION_SYNC_INTERVAL_MIN = 10
+_job_slots: asyncio.Semaphore | None = None
+# a helyenkénti módban a jelentés intervallumonként egy, ettől az időponttól tárolt mérésekből
+_report_since: datetime | None = None
+
+REPORT_SUBJECT = "Óránkénti időjárás jelentés"
+
+
+async def _job():
+    with SCHEDULER_JOB_DURATION.labels("batch").time():
+        await _run_batch()
+
+
+async def _run_batch():
+    try:
+        # a figyelt helyek a locations táblából jönnek
+        locations = await asyncio.to_thread(_load_locations)
+        logger.info(f"Scheduler tick: fetching weather for {len(locations)} cities…")
+
+        # lekérés Open-Meteo-ból, egy kérés városcsomagonként; egy hibás csomag nem állítja le a ticket
+        results = await fetch_current_weather_many_async(
+            [(loc.latitude, loc.longitude) for loc in locations], skip_failed=True
+        )
+        fetched = [(loc, row) for loc, row in zip(locations, results) if row is not None]
+        for loc, row in zip(locations, results):
+            if row is None:
+                SCHEDULER_CITY_FETCHES.labels(loc.name, "failed").inc()
+        if not fetched:
+            logger.warning("Scheduler tick: no location could be fetched")
+            return
+        locations, results = [loc for loc, _ in fetched], [row for _, row in fetched]
+
+        # DB írás blokkoló, ezért külön szálon fut
+        await asyncio.to_thread(_store_and_report, locations, results)
+        for loc in locations:
+            SCHEDULER_CITY_FETCHES.labels(loc.name, "ok").inc()
+
+    except Exception as e:
+        logger.exception("Scheduled job failed: %s", e)
+
+
+async def _location_job(loc: Location):
+    """Fetch and store one location; bounded by ``_job_slots`` and a fetch timeout."""
+    async with _job_slots:
+        outcome = "ok"
+        with SCHEDULER_JOB_DURATION.labels("location").time():
+            try:
+                row = await asyncio.wait_for(
+                    refresh_current_weather(loc.latitude, loc.longitude), settings.scheduler_job_timeout_s
+                )
+                # a jelentést a _report_job küldi intervallumonként egyben
+                await asyncio.to_thread(_store_and_report, [loc], [row], False)
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                logger.warning(f"{loc.name}: fetch timed out after {settings.scheduler_job_timeout_s}s")
+            except Exception as e:
+                outcome = "failed"
+                logger.exception("Location job failed for %s: %s", loc.name, e)
+        SCHEDULER_CITY_FETCHES.labels(loc.name, outcome).inc()
+
+
+async def _sync_location_jobs():
+    try:
+        locations = await asyncio.to_thread(_load_locations)
+        if scheduler is not None:
+            apply_location_jobs(scheduler, locations)
+    except Exception as e:
+        logger.exception("Location job sync failed: %s", e)
+
+
+def apply_location_jobs(sched: AsyncIOScheduler, locations: list[Location]) -> None:
+    """Keep one interval job per location, start times spread evenly over the interval.
+
+    Each job gets ``settings.scheduler_jitter_s`` of random jitter on top, so
+    the locations never hit Open-Meteo at the same moment. Jobs of removed
+    locations are dropped; unchanged ones keep their schedule, and a job
+    whose location was moved or renamed is replaced with the current row.
+    """
+    wanted = {f"{LOCATION_JOB_PREFIX}{loc.id}": loc for loc in locations}
+    for job in sched.get_jobs():
+        if job.id.startswith(LOCATION_JOB_PREFIX) and job.id not in wanted:
+            job.remove()
+
+    now = datetime.now(sched.timezone)
+    for i, (job_id, loc) in enumerate(wanted.items()):
+        interval = timedelta(minutes=loc.fetch_interval_min or settings.scheduler_interval_min)
+        job = sched.get_job(job_id)
+        # új intervallum vagy módosult hely (koordináta, név) esetén a job újra létrejön a friss sorral
+        if job is not None and job.trigger.interval == interval and _same_place(job.args[0], loc):
+            continue
+
+        sched.add_job(
+            _location_job,
+            IntervalTrigger(
+                seconds=interval.total_seconds(),
+                start_date=now + interval * i / len(wanted),
+                jitter=settings.scheduler_jitter_s or None,
+            ),
+            args=[loc],
+            id=job_id,
+            name=f"weather {loc.name}",
+            replace_existing=True,
+        )
 
+
+def _same_place(a: Location, b: Location) -> bool:
+    return (a.latitude, a.longitude, a.name) == (b.latitude, b.longitude, b.name)
+
+
+def _load_locations() -> list[Location]:
+    db: Session = SessionLocal()
     try:
-        report_lines = []
+        return list_locations(db)
+    finally:
+        db.close()
 
-        for name, lat, lon in CITIES:
-            # lekérés Open-Meteo-ból
-            t, w, la, lo = fetch_current_weather(lat, lon)
 
-            # mentés adatbázisba
-            save_weather_record(db, t, w, la, lo)
+def _store_and_report(
+    locations: list[Location], results: list[tuple[float, float, float, float]], report: bool = True
+):
+    db: Session = SessionLocal()
 
-            line = f"{name}: {t}°C, {w} km/h (Lat: {lat}, Lon: {lon})"
-            report_lines.append(line)
+    try:
+        # mentés adatbázisba, egy tranzakcióban az egész tick (aggregátumok és rollupok is)
+        save_weather_records(db, results, location_ids=[loc.id for loc in locations])
 
+        report_lines = [_report_line(loc.name, *row) for loc, row in zip(locations, results)]
+        for line in report_lines:
             logger.info("Saved " + line)
 
-        # ======= EMAIL KÜLDÉSE =======
+        if report:
+            _enqueue_report(db, report_lines)
+
+    finally:
+        db.close()
+
+
+def _report_line(name: str, t: float, w: float, la: float, lo: float) -> str:
+    return f"{name}: {t}°C, {w} km/h (Lat: {la}, Lon: {lo})"
+
+
+def _enqueue_report(db: Session, report_lines: list[str]) -> None:
+    # ======= EMAIL SORBA ÁLLÍTÁSA =======
+    # a küldést az email_job végzi, így lassú SMTP szerver nem tartja fel a ticket
+    if settings.email_to and report_lines:
         email_body = "Óránkénti időjárás riport:\n\n" + "\n".join(report_lines)
-        send_email("Óránkénti időjárás jelentés", email_body)
-        logger.info("Email értesítés elküldve.")
+        enqueue_email(db, REPORT_SUBJECT, email_body)
+        logger.info("Email értesítés sorba állítva.")
 
+
+@SCHEDULER_JOB_DURATION.labels("report").time()
+def _report_job(now: datetime | None = None):
+    """One report per interval in per-location mode: each city's newest reading stored since the last run."""
+    global _report_since
+    now = now or datetime.utcnow()
+    since = _report_since or now - timedelta(minutes=settings.scheduler_interval_min)
+    db: Session = SessionLocal()
+    try:
+        rows = db.execute(
+            select(Location.name, Weather.temperature_c, Weather.windspeed_kmh, Weather.latitude, Weather.longitude)
+            .join(Location, Location.id == Weather.location_id)
+            .where(Weather.fetched_at > since, Weather.fetched_at <= now)
+            .order_by(Location.id, Weather.fetched_at)
+        ).all()
+        # városonként a legutolsó (rövidebb egyedi intervallumnál több mérés is lehet)
+        latest = {row[0]: row for row in rows}
+        _enqueue_report(db, [_report_line(*row) for row in latest.values()])
+        _report_since = now
     except Exception as e:
-        logger.exception("Scheduled job failed: %s", e)
+        logger.exception("Report job failed: %s", e)
+    finally:
+        db.close()
 
+
+@SCHEDULER_JOB_DURATION.labels("archive").time()
+def _archive_job():
+    db: Session = SessionLocal()
+    try:
+        archive_old_readings(db)
+    except Exception as e:
+        logger.exception("Archive job failed: %s", e)
+    finally:
+        db.close()
+
+
+@SCHEDULER_JOB_DURATION.labels("email").time()
+def _email_job():
+    db: Session = SessionLocal()
+    try:
+        deliver_outbox(db, _smtp)
+    except Exception as e:
+        logger.exception("Email job failed: %s", e)
+    finally:
+        db.close()
+
+
+@SCHEDULER_JOB_DURATION.labels("retention").time()
+def _retention_job():
+    db: Session = SessionLocal()
+    try:
+        enforce_retention(db)
+    except Exception as e:
+        logger.exception("Retention job failed: %s", e)
     finally:
         db.close()
 
 
 def start_scheduler():
-    global scheduler
+    """Join the leader election; the jobs only run in the worker holding the lease."""
+    global _leader_task
     if not settings.scheduler_enabled:
         logger.info("Scheduler disabled by config.")
         return
 
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(
-        _job,
-        "interval",
-        minutes=settings.scheduler_interval_min,
-        id="weather_job",
-        replace_existing=True
+    _leader_task = asyncio.get_running_loop().create_task(_leader_loop())
+    logger.info(f"Scheduler leader election started (worker={WORKER_ID})")
+
+
+def stop_scheduler():
+    global _leader_task, _lease_until
+    if _leader_task:
+        _leader_task.cancel()
+        _leader_task = None
+
+    was_leader = scheduler is not None
+    _stop_jobs()
+    if was_leader:
+        # azonnali átadás, ne kelljen a lejáratra várni
+        try:
+            _release_lease()
+        except Exception as e:
+            logger.warning(f"Could not release scheduler lease: {e}")
+    _lease_until = None
+    _smtp.close()
+
+
+async def _leader_loop():
+    while True:
+        await _leader_step()
+        await asyncio.sleep(settings.scheduler_lease_renew_s)
+
+
+async def _leader_step():
+    """Renew or take the lease, then start or stop the jobs to match."""
+    global _lease_until
+    try:
+        _lease_until = await asyncio.to_thread(_renew_lease)
+    except Exception as e:
+        # átmeneti DB hiba: a meglévő lease lejáratáig vezetők maradunk
+        logger.warning(f"Scheduler lease renewal failed: {e}")
+
+    leader = _lease_until is not None and datetime.utcnow() < _lease_until
+    if leader and scheduler is None:
+        logger.info(f"Scheduler lease acquired by {WORKER_ID}")
+        _start_jobs()
+    elif not leader and scheduler is not None:
+        logger.info(f"Scheduler lease lost by {WORKER_ID}; stopping jobs")
+        _stop_jobs()
+
+
+def _renew_lease() -> datetime | None:
+    db: Session = SessionLocal()
+    try:
+        return try_acquire_lease(db, SCHEDULER_LEASE, WORKER_ID, settings.scheduler_lease_ttl_s)
+    finally:
+        db.close()
+
+
+def _release_lease() -> None:
+    db: Session = SessionLocal()
+    try:
+        release_lease(db, SCHEDULER_LEASE, WORKER_ID)
+    finally:
+        db.close()
+
+
+def _start_jobs():
+    global scheduler, _job_slots, _report_since
+
+    # az app event loopján fut, így a közös async HTTP klienst használja;
+    # a blokkoló karbantartó jobok külön, korlátos szálkészletet kapnak
+    scheduler = AsyncIOScheduler(
+        executors={
+            "default": AsyncIOExecutor(),
+            "threads": ThreadPoolExecutor(max(1, settings.scheduler_max_workers)),
+        },
+        # lemaradt futásokból egy, és egy job sosem fut önmagával párhuzamosan
+        job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 60},
     )
+    _job_slots = asyncio.Semaphore(max(1, settings.scheduler_max_workers))
+    _report_since = None
+
+    if settings.scheduler_mode == "batch":
+        scheduler.add_job(
+            _job,
+            "interval",
+            minutes=settings.scheduler_interval_min,
+            id="weather_job",
+            replace_existing=True
+        )
+    else:
+        scheduler.add_job(
+            _sync_location_jobs,
+            "interval",
+            minutes=LOCATION_SYNC_INTERVAL_MIN,
+            next_run_time=datetime.now(scheduler.timezone),
+            id="location_sync",
+            replace_existing=True
+        )
+        if settings.email_to:
+            scheduler.add_job(
+                _report_job,
+                "interval",
+                executor="threads",
+                minutes=settings.scheduler_interval_min,
+                id="report_job",
+                replace_existing=True
+            )
+    if settings.archive_after_days > 0:
+        scheduler.add_job(
+            _archive_job,
+            "interval",
+            executor="threads",
+            hours=settings.archive_interval_hours,
+            id="archive_job",
+            replace_existing=True
+        )
+    if settings.email_to:
+        scheduler.add_job(
+            _email_job,
+            "interval",
+            executor="threads",
+            seconds=settings.email_send_interval_s,
+            id="email_job",
+            replace_existing=True
+        )
+    if settings.retention_interval_hours > 0:
+        # helyenkénti megőrzési idő is lehet, ezért RETENTION_DAYS=0 mellett is fut
+        scheduler.add_job(
+            _retention_job,
+            "interval",
+            executor="threads",
+            hours=settings.retention_interval_hours,
+            id="retention_job",
+            replace_existing=True
+        )
     scheduler.start()
 
-    logger.info(f"Scheduler started (interval={settings.scheduler_interval_min} min)")
+    logger.info(f"Scheduler started (mode={settings.scheduler_mode}, interval={settings.scheduler_interval_min} min)")
 
 
-def stop_scheduler():
+def _stop_jobs():
     global scheduler
     if scheduler:
         scheduler.shutdown(wait=False)
@@ -0,0 +1,334 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import bindparam, case, delete, func, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from backend.models.aggregate import WeatherAggregate, WeatherRollup, OVERALL_LOCATION_ID, ROLLUP_BUCKETS
+from backend.models.weather import Weather
+from backend.services.archive_service import archive_columns
+
+STAT_COLUMNS = ("count", "temp_sum", "temp_min", "temp_max", "wind_sum", "wind_min", "wind_max")
+
+
+def summarize(values: list[tuple[float, float]]) -> dict:
+    """count/sum/min/max of ``(temp_c, wind_kmh)`` pairs, keyed like the stat columns."""
+    temps = [t for t, _ in values]
+    winds = [w for _, w in values]
+    return {
+        "count": len(values),
+        "temp_sum": sum(temps),
+        "temp_min": min(temps),
+        "temp_max": max(temps),
+        "wind_sum": sum(winds),
+        "wind_min": min(winds),
+        "wind_max": max(winds),
+    }
+
+
+def merge_stats(db: Session, model, items: list[tuple[dict, dict]]) -> None:
+    """Fold each ``(key, summary)`` into the stats row of ``model`` identified by ``key``.
+
+    Runs in the caller's transaction. On SQLite it is one executemany
+    ``INSERT … ON CONFLICT DO UPDATE``, so a bulk load touching thousands of
+    rollup buckets costs one statement instead of one round trip per key.
+    Elsewhere: one UPDATE per key that adds to the running values, then a
+    single executemany INSERT for keys with no row yet. The statements are
+    plain Core with bind parameters, built once per model.
+    """
+    if not items:
+        return
+
+    if db.get_bind().dialect.name == "sqlite":
+        db.execute(_upsert_statement(model, tuple(items[0][0])), [{**key, **summary} for key, summary in items])
+        return
+
+    upd, ins = _merge_statements(model, tuple(items[0][0]))
+    missing = []
+    for key, summary in items:
+        params = {f"k_{k}": v for k, v in key.items()}
+        params.update({f"s_{k}": v for k, v in summary.items()})
+        if db.execute(upd, params).rowcount == 0:
+            missing.append({**key, **summary})
+
+    if missing:
+        db.execute(ins, missing)
+
+
+_statements: dict = {}
+
+
+def _merge_statements(model, key_names: tuple[str, ...]):
+    cache_key = (model, key_names)
+    if cache_key not in _statements:
+        table = model.__table__
+        c = table.c
+        upd = (
+            update(table)
+            .where(*(c[k] == bindparam(f"k_{k}") for k in key_names))
+            .values(
+                count=c.count + bindparam("s_count"),
+                temp_sum=c.temp_sum + bindparam("s_temp_sum"),
+                temp_min=_least(c.temp_min, bindparam("s_temp_min")),
+                temp_max=_greatest(c.temp_max, bindparam("s_temp_max")),
+                wind_sum=c.wind_sum + bindparam("s_wind_sum"),
+                wind_min=_least(c.wind_min, bindparam("s_wind_min")),
+                wind_max=_greatest(c.wind_max, bindparam("s_wind_max")),
+            )
+        )
+        _statements[cache_key] = (upd, insert(table))
+    return _statements[cache_key]
+
+
+def _upsert_statement(model, key_names: tuple[str, ...]):
+    cache_key = (model, key_names, "upsert")
+    if cache_key not in _statements:
+        c = model.__table__.c
+        stmt = sqlite_insert(model.__table__)
+        new = stmt.excluded
+        _statements[cache_key] = stmt.on_conflict_do_update(
+            index_elements=list(key_names),
+            set_={
+                "count": c.count + new["count"],
+                "temp_sum": c.temp_sum + new.temp_sum,
+                "temp_min": _least(c.temp_min, new.temp_min),
+                "temp_max": _greatest(c.temp_max, new.temp_max),
+                "wind_sum": c.wind_sum + new.wind_sum,
+                "wind_min": _least(c.wind_min, new.wind_min),
+                "wind_max": _greatest(c.wind_max, new.wind_max),
+            },
+        )
+    return _statements[cache_key]
+
+
+def _least(column, value):
+    return case((column.is_(None), value), (column < value, column), else_=value)
+
+
+def _greatest(column, value):
+    return case((column.is_(None), value), (column > value, column), else_=value)
+
+
+def apply_new_readings(db: Session, readings: list[dict]) -> None:
+    """Update running aggregates and hourly/daily rollups for freshly inserted rows (no commit)."""
+    if not readings:
+        return
+
+    by_location, by_bucket = _group_readings(readings)
+    merge_stats(db, WeatherAggregate, [
+        ({"location_id": location_id}, summarize(values))
+        for location_id, values in by_location.items()
+    ])
+    merge_stats(db, WeatherRollup, [
+        ({"location_id": location_id, "bucket": bucket, "bucket_start": start}, summarize(values))
+        for (location_id, bucket, start), values in by_bucket.items()
+    ])
+
+
+def remove_readings(db: Session, readings: list[dict]) -> None:
+    """Take deleted rows back out of the running aggregates and rollups (no commit).
+
+    Counts and sums are exact afterwards; min/max cannot be undone without a
+    scan, so they stay the extremes seen so far. Rows whose count drops to
+    zero are deleted, so the next reading starts them afresh.
+    """
+    if not readings:
+        return
+
+    by_location, by_bucket = _group_readings(readings)
+    for model, items in (
+        (WeatherAggregate, [({"location_id": location_id}, values) for location_id, values in by_location.items()]),
+        (WeatherRollup, [
+            ({"location_id": location_id, "bucket": bucket, "bucket_start": start}, values)
+            for (location_id, bucket, start), values in by_bucket.items()
+        ]),
+    ):
+        if not items:
+            continue
+        sub, cleanup = _remove_statements(model, tuple(items[0][0]))
+        db.execute(sub, [
+            {**{f"k_{k}": v for k, v in key.items()},
+             "s_count": len(values), "s_temp_sum": sum(t for t, _ in values), "s_wind_sum": sum(w for _, w in values)}
+            for key, values in items
+        ])
+        db.execute(cleanup)
+
+
+def _remove_statements(model, key_names: tuple[str, ...]):
+    cache_key = (model, key_names, "remove")
+    if cache_key not in _statements:
+        table = model.__table__
+        c = table.c
+        sub = (
+            update(table)
+            .where(*(c[k] == bindparam(f"k_{k}") for k in key_names))
+            .values(
+                count=c.count - bindparam("s_count"),
+                temp_sum=c.temp_sum - bindparam("s_temp_sum"),
+                wind_sum=c.wind_sum - bindparam("s_wind_sum"),
+            )
+        )
+        _statements[cache_key] = (sub, delete(table).where(c.count <= 0))
+    return _statements[cache_key]
+
+
+def _group_readings(readings: list[dict]):
+    """``(temp, wind)`` pairs per aggregate row and per rollup bucket."""
+    by_location: dict[int, list[tuple[float, float]]] = defaultdict(list)
+    by_bucket: dict[tuple[int, str, datetime], list[tuple[float, float]]] = defaultdict(list)
+    for r in readings:
+        pair = (r["temperature_c"], r["windspeed_kmh"])
+        by_location[OVERALL_LOCATION_ID].append(pair)
+        if r.get("location_id") is None:
+            continue
+
+        by_location[r["location_id"]].append(pair)
+        if r.get("fetched_at") is not None:
+            for bucket in ROLLUP_BUCKETS:
+                by_bucket[(r["location_id"], bucket, bucket_start(r["fetched_at"], bucket))].append(pair)
+    return by_location, by_bucket
+
+
+def bucket_start(ts: datetime, bucket: str) -> datetime:
+    if bucket == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    if bucket == "day":
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown rollup bucket: {bucket}")
+
+
+def get_stats(db: Session, location_id: int | None = None) -> dict:
+    agg = db.get(WeatherAggregate, OVERALL_LOCATION_ID if location_id is None else location_id)
+    if agg is None or not agg.count:
+        return {"count": 0, "avg_temp": 0, "min_temp": 0, "max_temp": 0, "avg_wind": 0}
+
+    return {
+        "count": agg.count,
+        "avg_temp": round(agg.temp_sum / agg.count, 2),
+        "min_temp": round(agg.temp_min, 2),
+        "max_temp": round(agg.temp_max, 2),
+        "avg_wind": round(agg.wind_sum / agg.count, 2),
+    }
+
+
+def get_rollups(
+    db: Session,
+    bucket: str,
+    location_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list[WeatherRollup]:
+    q = db.query(WeatherRollup).filter(WeatherRollup.bucket == bucket)
+    if location_id is not None:
+        q = q.filter(WeatherRollup.location_id == location_id)
+    if start is not None:
+        q = q.filter(WeatherRollup.bucket_start >= bucket_start(start, bucket))
+    if end is not None:
+        q = q.filter(WeatherRollup.bucket_start <= end)
+    return q.order_by(WeatherRollup.location_id, WeatherRollup.bucket_start).all()
+
+
+def clear_aggregates(db: Session) -> None:
+    db.execute(delete(WeatherAggregate))
+    db.execute(delete(WeatherRollup))
+
+
+def rebuild_aggregates(db: Session) -> None:
+    """Recompute running aggregates and rollups from the weather table and the archive (full scan)."""
+    clear_aggregates(db)
+
+    stat_columns = (
+        func.count(Weather.id),
+        func.coalesce(func.sum(Weather.temperature_c), 0.0),
+        func.min(Weather.temperature_c),
+        func.max(Weather.temperature_c),
+        func.coalesce(func.sum(Weather.windspeed_kmh), 0.0),
+        func.min(Weather.windspeed_kmh),
+        func.max(Weather.windspeed_kmh),
+    )
+    overall = db.execute(select(*stat_columns)).one()
+    if overall[0]:
+        db.execute(insert(WeatherAggregate).values(location_id=OVERALL_LOCATION_ID, **dict(zip(STAT_COLUMNS, overall))))
+
+    per_location = db.execute(
+        select(Weather.location_id, *stat_columns)
+        .where(Weather.location_id.is_not(None))
+        .group_by(Weather.location_id)
+    ).all()
+    if per_location:
+        db.execute(insert(WeatherAggregate), [
+            {"location_id": location_id, **dict(zip(STAT_COLUMNS, values))} for location_id, *values in per_location
+        ])
+
+    # SQLite strftime-mal csonkolt időbélyeg az ablak kezdete
+    for bucket, fmt in (("hour", "%Y-%m-%d %H:00:00"), ("day", "%Y-%m-%d 00:00:00")):
+        start_col = func.strftime(fmt, Weather.fetched_at)
+        per_bucket = db.execute(
+            select(Weather.location_id, start_col, *stat_columns)
+            .where(Weather.location_id.is_not(None))
+            .group_by(Weather.location_id, start_col)
+        ).all()
+        # executemany: egy lefordított utasítás az összes ablakra
+        if per_bucket:
+            db.execute(insert(WeatherRollup), [
+                {
+                    "location_id": location_id,
+                    "bucket": bucket,
+                    "bucket_start": datetime.fromisoformat(start),
+                    **dict(zip(STAT_COLUMNS, values)),
+                }
+                for location_id, start, *values in per_bucket
+            ])
+
+    _merge_archived(db)
+    db.commit()
+
+
+def _merge_archived(db: Session) -> None:
+    # az archivált sorok is a teljes előzmény részei: NumPy csoportosítás, majd upsert a tábla adataira
+    import numpy as np
+
+    archived = archive_columns(with_unlocated=True)
+    if archived is None or not len(archived[0]):
+        return
+    loc, fetched_at, temps, winds = archived
+
+    overall = np.zeros((len(loc), 1), dtype=np.int64)
+    _, summaries = _grouped_stats(overall, temps, winds)
+    merge_stats(db, WeatherAggregate, [({"location_id": OVERALL_LOCATION_ID}, summaries[0])])
+
+    # a 0 azonosító a hely nélküli sorokat jelöli: csak az összesítettbe számítanak
+    located = loc != 0
+    loc, fetched_at, temps, winds = loc[located], fetched_at[located], temps[located], winds[located]
+    if not len(loc):
+        return
+    keys, summaries = _grouped_stats(loc[:, None], temps, winds)
+    merge_stats(db, WeatherAggregate, [
+        ({"location_id": location_id}, summary) for (location_id,), summary in zip(keys.tolist(), summaries)
+    ])
+    for bucket, unit in (("hour", "h"), ("day", "D")):
+        starts = fetched_at.astype(f"datetime64[{unit}]").astype("datetime64[us]").astype(np.int64)
+        keys, summaries = _grouped_stats(np.column_stack((loc, starts)), temps, winds)
+        merge_stats(db, WeatherRollup, [
+            ({"location_id": int(location_id), "bucket": bucket, "bucket_start": start.item()}, summary)
+            for location_id, start, summary in zip(keys[:, 0], keys[:, 1].astype("datetime64[us]"), summaries)
+        ])
+
+
+def _grouped_stats(keys, temps, winds) -> tuple["np.ndarray", list[dict]]:
+    """Unique rows of ``keys`` and the stat columns of the readings under each."""
+    import numpy as np
+
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    n = len(unique)
+    columns = {
+        "count": np.bincount(inverse, minlength=n),
+        "temp_sum": np.bincount(inverse, temps, minlength=n),
+        "wind_sum": np.bincount(inverse, winds, minlength=n),
+    }
+    for name, values in (("temp", temps), ("wind", winds)):
+        columns[f"{name}_min"] = np.full(n, np.inf)
+        np.minimum.at(columns[f"{name}_min"], inverse, values)
+        columns[f"{name}_max"] = np.full(n, -np.inf)
+        np.maximum.at(columns[f"{name}_max"], inverse, values)
+    return unique, [dict(zip(STAT_COLUMNS, row)) for row in zip(*(columns[c].tolist() for c in STAT_COLUMNS))]
@@ -1,30 +1,402 @@
-import requests
+import asyncio
+import time
+from datetime import date, datetime
+import httpx
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from backend.models.weather import Weather
 from backend.core.config import settings
 from backend.core.logging_conf import logger
+from backend.core.metrics import observe_upstream
+from backend.services.cache import TTLCache
+from backend.services.resilience import CircuitBreaker, CircuitOpenError, RetryBudget, TokenBucket, backoff_delay
+from backend.services.stats_service import apply_new_readings
 
-OPEN_METEO_URL = (
-    "https://api.open-meteo.com/v1/forecast?current=temperature_2m,wind_speed_10m&latitude={lat}&longitude={lon}"
+OPEN_METEO_QUERY = "?current=temperature_2m,wind_speed_10m&latitude={lat}&longitude={lon}"
+OPEN_METEO_HISTORY_QUERY = (
+    "?hourly=temperature_2m,wind_speed_10m&timezone=UTC"
+    "&latitude={lat}&longitude={lon}&start_date={start}&end_date={end}"
 )
 
+# ===== Async HTTP kliens (az app életciklusához kötve) =====
+_client: httpx.AsyncClient | None = None
+_fetch_slots: asyncio.Semaphore | None = None
+
+# ===== Aktuális időjárás cache (kerekített koordináták szerint) =====
+current_weather_cache = TTLCache(settings.weather_cache_ttl_s, settings.weather_cache_maxsize)
+_inflight: dict[tuple[float, float], asyncio.Task] = {}
+
+# ===== Upstream védelem: rate limit, retry keret, megszakító =====
+_rate_limiter = TokenBucket(settings.http_rate_per_s, settings.http_rate_burst)
+_retry_budget = RetryBudget(settings.http_retry_budget_ratio)
+_breaker = CircuitBreaker(settings.breaker_failure_threshold, settings.breaker_reset_timeout_s)
+
+
+def _forecast_url(lat, lon) -> str:
+    return settings.open_meteo_url + OPEN_METEO_QUERY.format(lat=lat, lon=lon)
+
 
 def fetch_current_weather(lat: float | None = None, lon: float | None = None) -> tuple[float, float, float, float]:
     lat = lat or settings.default_lat
     lon = lon or settings.default_lon
-    url = OPEN_METEO_URL.format(lat=lat, lon=lon)
+    url = _forecast_url(lat, lon)
+    logger.info(f"Fetching weather from Open-Meteo: {url}")
+    data = _get_json_sync(url)
+    temp = data["current"]["temperature_2m"]
+    wind = data["current"]["wind_speed_10m"]
+    return float(temp), float(wind), float(lat), float(lon)
+
+
+def fetch_current_weather_many(coords: list[tuple[float, float]]) -> list[tuple[float, float, float, float]]:
+    """Fetch current weather for many locations, one Open-Meteo request per chunk.
+
+    Open-Meteo takes comma-separated coordinate lists and answers with a JSON
+    array in request order; chunk size is ``settings.open_meteo_batch_size``.
+    """
+    results: list[tuple[float, float, float, float]] = []
+
+    for chunk in _chunks(coords):
+        logger.info(f"Fetching weather for {len(chunk)} locations from Open-Meteo")
+        results.extend(_parse_many(_get_json_sync(_many_url(chunk)), chunk))
+
+    return results
+
+
+def _get_json_sync(url: str):
+    # a requests csak a szinkron (CLI) úthoz kell, a webes worker nem tölti be
+    import requests
+
+    start = time.perf_counter()
+    try:
+        r = requests.get(url, timeout=10)
+        r.raise_for_status()
+        data = r.json()
+    except requests.HTTPError:
+        observe_upstream("sync", "http_error", time.perf_counter() - start)
+        raise
+    except requests.RequestException:
+        observe_upstream("sync", "transport_error", time.perf_counter() - start)
+        raise
+    observe_upstream("sync", "ok", time.perf_counter() - start)
+    return data
+
+
+async def open_http_client(transport: httpx.AsyncBaseTransport | None = None) -> None:
+    """Open the shared keep-alive client used by the async fetch path."""
+    global _client, _fetch_slots
+    if _client is not None:
+        return
+
+    _client = httpx.AsyncClient(
+        timeout=settings.http_timeout_s,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_connections,
+            keepalive_expiry=settings.http_keepalive_expiry_s,
+        ),
+        transport=transport,
+    )
+    _fetch_slots = asyncio.Semaphore(settings.http_max_concurrency)
+    logger.info("HTTP client opened.")
+
+
+async def close_http_client() -> None:
+    global _client, _fetch_slots
+    if _client is not None:
+        await _client.aclose()
+        logger.info("HTTP client closed.")
+    _client = None
+    _fetch_slots = None
+
+
+async def fetch_current_weather_async(
+    lat: float | None = None, lon: float | None = None
+) -> tuple[float, float, float, float]:
+    lat = lat or settings.default_lat
+    lon = lon or settings.default_lon
+    url = _forecast_url(lat, lon)
     logger.info(f"Fetching weather from Open-Meteo: {url}")
-    r = requests.get(url, timeout=10)
-    r.raise_for_status()
-    data = r.json()
+    data = await _get_json(url)
     temp = data["current"]["temperature_2m"]
     wind = data["current"]["wind_speed_10m"]
     return float(temp), float(wind), float(lat), float(lon)
 
 
-def save_weather_record(db: Session, temp_c: float, wind_kmh: float, lat: float, lon: float) -> Weather:
-    rec = Weather(temperature_c=temp_c, windspeed_kmh=wind_kmh, latitude=lat, longitude=lon)
+async def fetch_current_weather_many_async(
+    coords: list[tuple[float, float]], skip_failed: bool = False
+) -> list[tuple[float, float, float, float] | None]:
+    """Async counterpart of ``fetch_current_weather_many``; chunks are fetched concurrently.
+
+    Fresh results are also written to the current-weather cache. With
+    ``skip_failed`` a failed chunk is logged and its locations come back as
+    None (results stay aligned with ``coords``) instead of failing the call.
+    """
+    chunks = _chunks(coords)
+    logger.info(f"Fetching weather for {len(coords)} locations in {len(chunks)} requests")
+    payloads = await asyncio.gather(
+        *(_get_json(_many_url(chunk)) for chunk in chunks), return_exceptions=skip_failed
+    )
+
+    results: list[tuple[float, float, float, float] | None] = []
+    for data, chunk in zip(payloads, chunks):
+        if isinstance(data, Exception):
+            logger.warning(f"Open-Meteo chunk of {len(chunk)} locations failed: {data!r}")
+            results.extend([None] * len(chunk))
+            continue
+        results.extend(_parse_many(data, chunk))
+
+    for item in results:
+        if item is not None:
+            t, w, la, lo = item
+            current_weather_cache.set(_cache_key(la, lo), (t, w))
+    return results
+
+
+async def fetch_hourly_history_async(lat: float, lon: float, start: date, end: date, source: str = "archive") -> dict:
+    """Hourly temperature and wind from ``start`` to ``end`` (inclusive, UTC) as Open-Meteo's ``hourly`` block.
+
+    ``source`` is "archive" (reanalysis, a few days behind) or "forecast"
+    (recent past only). Goes through the same rate limiter, retries and
+    breaker as the live fetches.
+    """
+    base = settings.open_meteo_archive_url if source == "archive" else settings.open_meteo_url
+    url = base + OPEN_METEO_HISTORY_QUERY.format(lat=lat, lon=lon, start=start.isoformat(), end=end.isoformat())
+    logger.info(f"Fetching hourly history from Open-Meteo: {url}")
+    data = await _get_json(url)
+    return data["hourly"]
+
+
+async def get_current_weather(
+    lat: float | None = None, lon: float | None = None
+) -> tuple[float, float, float, float]:
+    """Cached ``fetch_current_weather_async``.
+
+    Readings are reused for ``settings.weather_cache_ttl_s`` and concurrent
+    misses for the same coordinates share a single upstream call.
+    """
+    lat = lat or settings.default_lat
+    lon = lon or settings.default_lon
+    key = _cache_key(lat, lon)
+
+    cached = current_weather_cache.get(key)
+    if cached is None:
+        task = _inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(_load_current_weather(key, lat, lon))
+            _inflight[key] = task
+        # shield: ha egy várakozót megszakítanak, a közös lekérés fut tovább
+        cached = await asyncio.shield(task)
+
+    t, w = cached
+    return t, w, float(lat), float(lon)
+
+
+async def refresh_current_weather(lat: float, lon: float) -> tuple[float, float, float, float]:
+    """Always ask upstream (as the scheduler must) and update the cache with the result."""
+    t, w, la, lo = await fetch_current_weather_async(lat, lon)
+    current_weather_cache.set(_cache_key(la, lo), (t, w))
+    return t, w, la, lo
+
+
+async def _load_current_weather(key: tuple[float, float], lat: float, lon: float) -> tuple[float, float]:
+    try:
+        t, w, _, _ = await fetch_current_weather_async(lat, lon)
+        current_weather_cache.set(key, (t, w))
+        return t, w
+    finally:
+        _inflight.pop(key, None)
+
+
+def _cache_key(lat: float, lon: float) -> tuple[float, float]:
+    return round(float(lat), settings.weather_cache_precision), round(float(lon), settings.weather_cache_precision)
+
+
+async def _get_json(url: str):
+    """GET ``url`` through the rate limiter, with bounded retries and the circuit breaker.
+
+    Timeouts, connection errors, 429 and 5xx are retried with jittered
+    backoff (at most ``settings.http_max_retries`` times, within the retry
+    budget); other 4xx responses fail at once and do not count against the
+    breaker. While the breaker is open ``CircuitOpenError`` is raised
+    without calling upstream.
+    """
+    if _client is None or _fetch_slots is None:
+        raise RuntimeError("HTTP client is not open; call open_http_client() first")
+    if not _breaker.allow():
+        observe_upstream("async", "circuit_open")
+        raise CircuitOpenError("Open-Meteo circuit breaker is open")
+
+    _retry_budget.deposit()
+    attempt = 0
+    while True:
+        try:
+            await _rate_limiter.acquire()
+            # egyszerre legfeljebb http_max_concurrency kérés megy ki
+            async with _fetch_slots:
+                start = time.perf_counter()
+                try:
+                    r = await _client.get(url)
+                except httpx.TransportError:
+                    observe_upstream("async", "transport_error", time.perf_counter() - start)
+                    raise
+            observe_upstream("async", "ok" if r.is_success else "http_error", time.perf_counter() - start)
+            r.raise_for_status()
+            data = r.json()
+        except httpx.HTTPStatusError as e:
+            if not _is_retryable(e):
+                # az upstream válaszolt, a hiba a kérésben van
+                _breaker.record_success()
+                raise
+            error = e
+        except httpx.TransportError as e:
+            error = e
+        except Exception:
+            _breaker.record_failure()
+            raise
+        else:
+            _breaker.record_success()
+            return data
+
+        attempt += 1
+        if attempt > settings.http_max_retries or not _retry_budget.try_spend():
+            _breaker.record_failure()
+            raise error
+        logger.warning(f"Open-Meteo request failed ({error!r}), retry {attempt}/{settings.http_max_retries}")
+        await asyncio.sleep(backoff_delay(attempt, settings.http_retry_base_s, settings.http_retry_max_s))
+
+
+def _is_retryable(e: httpx.HTTPStatusError) -> bool:
+    return e.response.status_code == 429 or e.response.status_code >= 500
+
+
+def reset_upstream_guards() -> None:
+    """Fresh breaker, rate limiter and retry budget from the current settings."""
+    global _rate_limiter, _retry_budget, _breaker
+    _rate_limiter = TokenBucket(settings.http_rate_per_s, settings.http_rate_burst)
+    _retry_budget = RetryBudget(settings.http_retry_budget_ratio)
+    _breaker = CircuitBreaker(settings.breaker_failure_threshold, settings.breaker_reset_timeout_s)
+
+
+def upstream_stats() -> dict:
+    return {
+        "breaker": _breaker.stats(),
+        "rate_limiter": _rate_limiter.stats(),
+        "retry_budget": _retry_budget.stats(),
+    }
+
+
+def _chunks(coords: list[tuple[float, float]]) -> list[list[tuple[float, float]]]:
+    size = max(1, settings.open_meteo_batch_size)
+    return [coords[start:start + size] for start in range(0, len(coords), size)]
+
+
+def _many_url(chunk: list[tuple[float, float]]) -> str:
+    return _forecast_url(
+        lat=",".join(str(lat) for lat, _ in chunk),
+        lon=",".join(str(lon) for _, lon in chunk),
+    )
+
+
+def _parse_many(data, chunk: list[tuple[float, float]]) -> list[tuple[float, float, float, float]]:
+    # egyetlen helyre a válasz objektum, többre tömb
+    items = data if isinstance(data, list) else [data]
+    if len(items) != len(chunk):
+        raise ValueError(f"Open-Meteo returned {len(items)} results for {len(chunk)} locations")
+
+    return [
+        (
+            float(item["current"]["temperature_2m"]),
+            float(item["current"]["wind_speed_10m"]),
+            float(lat),
+            float(lon),
+        )
+        for item, (lat, lon) in zip(items, chunk)
+    ]
+
+
+def save_weather_record(
+    db: Session, temp_c: float, wind_kmh: float, lat: float, lon: float, location_id: int | None = None
+) -> Weather:
+    rec = Weather(
+        temperature_c=temp_c,
+        windspeed_kmh=wind_kmh,
+        latitude=lat,
+        longitude=lon,
+        location_id=location_id,
+        fetched_at=datetime.utcnow(),
+    )
     db.add(rec)
+    apply_new_readings(db, [{
+        "temperature_c": temp_c,
+        "windspeed_kmh": wind_kmh,
+        "location_id": location_id,
+        "fetched_at": rec.fetched_at,
+    }])
     db.commit()
     db.refresh(rec)
-    return rec
\ No newline at end of file
+    return rec
+
+
+async def save_weather_record_async(
+    db: AsyncSession, temp_c: float, wind_kmh: float, lat: float, lon: float, location_id: int | None = None
+) -> Weather:
+    """Async counterpart of ``save_weather_record`` for the async request path."""
+    rec = Weather(
+        temperature_c=temp_c,
+        windspeed_kmh=wind_kmh,
+        latitude=lat,
+        longitude=lon,
+        location_id=location_id,
+        fetched_at=datetime.utcnow(),
+    )
+    db.add(rec)
+    await db.run_sync(apply_new_readings, [{
+        "temperature_c": temp_c,
+        "windspeed_kmh": wind_kmh,
+        "location_id": location_id,
+        "fetched_at": rec.fetched_at,
+    }])
+    await db.commit()
+    await db.refresh(rec)
+    return rec
+
+
+def save_weather_records(
+    db: Session,
+    rows: list[tuple[float, float, float, float]],
+    location_ids: list[int | None] | None = None,
+    fetched_at: list[datetime] | None = None,
+) -> list[int]:
+    """Insert a batch of ``(temp_c, wind_kmh, lat, lon)`` rows in one transaction.
+
+    Uses a single executemany INSERT … RETURNING instead of a commit and
+    refresh per row; returns the new ids in input order. ``location_ids``
+    and ``fetched_at`` (historical timestamps, default: now), if given, are
+    aligned with ``rows``. The running aggregates and rollups are updated in
+    the same transaction.
+    """
+    if not rows:
+        return []
+
+    location_ids = location_ids or [None] * len(rows)
+    fetched_at = fetched_at or [datetime.utcnow()] * len(rows)
+    params = [
+        {
+            "temperature_c": t,
+            "windspeed_kmh": w,
+            "latitude": la,
+            "longitude": lo,
+            "location_id": loc_id,
+            "fetched_at": ts,
+        }
+        for (t, w, la, lo), loc_id, ts in zip(rows, location_ids, fetched_at)
+    ]
+    try:
+        ids = list(db.scalars(insert(Weather).returning(Weather.id, sort_by_parameter_order=True), params))
+        apply_new_readings(db, params)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return ids
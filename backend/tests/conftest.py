@@ -0,0 +1,95 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from backend.core.database import Base
+import backend.models.aggregate  # noqa: F401
+import backend.models.backfill  # noqa: F401
+import backend.models.lease  # noqa: F401
+import backend.models.location  # noqa: F401
+import backend.models.outbox  # noqa: F401
+import backend.models.weather  # noqa: F401
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    """A fresh SQLite engine with the full schema.
+
+    File-backed (per test), so the async routes' aiosqlite sessions see the same data.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def async_db_override(sqlite_engine):
+    """Replacement for ``get_async_db``/``get_async_read_db`` on the test database."""
+    engine = create_async_engine(sqlite_engine.url.set(drivername="sqlite+aiosqlite"), poolclass=NullPool)
+    session = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def override():
+        async with session() as db:
+            yield db
+
+    return override
+
+
+@pytest.fixture
+def sqlite_db(sqlite_engine):
+    """A real SQLite session for tests that need SQL behaviour."""
+    db = sessionmaker(autocommit=False, autoflush=False, bind=sqlite_engine)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def api_client(request, sqlite_db, async_db_override):
+    """Test client for the API router on the test database, with the cities seeded.
+
+    Every DB dependency points at the test database. Indirect parametrisation
+    adds middleware, e.g. ``@pytest.mark.parametrize("api_client", [[MetricsMiddleware]], indirect=True)``.
+    """
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from backend.api.routes import router
+    from backend.core.database import get_async_db, get_async_read_db, get_db, get_read_db
+    from backend.services.location_service import seed_locations
+
+    seed_locations(sqlite_db)
+    app = FastAPI()
+    app.include_router(router)
+    for middleware in getattr(request, "param", ()):
+        app.add_middleware(middleware)
+    app.dependency_overrides[get_db] = lambda: sqlite_db
+    app.dependency_overrides[get_read_db] = lambda: sqlite_db
+    app.dependency_overrides[get_async_db] = async_db_override
+    app.dependency_overrides[get_async_read_db] = async_db_override
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path, monkeypatch):
+    """Point the Parquet archive at a per-test directory."""
+    from backend.core.config import settings
+
+    path = tmp_path / "archive"
+    monkeypatch.setattr(settings, "archive_dir", str(path))
+    return path
+
+
+@pytest.fixture(autouse=True)
+def upstream_guards():
+    """Every test starts with a closed breaker and full rate-limit and retry budgets."""
+    from backend.services.weather_service import reset_upstream_guards
+
+    reset_upstream_guards()
+    yield
+    reset_upstream_guards()
@@ -0,0 +1,133 @@
+"""A local stand-in for the Open-Meteo forecast and archive APIs with injectable latency and errors."""
+import json
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def canned_hourly(lat: float, start: date, end: date, missing_from: date | None = None) -> dict:
+    """The ``hourly`` block served for ``start``..``end``: a fixed daily cycle, null from ``missing_from``."""
+    hours = [datetime.combine(start, datetime.min.time()) + timedelta(hours=h)
+             for h in range(((end - start).days + 1) * 24)]
+    missing = [missing_from is not None and ts.date() >= missing_from for ts in hours]
+    return {
+        "time": [ts.strftime("%Y-%m-%dT%H:%M") for ts in hours],
+        "temperature_2m": [None if m else round(lat / 10 + ts.hour * 0.5, 1) for ts, m in zip(hours, missing)],
+        "wind_speed_10m": [None if m else float(ts.day % 7) for ts, m in zip(hours, missing)],
+    }
+
+
+class FakeOpenMeteo:
+    """Serves ``/v1/forecast`` and ``/v1/archive`` on a random local port.
+
+    ``latency_s`` delays every response, ``fail_next`` answers that many
+    requests with ``fail_status`` before recovering, ``always_fail`` keeps
+    failing and ``error_rate`` fails that fraction of requests at random
+    (seeded, so benchmark runs are repeatable). ``requests`` counts the
+    requests that reached the server.
+
+    Requests with ``start_date``/``end_date`` get hourly history from
+    ``canned_hourly``; they are recorded in ``history_requests``, history
+    chunks starting on a date in ``fail_start_dates`` fail, and values from
+    ``missing_from`` on are null (the archive lags a few days behind).
+    """
+
+    def __init__(self, seed: int = 0):
+        self.latency_s = 0.0
+        self.fail_next = 0
+        self.fail_status = 503
+        self.always_fail = False
+        self.error_rate = 0.0
+        self.fail_start_dates: set[str] = set()
+        self.missing_from: date | None = None
+        self.history_requests: list[tuple[float, str, str]] = []
+        self._random = random.Random(seed)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1/forecast"
+
+    @property
+    def archive_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1/archive"
+
+    def start(self) -> "FakeOpenMeteo":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _next_status(self) -> int:
+        with self._lock:
+            self.requests += 1
+            if self.always_fail:
+                return self.fail_status
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return self.fail_status
+            if self.error_rate and self._random.random() < self.error_rate:
+                return self.fail_status
+            return 200
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status = fake._next_status()
+                if fake.latency_s:
+                    time.sleep(fake.latency_s)
+                if status != 200:
+                    self._send(status, {"error": True, "reason": "injected"})
+                    return
+
+                query = parse_qs(urlparse(self.path).query)
+                if "start_date" in query:
+                    self._history(query)
+                    return
+                lats = query["latitude"][0].split(",")
+                lons = query["longitude"][0].split(",")
+                items = [
+                    {"latitude": float(la), "longitude": float(lo),
+                     "current": {"temperature_2m": 20.0 + i, "wind_speed_10m": 5.0}}
+                    for i, (la, lo) in enumerate(zip(lats, lons))
+                ]
+                self._send(200, items if len(items) > 1 else items[0])
+
+            def _history(self, query):
+                lat, start, end = float(query["latitude"][0]), query["start_date"][0], query["end_date"][0]
+                with fake._lock:
+                    fake.history_requests.append((lat, start, end))
+                if start in fake.fail_start_dates:
+                    self._send(fake.fail_status, {"error": True, "reason": "injected"})
+                    return
+                hourly = canned_hourly(lat, date.fromisoformat(start), date.fromisoformat(end), fake.missing_from)
+                self._send(200, {"latitude": lat, "longitude": float(query["longitude"][0]), "hourly": hourly})
+
+            def _send(self, status, body):
+                payload = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # a kliens időtúllépés miatt már bontott
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _run_python(code: str, env: dict) -> dict:
+    # tiszta interpreter: a teszt folyamat már betöltött moduljai ne számítsanak
+    proc = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code)],
+        cwd=ROOT, env={**os.environ, **env}, capture_output=True, text=True, timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr
+    return json.loads(proc.stdout.splitlines()[-1])
+
+
+@pytest.fixture
+def app_env(tmp_path):
+    return {
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'app.db'}",
+        "ARCHIVE_DIR": str(tmp_path / "archive"),
+        "SCHEDULER_ENABLED": "false",
+    }
+
+
+class TestAppStartup:
+    """Test suite for import-time side effects and the lifespan."""
+
+    def test_import_touches_nothing(self, app_env, tmp_path):
+        """Test that importing the app neither creates the database nor loads optional subsystems."""
+        result = _run_python("""
+            import json, sys
+            import backend.app
+            print(json.dumps([m for m in ("apscheduler", "pyarrow", "smtplib", "requests") if m in sys.modules]))
+        """, app_env)
+
+        assert result == []
+        assert not (tmp_path / "app.db").exists()
+
+    def test_lifespan_migrates_and_serves(self, app_env):
+        """Test that the schema is created on startup and a web-only worker never imports the scheduler."""
+        result = _run_python("""
+            import json, sys
+            from sqlalchemy import inspect
+            from fastapi.testclient import TestClient
+            from backend.app import app
+            from backend.core.database import engine
+            with TestClient(app) as client:
+                status = client.get("/health").status_code
+            print(json.dumps({
+                "status": status,
+                "tables": sorted(inspect(engine).get_table_names()),
+                "scheduler_loaded": "backend.services.scheduler" in sys.modules,
+            }))
+        """, app_env)
+
+        assert result["status"] == 200
+        assert {"weather", "locations", "weather_aggregates"} <= set(result["tables"])
+        assert result["scheduler_loaded"] is False
+
+    def test_migrations_can_be_skipped(self, app_env, tmp_path):
+        """Test that RUN_MIGRATIONS=false leaves the schema to the separate migrate step."""
+        result = _run_python("""
+            import json
+            from fastapi.testclient import TestClient
+            from backend.app import app
+            with TestClient(app) as client:
+                print(json.dumps(client.get("/health").status_code))
+        """, {**app_env, "RUN_MIGRATIONS": "false"})
+
+        assert result == 200
+        assert not (tmp_path / "app.db").exists() or (tmp_path / "app.db").stat().st_size == 0
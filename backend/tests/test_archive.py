@@ -0,0 +1,193 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models.weather import Weather
+from backend.services.archive_service import archive_old_readings, partition_dates, query_archive
+from backend.services.location_service import seed_locations
+from backend.services.stats_service import get_stats
+
+
+@pytest.fixture
+def db(sqlite_db):
+    seed_locations(sqlite_db)
+    return sqlite_db
+
+
+def _insert_days(db, days, per_day=2, location_ids=(1, 2)):
+    """Insert ``per_day`` readings per day over the last ``days`` days, oldest first.
+
+    Returns the timestamps in insertion (= chronological) order.
+    """
+    base = datetime.utcnow() - timedelta(minutes=1)
+    stamps = [
+        base - timedelta(days=days - 1 - d, hours=6 * (per_day - 1 - i))
+        for d in range(days)
+        for i in range(per_day)
+    ]
+    for n, ts in enumerate(stamps):
+        db.add(Weather(
+            temperature_c=float(n), windspeed_kmh=1.0, latitude=0.0, longitude=0.0,
+            location_id=location_ids[n % len(location_ids)], fetched_at=ts,
+        ))
+    db.commit()
+    return stamps
+
+
+class TestArchiveOldReadings:
+    """Test suite for moving cold rows into date-partitioned Parquet."""
+
+    def test_moves_old_rows_into_date_partitions(self, db, archive_dir):
+        """Test that rows past the cutoff leave the hot table for the archive."""
+        stamps = _insert_days(db, 5)
+        expected_dates = sorted({ts.date().isoformat() for ts in stamps[:6]})
+
+        moved = archive_old_readings(db, older_than_days=2)
+
+        assert moved == 6
+        assert db.query(Weather).count() == 4
+        assert partition_dates() == expected_dates
+        assert all(p.name.startswith("date=") for p in archive_dir.iterdir())
+
+    def test_batches_and_is_idempotent(self, db, monkeypatch):
+        """Test batched archiving and that a second run has nothing to move."""
+        from backend.core.config import settings
+        monkeypatch.setattr(settings, "archive_batch_size", 2)
+        _insert_days(db, 4)
+
+        assert archive_old_readings(db, older_than_days=1) == 6
+        assert archive_old_readings(db, older_than_days=1) == 0
+
+    def test_aggregates_keep_all_history(self, db):
+        """Test that archiving does not change the running statistics."""
+        from backend.services.stats_service import rebuild_aggregates
+        _insert_days(db, 3)
+        rebuild_aggregates(db)
+        before = get_stats(db)
+
+        archive_old_readings(db, older_than_days=1)
+
+        assert get_stats(db) == before
+
+    def test_rebuild_counts_archived_readings(self, db):
+        """Test that rebuilding the aggregates after archiving keeps the archived history."""
+        from backend.services.stats_service import get_rollups, rebuild_aggregates
+        _insert_days(db, 5, location_ids=(1, 2, None))
+        rebuild_aggregates(db)
+
+        def snapshot():
+            rollups = [
+                (r.location_id, r.bucket, r.bucket_start, r.count, r.temp_sum, r.temp_min, r.temp_max)
+                for bucket in ("hour", "day") for r in get_rollups(db, bucket)
+            ]
+            return [get_stats(db, location_id) for location_id in (None, 1, 2)], rollups
+
+        before = snapshot()
+        assert archive_old_readings(db, older_than_days=2) == 6
+        rebuild_aggregates(db)
+
+        assert snapshot() == before
+
+
+class TestArchiveQueries:
+    """Test suite for transparent fall-through to the archive."""
+
+    def test_query_archive_pushdown(self, db):
+        """Test location and time filtering on archived rows."""
+        _insert_days(db, 4)
+        archive_old_readings(db, older_than_days=0)
+
+        rows = query_archive(db, limit=10, direction="a", location_id=2)
+
+        assert [r.temperature_c for r in rows] == [1.0, 3.0, 5.0, 7.0]
+        assert {r.location_name for r in rows} == {"Eger"}
+
+    def test_list_weather_pages_across_tiers(self, api_client, db):
+        """Test that cursor paging continues from hot rows into the archive."""
+        total = len(_insert_days(db, 5))
+        archive_old_readings(db, older_than_days=2)
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            r = api_client.get("/weather", params=params)
+            seen = [row["temperature_c"] for row in r.json()] + seen
+            cursor = r.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert seen == [float(i) for i in range(total)]
+
+    def test_list_weather_time_window_in_archive(self, api_client, db):
+        """Test a from/to query that only touches archived data."""
+        stamps = _insert_days(db, 5)
+        archive_old_readings(db, older_than_days=2)
+
+        r = api_client.get("/weather", params={
+            "from": stamps[0].isoformat(), "to": stamps[3].isoformat(), "location": "Budapest",
+        })
+
+        assert [row["temperature_c"] for row in r.json()] == [0.0, 2.0]
+        assert r.json()[0]["location_name"] == "Budapest"
+
+    def test_detail_falls_through_to_archive(self, api_client, db):
+        """Test that /weather/{id} finds an archived reading and still 404s on unknown ids."""
+        _insert_days(db, 3)
+        archive_old_readings(db, older_than_days=1)
+
+        r = api_client.get("/weather/2")
+
+        assert r.status_code == 200
+        assert (r.json()["temperature_c"], r.json()["location_name"]) == (1.0, "Eger")
+        assert api_client.get("/weather/999").status_code == 404
+
+    def test_id_lookup_skips_files_by_id_range(self, db, archive_dir, monkeypatch):
+        """Test that ids outside every file's id range are answered without opening a file."""
+        import pyarrow.dataset as ds
+        from backend.services.archive_service import get_archived
+        _insert_days(db, 3)
+        archive_old_readings(db, older_than_days=1)
+        # a régi, id tartomány nélküli fájlnév továbbra is olvasható
+        legacy = next(archive_dir.glob("date=*/part-*.parquet"))
+        legacy.rename(legacy.with_name("part-0123abcd.parquet"))
+
+        assert [get_archived(db, i).id for i in range(1, 5)] == [1, 2, 3, 4]
+
+        def must_not_open(*args, **kwargs):
+            raise AssertionError("no file should be read")
+
+        legacy.with_name("part-0123abcd.parquet").unlink()
+        monkeypatch.setattr(ds, "dataset", must_not_open)
+        assert get_archived(db, 999) is None
+
+    def test_keyset_from_archived_id(self, api_client, db):
+        """Test that after_id/before_id accept ids that only exist in the archive."""
+        total = len(_insert_days(db, 4))
+        archive_old_readings(db, older_than_days=2)
+
+        after = api_client.get("/weather", params={"after_id": 2, "limit": 100})
+        before = api_client.get("/weather", params={"before_id": 3, "limit": 100})
+
+        assert [row["id"] for row in after.json()] == list(range(3, total + 1))
+        assert [row["id"] for row in before.json()] == [1, 2]
+        assert api_client.get("/weather", params={"after_id": 999}).status_code == 400
+
+    def test_export_merges_archive_and_hot_rows(self, api_client, db):
+        """Test that the export streams both tiers in time order."""
+        total = len(_insert_days(db, 4))
+        archive_old_readings(db, older_than_days=2)
+
+        r = api_client.get("/weather/export")
+
+        assert [json.loads(line)["temperature_c"] for line in r.text.splitlines()] == [float(i) for i in range(total)]
+
+    def test_reset_purges_archive(self, api_client, db):
+        """Test that a database reset also drops the archive."""
+        _insert_days(db, 3)
+        archive_old_readings(db, older_than_days=1)
+
+        api_client.delete("/weather/reset")
+
+        assert partition_dates() == []
+        assert api_client.get("/weather").json() == []
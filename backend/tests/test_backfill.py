@@ -0,0 +1,222 @@
+import asyncio
+import os
+import subprocess
+import sys
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from backend.core.config import settings
+from backend.models.backfill import BackfillCheckpoint
+from backend.models.weather import Weather
+from backend.services.archive_service import archive_old_readings
+from backend.services.backfill_service import backfill, date_chunks, hourly_arrays, store_chunk
+from backend.services.location_service import list_locations, seed_locations
+from backend.services.retention_service import reset_readings
+from backend.services.stats_service import get_stats
+from backend.services.weather_service import close_http_client, open_http_client, reset_upstream_guards
+from backend.tests.fake_open_meteo import FakeOpenMeteo
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Fake Open-Meteo archive on localhost; failures are not retried."""
+    server = FakeOpenMeteo().start()
+    monkeypatch.setattr(settings, "open_meteo_archive_url", server.archive_url)
+    monkeypatch.setattr(settings, "http_max_retries", 0)
+    monkeypatch.setattr(settings, "http_rate_per_s", 0)
+    reset_upstream_guards()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def session_factory(sqlite_engine, sqlite_db):
+    seed_locations(sqlite_db)
+    return sessionmaker(bind=sqlite_engine, autoflush=False)
+
+
+def _run_backfill(session_factory, start, end, names=("Budapest", "Eger"), **kwargs):
+    with session_factory() as db:
+        locations = [loc for loc in list_locations(db) if loc.name in names]
+
+    async def run():
+        await open_http_client()
+        try:
+            return await backfill(locations, start, end, session_factory=session_factory, **kwargs)
+        finally:
+            await close_http_client()
+
+    return {r.location: r for r in asyncio.run(run())}
+
+
+def _count(db, location_id=None):
+    q = select(func.count(Weather.id))
+    if location_id is not None:
+        q = q.where(Weather.location_id == location_id)
+    return db.scalar(q)
+
+
+class TestBackfillHelpers:
+    """Test suite for date chunking and the NumPy conversion."""
+
+    def test_date_chunks_cover_the_range(self):
+        """Test that chunks are consecutive, inclusive and the last one is cut at the end date."""
+        assert date_chunks(date(2024, 1, 1), date(2024, 1, 25), 10) == [
+            (date(2024, 1, 1), date(2024, 1, 10)),
+            (date(2024, 1, 11), date(2024, 1, 20)),
+            (date(2024, 1, 21), date(2024, 1, 25)),
+        ]
+        assert date_chunks(date(2024, 1, 2), date(2024, 1, 1), 10) == []
+
+    def test_hourly_arrays_turn_nulls_into_nan(self):
+        """Test the column conversion of an hourly block."""
+        times, temps, winds = hourly_arrays({
+            "time": ["2024-01-01T00:00", "2024-01-01T01:00"],
+            "temperature_2m": [1.5, None],
+            "wind_speed_10m": [3.0, 4.0],
+        })
+
+        assert times.tolist() == [datetime(2024, 1, 1, 0), datetime(2024, 1, 1, 1)]
+        assert temps[0] == 1.5 and np.isnan(temps[1])
+        assert winds.dtype == np.float64
+
+
+class TestBackfill:
+    """Test suite for the resumable backfill against the fake archive API."""
+
+    def test_loads_every_hour_for_each_location(self, upstream, session_factory, sqlite_db):
+        """Test chunked, concurrent loading with historical timestamps and updated aggregates."""
+        results = _run_backfill(session_factory, date(2024, 1, 1), date(2024, 1, 10), chunk_days=4, concurrency=2)
+
+        assert {name: (r.rows, r.chunks, r.next_date, r.error) for name, r in results.items()} == {
+            "Budapest": (240, 3, None, None),
+            "Eger": (240, 3, None, None),
+        }
+        assert len(upstream.history_requests) == 6
+        first = sqlite_db.scalars(select(Weather).where(Weather.location_id == 1).order_by(Weather.fetched_at)).first()
+        assert first.fetched_at == datetime(2024, 1, 1, 0) and first.temperature_c == round(47.4979 / 10, 1)
+        assert get_stats(sqlite_db)["count"] == 480
+
+    def test_same_range_again_is_a_no_op(self, upstream, session_factory, sqlite_db):
+        """Test that a finished range is neither fetched nor stored again."""
+        _run_backfill(session_factory, date(2024, 1, 1), date(2024, 1, 10), chunk_days=4)
+        upstream.history_requests.clear()
+
+        results = _run_backfill(session_factory, date(2024, 1, 1), date(2024, 1, 10), chunk_days=4)
+
+        assert upstream.history_requests == []
+        assert results["Budapest"].rows == 0 and results["Budapest"].next_date is None
+        assert _count(sqlite_db) == 480
+
+    def test_resumes_after_a_failed_chunk(self, upstream, session_factory, sqlite_db):
+        """Test that a failure keeps the stored chunks and the next run fetches only the rest."""
+        upstream.fail_start_dates, upstream.fail_status = {"2024-01-05"}, 400
+
+        failed = _run_backfill(session_factory, date(2024, 1, 1), date(2024, 1, 10), names=("Budapest",), chunk_days=4)
+
+        assert failed["Budapest"].error is not None
+        assert failed["Budapest"].next_date == date(2024, 1, 5)
+        assert _count(sqlite_db, 1) == 96
+
+        upstream.fail_start_dates.clear()
+        upstream.history_requests.clear()
+        resumed = _run_backfill(session_factory, date(2024, 1, 1), date(2024, 1, 10), names=("Budapest",), chunk_days=4)
+
+        assert [(start, end) for _, start, end in upstream.history_requests] == [
+            ("2024-01-05", "2024-01-08"), ("2024-01-09", "2024-01-10"),
+        ]
+        assert resumed["Budapest"].next_date is None
+        assert _count(sqlite_db, 1) == 240
+        checkpoint = sqlite_db.get(BackfillCheckpoint, (1, date(2024, 1, 1), date(2024, 1, 10)))
+        assert checkpoint.rows == 240
+
+    def test_stops_where_the_archive_ends(self, upstream, session_factory, sqlite_db):
+        """Test that trailing nulls stop the location and the partial day is completed without duplicates."""
+        upstream.missing_from = date(2024, 1, 3)
+
+        first = _run_backfill(session_factory, date(2024, 1, 1), date(2024, 1, 10), names=("Budapest",), chunk_days=4)
+
+        assert first["Budapest"].next_date == date(2024, 1, 2)
+        assert len(upstream.history_requests) == 1
+        assert _count(sqlite_db, 1) == 48
+
+        upstream.missing_from = None
+        second = _run_backfill(session_factory, date(2024, 1, 1), date(2024, 1, 10), names=("Budapest",), chunk_days=4)
+
+        assert second["Budapest"].next_date is None
+        assert second["Budapest"].rows == 240 - 48
+        assert _count(sqlite_db, 1) == 240
+
+    def test_existing_readings_are_not_duplicated(self, upstream, session_factory, sqlite_db):
+        """Test that an overlapping range only adds the hours that are missing."""
+        _run_backfill(session_factory, date(2024, 1, 1), date(2024, 1, 5), names=("Budapest",))
+
+        results = _run_backfill(session_factory, date(2024, 1, 4), date(2024, 1, 8), names=("Budapest",))
+
+        assert results["Budapest"].rows == 72
+        assert _count(sqlite_db, 1) == 8 * 24
+
+    def test_interior_gap_does_not_stop_the_chunk(self, session_factory, sqlite_db):
+        """Test that a null hour inside a chunk is skipped and the checkpoint moves past the chunk."""
+        chunk = (date(2024, 1, 1), date(2024, 1, 5))
+        times = np.arange(np.datetime64("2024-01-01T00:00"), np.datetime64("2024-01-06T00:00"), np.timedelta64(1, "h"))
+        temps = np.full(len(times), 5.0)
+        temps[30] = np.nan
+        loc = list_locations(sqlite_db)[0]
+
+        inserted, next_date = store_chunk(sqlite_db, loc, *chunk, chunk, times.astype("datetime64[us]"), temps, np.ones(len(times)))
+
+        assert (inserted, next_date) == (119, date(2024, 1, 6))
+
+    def test_archived_hours_are_not_stored_again(self, upstream, session_factory, sqlite_db):
+        """Test that re-running a range whose readings were archived does not duplicate them."""
+        _run_backfill(session_factory, date(2024, 1, 1), date(2024, 1, 3), names=("Budapest",))
+        assert archive_old_readings(sqlite_db, older_than_days=0) == 72
+        sqlite_db.query(BackfillCheckpoint).delete()
+        sqlite_db.commit()
+
+        results = _run_backfill(session_factory, date(2024, 1, 1), date(2024, 1, 4), names=("Budapest",))
+
+        assert results["Budapest"].rows == 24
+        assert _count(sqlite_db, 1) == 24
+
+    def test_reset_clears_checkpoints(self, upstream, session_factory, sqlite_db):
+        """Test that emptying the readings also forgets finished backfills."""
+        _run_backfill(session_factory, date(2024, 1, 1), date(2024, 1, 2), names=("Budapest",))
+
+        reset_readings(sqlite_db)
+
+        assert sqlite_db.scalar(select(func.count()).select_from(BackfillCheckpoint)) == 0
+
+
+class TestBackfillCli:
+    """Test suite for python -m scripts.backfill."""
+
+    def test_cli_backfills_and_resumes(self, upstream, tmp_path):
+        """Test an end-to-end run against the fake archive, then a resumed no-op run."""
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{tmp_path / 'cli.db'}",
+            "OPEN_METEO_ARCHIVE_URL": upstream.archive_url,
+            "SCHEDULER_ENABLED": "false",
+        }
+        cmd = [sys.executable, "-m", "scripts.backfill", "--start", "2024-02-01", "--end", "2024-02-03",
+               "--location", "Szeged", "--location", "Pécs"]
+
+        first = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, timeout=60)
+        second = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, timeout=60)
+        unknown = subprocess.run(cmd[:-2] + ["--location", "Atlantis"], cwd=ROOT, env=env,
+                                 capture_output=True, text=True, timeout=60)
+
+        assert first.returncode == 0, first.stderr
+        assert "Szeged: 72 mérés, 1 darab, kész" in first.stdout
+        assert "Pécs: 72 mérés, 1 darab, kész" in first.stdout
+        assert "Szeged: 0 mérés, 0 darab, kész" in second.stdout
+        assert len(upstream.history_requests) == 2
+        assert unknown.returncode == 2 and "Atlantis" in unknown.stderr
@@ -0,0 +1,68 @@
+import pytest
+
+from backend.services import cache as cache_module
+from backend.services.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", fake)
+    return fake
+
+
+class TestTTLCache:
+    """Test suite for the TTL + LRU cache."""
+
+    def test_hit_and_miss_counters(self, clock):
+        """Test that lookups are counted as hits or misses."""
+        cache = TTLCache(ttl_s=60, maxsize=10)
+
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.get("a") == 1
+
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["size"] == 1
+
+    def test_entries_expire_after_ttl(self, clock):
+        """Test that an entry is dropped once its TTL has passed."""
+        cache = TTLCache(ttl_s=60, maxsize=10)
+        cache.set("a", 1)
+
+        clock.now += 59
+        assert cache.get("a") == 1
+
+        clock.now += 2
+        assert cache.get("a") is None
+        assert cache.stats()["size"] == 0
+
+    def test_least_recently_used_is_evicted(self, clock):
+        """Test that the cache stays bounded and evicts the LRU entry."""
+        cache = TTLCache(ttl_s=60, maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" lesz a legrégebben használt
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_zero_ttl_disables_cache(self, clock):
+        """Test that a TTL of zero turns caching off."""
+        cache = TTLCache(ttl_s=0, maxsize=10)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
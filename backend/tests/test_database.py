@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from backend.core.database import async_url, create_async_db_engine, create_db_engine
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'profile.db'}"
+
+
+class TestCreateDbEngine:
+    """Test suite for the SQLite storage profiles."""
+
+    def test_production_pragmas(self, db_url):
+        """Test that the production profile tunes every connection."""
+        engine = create_db_engine(db_url, "production")
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() > 0
+            assert conn.execute(text("PRAGMA cache_size")).scalar() < 0
+        engine.dispose()
+
+    def test_dev_profile_keeps_defaults(self, db_url):
+        """Test that the dev profile leaves SQLite untouched."""
+        engine = create_db_engine(db_url, "dev")
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+        engine.dispose()
+
+    def test_read_only_engine_rejects_writes(self, db_url):
+        """Test that the read engine can read but never write."""
+        writer = create_db_engine(db_url, "production")
+        with writer.begin() as conn:
+            conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            conn.execute(text("INSERT INTO t VALUES (1)"))
+
+        reader = create_db_engine(db_url, "production", read_only=True)
+        with reader.connect() as conn:
+            assert conn.execute(text("SELECT x FROM t")).scalar() == 1
+            with pytest.raises(OperationalError):
+                conn.execute(text("INSERT INTO t VALUES (2)"))
+
+        reader.dispose()
+        writer.dispose()
+
+    def test_memory_database_ignores_profile(self):
+        """Test that in-memory databases are never given file pragmas."""
+        engine = create_db_engine("sqlite://", "production")
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "memory"
+        engine.dispose()
+
+
+class TestCreateAsyncDbEngine:
+    """Test suite for the aiosqlite engines of the async request path."""
+
+    def test_async_url(self):
+        """Test that only plain SQLite URLs are switched to aiosqlite."""
+        assert async_url("sqlite:///./weather.db") == "sqlite+aiosqlite:///./weather.db"
+        assert async_url("postgresql+asyncpg://u@h/db") == "postgresql+asyncpg://u@h/db"
+
+    def test_production_profile_applies_to_async_engines(self, db_url):
+        """Test that the async writer gets WAL and the async reader is read-only."""
+        async def run():
+            writer = create_async_db_engine(db_url, "production")
+            reader = create_async_db_engine(db_url, "production", read_only=True)
+            async with writer.begin() as conn:
+                assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+                await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            async with reader.connect() as conn:
+                assert (await conn.execute(text("PRAGMA query_only"))).scalar() == 1
+            await reader.dispose()
+            await writer.dispose()
+
+        asyncio.run(run())
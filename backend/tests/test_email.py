@@ -0,0 +1,132 @@
+import socket
+from datetime import datetime, timedelta
+from email import message_from_bytes
+from email.header import decode_header, make_header
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from backend.core.config import settings
+from backend.models.outbox import OUTBOX_FAILED, OUTBOX_PENDING, OUTBOX_SENT, EmailOutbox
+from backend.services import email_service
+from backend.services.email_service import SmtpConnection, deliver_outbox, enqueue_email
+
+
+class _Collector:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        msg = message_from_bytes(envelope.content)
+        subject = str(make_header(decode_header(msg["Subject"])))
+        body = msg.get_payload()[0].get_payload(decode=True).decode("utf-8")
+        self.messages.append((subject, body))
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_settings(monkeypatch):
+    monkeypatch.setattr(settings, "smtp_host", "127.0.0.1")
+    monkeypatch.setattr(settings, "smtp_security", "none")
+    monkeypatch.setattr(settings, "smtp_timeout_s", 5)
+    monkeypatch.setattr(settings, "email_user", "sender@example.com")
+    monkeypatch.setattr(settings, "email_pass", None)
+    monkeypatch.setattr(settings, "email_to", "ops@example.com")
+    monkeypatch.setattr(settings, "email_digest_window_min", 0)
+    monkeypatch.setattr(settings, "email_digest_max", 20)
+
+
+@pytest.fixture
+def smtp_server(smtp_settings, monkeypatch):
+    """Local aiosmtpd stand-in collecting every delivered message."""
+    handler = _Collector()
+    port = _free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    monkeypatch.setattr(settings, "smtp_port", port)
+    yield handler
+    controller.stop()
+
+
+@pytest.fixture
+def conn():
+    c = SmtpConnection()
+    yield c
+    c.close()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TestOutboxDelivery:
+    """Test suite for the email outbox and its background sender."""
+
+    def test_single_report_keeps_subject(self, sqlite_db, smtp_server, conn):
+        """Test that one due message is sent as is and marked sent."""
+        enqueue_email(sqlite_db, "Riport", "Budapest: 10°C")
+
+        assert deliver_outbox(sqlite_db, conn) == 1
+
+        assert len(smtp_server.messages) == 1
+        assert smtp_server.messages[0] == ("Riport", "Budapest: 10°C")
+        item = sqlite_db.query(EmailOutbox).one()
+        assert item.status == OUTBOX_SENT
+        assert item.sent_at is not None
+
+    def test_due_reports_are_batched_into_a_digest(self, sqlite_db, smtp_server, conn):
+        """Test that several pending messages go out as one email."""
+        for i in range(3):
+            enqueue_email(sqlite_db, "Riport", f"tick {i}")
+
+        assert deliver_outbox(sqlite_db, conn) == 3
+
+        assert len(smtp_server.messages) == 1
+        subject, body = smtp_server.messages[0]
+        assert "3 jelentés" in subject
+        assert all(f"tick {i}" in body for i in range(3))
+
+    def test_digest_window_holds_fresh_reports(self, sqlite_db, smtp_server, conn, monkeypatch):
+        """Test that reports wait until the oldest one is older than the window."""
+        monkeypatch.setattr(settings, "email_digest_window_min", 30)
+        enqueue_email(sqlite_db, "Riport", "tick 0")
+
+        assert deliver_outbox(sqlite_db, conn) == 0
+        assert deliver_outbox(sqlite_db, conn, now=datetime.utcnow() + timedelta(minutes=31)) == 1
+        assert len(smtp_server.messages) == 1
+
+    def test_connection_is_reused(self, sqlite_db, smtp_server, conn, monkeypatch):
+        """Test that consecutive deliveries share one SMTP session."""
+        opened = []
+        original = email_service._open_smtp
+        monkeypatch.setattr(email_service, "_open_smtp", lambda: opened.append(1) or original())
+
+        for i in range(3):
+            enqueue_email(sqlite_db, "Riport", f"tick {i}")
+            deliver_outbox(sqlite_db, conn)
+
+        assert len(smtp_server.messages) == 3
+        assert len(opened) == 1
+
+    def test_failed_send_is_retried_with_backoff(self, sqlite_db, smtp_settings, conn, monkeypatch):
+        """Test that an unreachable server leaves the message pending with a later retry time."""
+        monkeypatch.setattr(settings, "smtp_port", _free_port())
+        monkeypatch.setattr(settings, "email_max_attempts", 2)
+        enqueue_email(sqlite_db, "Riport", "tick 0")
+        now = datetime.utcnow()
+
+        assert deliver_outbox(sqlite_db, conn, now=now) == 0
+        item = sqlite_db.query(EmailOutbox).one()
+        assert item.status == OUTBOX_PENDING
+        assert item.attempts == 1
+        assert item.next_attempt_at > now
+        assert item.last_error
+
+        # a várakozási idő előtt nem próbálkozik újra
+        assert deliver_outbox(sqlite_db, conn, now=now) == 0
+        assert item.attempts == 1
+
+        deliver_outbox(sqlite_db, conn, now=now + timedelta(seconds=settings.email_retry_max_s * 2))
+        assert item.status == OUTBOX_FAILED
@@ -0,0 +1,93 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from backend.models.lease import SchedulerLease
+from backend.services import scheduler
+from backend.services.leader_service import SCHEDULER_LEASE, release_lease, try_acquire_lease
+
+
+class TestSchedulerLease:
+    """Test suite for the DB-backed scheduler lease."""
+
+    def test_only_one_holder(self, sqlite_db):
+        """Test that a second worker cannot take a valid lease."""
+        assert try_acquire_lease(sqlite_db, SCHEDULER_LEASE, "a", 30) is not None
+        assert try_acquire_lease(sqlite_db, SCHEDULER_LEASE, "b", 30) is None
+        assert sqlite_db.get(SchedulerLease, SCHEDULER_LEASE).holder == "a"
+
+    def test_holder_renews(self, sqlite_db):
+        """Test that renewing extends the expiry and keeps the acquisition time."""
+        now = datetime.utcnow()
+        try_acquire_lease(sqlite_db, SCHEDULER_LEASE, "a", 30, now=now)
+
+        expires = try_acquire_lease(sqlite_db, SCHEDULER_LEASE, "a", 30, now=now + timedelta(seconds=20))
+
+        lease = sqlite_db.get(SchedulerLease, SCHEDULER_LEASE)
+        sqlite_db.refresh(lease)
+        assert expires == lease.expires_at == now + timedelta(seconds=50)
+        assert lease.acquired_at == now
+
+    def test_takeover_after_expiry(self, sqlite_db):
+        """Test that another worker takes over once the holder stops renewing."""
+        now = datetime.utcnow()
+        try_acquire_lease(sqlite_db, SCHEDULER_LEASE, "a", 30, now=now)
+
+        assert try_acquire_lease(sqlite_db, SCHEDULER_LEASE, "b", 30, now=now + timedelta(seconds=31)) is not None
+        assert try_acquire_lease(sqlite_db, SCHEDULER_LEASE, "a", 30, now=now + timedelta(seconds=32)) is None
+
+    def test_release_allows_immediate_takeover(self, sqlite_db):
+        """Test that a released lease is free before its expiry."""
+        try_acquire_lease(sqlite_db, SCHEDULER_LEASE, "a", 30)
+        release_lease(sqlite_db, SCHEDULER_LEASE, "b")  # nem a birtokos: nincs hatása
+        assert try_acquire_lease(sqlite_db, SCHEDULER_LEASE, "b", 30) is None
+
+        release_lease(sqlite_db, SCHEDULER_LEASE, "a")
+        assert try_acquire_lease(sqlite_db, SCHEDULER_LEASE, "b", 30) is not None
+
+
+@pytest.fixture
+def worker(sqlite_engine, monkeypatch):
+    """The scheduler module wired to the test database, with its jobs stubbed out."""
+    started = []
+    monkeypatch.setattr(scheduler, "SessionLocal", sessionmaker(bind=sqlite_engine))
+    monkeypatch.setattr(scheduler, "_start_jobs", lambda: started.append(True) or setattr(scheduler, "scheduler", object()))
+    monkeypatch.setattr(scheduler, "_stop_jobs", lambda: setattr(scheduler, "scheduler", None))
+    monkeypatch.setattr(scheduler, "WORKER_ID", "worker-1")
+    monkeypatch.setattr(scheduler, "_lease_until", None)
+    monkeypatch.setattr(scheduler, "scheduler", None)
+    return started
+
+
+class TestLeaderStep:
+    """Test suite for starting and stopping the jobs with the lease."""
+
+    def test_starts_jobs_once_when_leader(self, worker):
+        """Test that the lease holder starts the jobs and keeps them across renewals."""
+        asyncio.run(scheduler._leader_step())
+        asyncio.run(scheduler._leader_step())
+
+        assert worker == [True]
+        assert scheduler.scheduler is not None
+
+    def test_stops_jobs_when_lease_is_lost(self, worker, sqlite_db):
+        """Test that a worker whose lease was taken over stops its jobs."""
+        asyncio.run(scheduler._leader_step())
+        lease = sqlite_db.get(SchedulerLease, SCHEDULER_LEASE)
+        lease.holder, lease.expires_at = "worker-2", datetime.utcnow() + timedelta(seconds=60)
+        sqlite_db.commit()
+
+        asyncio.run(scheduler._leader_step())
+
+        assert scheduler.scheduler is None
+
+    def test_follower_does_not_start_jobs(self, worker, sqlite_db):
+        """Test that a worker without the lease never starts the jobs."""
+        try_acquire_lease(sqlite_db, SCHEDULER_LEASE, "worker-2", 60)
+
+        asyncio.run(scheduler._leader_step())
+
+        assert worker == []
+        assert scheduler.scheduler is None
@@ -0,0 +1,67 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+
+from backend.core.migrations import run_migrations
+from backend.models.location import Location
+from backend.models.weather import Weather
+from backend.services.location_service import CITIES, seed_locations, resolve_location_id
+from backend.services.weather_service import save_weather_records
+
+
+class TestSeedLocations:
+    """Test suite for seeding the locations table."""
+
+    def test_seeds_all_cities_once(self, sqlite_db):
+        """Test that seeding is idempotent."""
+        seed_locations(sqlite_db)
+        seed_locations(sqlite_db)
+
+        names = [loc.name for loc in sqlite_db.query(Location).order_by(Location.id)]
+        assert names == [name for name, _, _ in CITIES]
+
+    def test_links_legacy_rows_by_coordinates(self, sqlite_db):
+        """Test that rows without location_id are matched to a city."""
+        save_weather_records(sqlite_db, [(5.0, 2.0, 46.253, 20.141), (1.0, 1.0, 10.0, 10.0)])
+
+        seed_locations(sqlite_db)
+
+        rows = sqlite_db.query(Weather).order_by(Weather.id).all()
+        assert rows[0].location_name == "Szeged"
+        assert rows[1].location_id is None
+
+    def test_resolve_location_id(self, sqlite_db):
+        """Test coordinate lookup with tolerance."""
+        seed_locations(sqlite_db)
+        budapest = sqlite_db.query(Location).filter(Location.name == "Budapest").one()
+
+        assert resolve_location_id(sqlite_db, 47.49791, 19.04019) == budapest.id
+        assert resolve_location_id(sqlite_db, 0.0, 0.0) is None
+
+
+class TestRunMigrations:
+    """Test suite for upgrading a pre-location database."""
+
+    def test_upgrades_legacy_weather_table(self):
+        """Test that location_id and the composite index are added to an old schema."""
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE weather (id INTEGER NOT NULL PRIMARY KEY, temperature_c FLOAT NOT NULL, "
+                "windspeed_kmh FLOAT NOT NULL, latitude FLOAT NOT NULL, longitude FLOAT NOT NULL, "
+                "fetched_at DATETIME NOT NULL)"
+            ))
+            conn.execute(text(
+                "INSERT INTO weather VALUES (1, 8.7, 4.7, 47.4979, 19.0402, '2025-12-06 21:16:10')"
+            ))
+
+        run_migrations(engine)
+
+        insp = inspect(engine)
+        assert "location_id" in {c["name"] for c in insp.get_columns("weather")}
+        assert "ix_weather_location_fetched_at" in {i["name"] for i in insp.get_indexes("weather")}
+        with engine.connect() as conn:
+            name = conn.execute(text(
+                "SELECT l.name FROM weather w JOIN locations l ON l.id = w.location_id WHERE w.id = 1"
+            )).scalar()
+        assert name == "Budapest"
+        engine.dispose()
@@ -0,0 +1,83 @@
+import logging
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+from backend.core.config import settings
+from backend.core.metrics import MetricsMiddleware, install_query_metrics
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.parametrize("api_client", [[MetricsMiddleware]], ids=["metrics"], indirect=True)
+class TestRequestMetrics:
+    """Test suite for the HTTP middleware and the /metrics endpoint."""
+
+    def test_latency_is_labelled_by_route_template(self, api_client):
+        """Test that /weather/123 is counted under /weather/{weather_id}, with its status."""
+        labels = {"method": "GET", "route": "/weather/{weather_id}", "status": "404"}
+        before = _sample("http_request_duration_seconds_count", **labels)
+
+        api_client.get("/weather/123")
+        api_client.get("/weather/456")
+
+        assert _sample("http_request_duration_seconds_count", **labels) == before + 2
+        assert _sample("http_requests_in_progress", method="GET") == 0
+
+    def test_unknown_paths_share_one_label(self, api_client):
+        """Test that arbitrary paths do not create new series."""
+        labels = {"method": "GET", "route": "unmatched", "status": "404"}
+        before = _sample("http_request_duration_seconds_count", **labels)
+
+        api_client.get("/no/such/page")
+
+        assert _sample("http_request_duration_seconds_count", **labels) == before + 1
+
+    def test_metrics_endpoint_exposes_text_format(self, api_client):
+        """Test that /metrics serves the Prometheus exposition format."""
+        install_query_metrics()
+        api_client.get("/health")
+
+        resp = api_client.get("/metrics")
+
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain")
+        assert 'http_request_duration_seconds_bucket{le="0.005",method="GET",route="/health",status="200"}' in resp.text
+        assert "db_query_duration_seconds" in resp.text
+
+    def test_metrics_can_be_disabled(self, api_client, monkeypatch):
+        """Test that METRICS_ENABLED=false hides the endpoint."""
+        monkeypatch.setattr(settings, "metrics_enabled", False)
+
+        assert api_client.get("/metrics").status_code == 404
+
+
+class TestQueryMetrics:
+    """Test suite for the SQLAlchemy cursor-execute timings."""
+
+    def test_statements_are_timed_by_operation(self, sqlite_db):
+        """Test that every executed statement lands in the histogram."""
+        install_query_metrics()
+        before = _sample("db_query_duration_seconds_count", operation="SELECT")
+
+        sqlite_db.execute(text("SELECT 1"))
+        sqlite_db.execute(text("SELECT 2"))
+
+        assert _sample("db_query_duration_seconds_count", operation="SELECT") == before + 2
+
+    def test_slow_query_is_logged_with_plan(self, sqlite_db, monkeypatch, caplog):
+        """Test that a statement over SLOW_QUERY_MS is logged with EXPLAIN QUERY PLAN."""
+        install_query_metrics()
+        monkeypatch.setattr(settings, "slow_query_ms", 1e-6)
+        before = _sample("db_slow_queries_total", operation="SELECT")
+
+        with caplog.at_level(logging.WARNING, logger="app"):
+            sqlite_db.execute(text("SELECT * FROM weather WHERE fetched_at > :t"), {"t": "2025-01-01"})
+
+        assert _sample("db_slow_queries_total", operation="SELECT") >= before + 1
+        message = next(r.getMessage() for r in caplog.records if "FROM weather WHERE fetched_at" in r.getMessage())
+        assert "Query plan:" in message
+        assert "ix_weather_fetched_at" in message
@@ -0,0 +1,207 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from backend.core.config import settings
+from backend.services import weather_service
+from backend.services.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, TokenBucket
+from backend.services.weather_service import (
+    close_http_client,
+    fetch_current_weather_async,
+    fetch_current_weather_many_async,
+    open_http_client,
+    reset_upstream_guards,
+    upstream_stats,
+)
+from backend.tests.fake_open_meteo import FakeOpenMeteo
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    """Test suite for the circuit breaker state machine."""
+
+    def test_opens_after_threshold_and_probes_after_timeout(self):
+        """Test closed -> open -> half-open -> closed."""
+        clock = _Clock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=10, clock=clock)
+
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+
+        clock.now = 10
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow()
+        assert not breaker.allow()  # egyszerre csak egy próbahívás
+
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        assert breaker.stats()["rejected"] == 2
+
+    def test_failed_probe_reopens(self):
+        """Test that a failing half-open probe opens the circuit again."""
+        clock = _Clock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout_s=5, clock=clock)
+        breaker.record_failure()
+        clock.now = 5
+        assert breaker.allow()
+
+        breaker.record_failure()
+
+        assert breaker.state == OPEN
+        assert breaker.stats()["retry_in_s"] == 5
+
+
+class TestTokenBucket:
+    """Test suite for the client-side rate limiter."""
+
+    def test_burst_then_rate(self):
+        """Test that calls beyond the burst are spaced at the configured rate."""
+        bucket = TokenBucket(rate_per_s=50, burst=2)
+
+        async def run():
+            start = time.perf_counter()
+            for _ in range(7):
+                await bucket.acquire()
+            return time.perf_counter() - start
+
+        assert asyncio.run(run()) >= 0.09  # 5 hívás a burst felett, 50/s
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Fake Open-Meteo on localhost, with fast retries and a short timeout."""
+    server = FakeOpenMeteo().start()
+    monkeypatch.setattr(settings, "open_meteo_url", server.url)
+    monkeypatch.setattr(settings, "http_timeout_s", 0.3)
+    monkeypatch.setattr(settings, "http_retry_base_s", 0.01)
+    monkeypatch.setattr(settings, "http_retry_max_s", 0.02)
+    monkeypatch.setattr(settings, "http_max_retries", 2)
+    monkeypatch.setattr(settings, "breaker_failure_threshold", 3)
+    monkeypatch.setattr(settings, "breaker_reset_timeout_s", 60)
+    reset_upstream_guards()
+    yield server
+    server.stop()
+
+
+def _run(coro_factory):
+    async def runner():
+        await open_http_client()
+        try:
+            return await coro_factory()
+        finally:
+            await close_http_client()
+
+    return asyncio.run(runner())
+
+
+class TestResilientFetch:
+    """Test suite for the async fetch path against the fake upstream."""
+
+    def test_transient_errors_are_retried(self, upstream):
+        """Test that two 503s are absorbed by the retries."""
+        upstream.fail_next = 2
+
+        assert _run(lambda: fetch_current_weather_async(47.5, 19.0)) == (20.0, 5.0, 47.5, 19.0)
+        assert upstream.requests == 3
+        assert upstream_stats()["breaker"]["state"] == CLOSED
+
+    def test_attempts_are_counted_in_metrics(self, upstream):
+        """Test that each attempt is timed and counted by outcome."""
+        def sample(name, **labels):
+            return REGISTRY.get_sample_value(name, {"client": "async", **labels}) or 0.0
+
+        before_ok = sample("weather_upstream_requests_total", outcome="ok")
+        before_err = sample("weather_upstream_requests_total", outcome="http_error")
+        before_timed = sample("weather_upstream_request_duration_seconds_count")
+        upstream.fail_next = 1
+
+        _run(lambda: fetch_current_weather_async(47.5, 19.0))
+
+        assert sample("weather_upstream_requests_total", outcome="ok") == before_ok + 1
+        assert sample("weather_upstream_requests_total", outcome="http_error") == before_err + 1
+        assert sample("weather_upstream_request_duration_seconds_count") == before_timed + 2
+
+    def test_client_errors_are_not_retried(self, upstream):
+        """Test that a 400 fails at once and does not trip the breaker."""
+        upstream.fail_next, upstream.fail_status = 1, 400
+
+        with pytest.raises(httpx.HTTPStatusError):
+            _run(lambda: fetch_current_weather_async(47.5, 19.0))
+        assert upstream.requests == 1
+        assert upstream_stats()["breaker"]["consecutive_failures"] == 0
+
+    def test_latency_times_out_and_is_retried(self, upstream):
+        """Test that a slow upstream costs bounded time, not one hang per call."""
+        upstream.latency_s = 1.0
+
+        start = time.perf_counter()
+        with pytest.raises(httpx.TimeoutException):
+            _run(lambda: fetch_current_weather_async(47.5, 19.0))
+
+        assert time.perf_counter() - start < 2.0
+        assert upstream.requests == 3
+
+    def test_breaker_fails_fast_while_upstream_is_down(self, upstream, monkeypatch):
+        """Test that after the threshold no request reaches upstream."""
+        monkeypatch.setattr(settings, "http_retry_budget_ratio", 1.0)
+        reset_upstream_guards()
+        upstream.always_fail = True
+
+        async def calls():
+            results = []
+            for _ in range(5):
+                try:
+                    await fetch_current_weather_async(47.5, 19.0)
+                except Exception as e:
+                    results.append(e)
+            return results
+
+        errors = _run(calls)
+
+        assert [type(e) for e in errors[3:]] == [CircuitOpenError, CircuitOpenError]
+        assert upstream.requests == 3 * 3  # 3 hívás x (1 + 2 retry), utána semmi
+        stats = upstream_stats()
+        assert stats["breaker"]["state"] == OPEN
+        assert stats["breaker"]["rejected"] == 2
+
+    def test_retry_budget_caps_retries(self, upstream, monkeypatch):
+        """Test that retries stop once the budget is spent."""
+        monkeypatch.setattr(settings, "http_retry_budget_ratio", 0.0)
+        monkeypatch.setattr(settings, "breaker_failure_threshold", 100)
+        reset_upstream_guards()
+        upstream.always_fail = True
+
+        async def calls():
+            for _ in range(4):
+                with pytest.raises(httpx.HTTPStatusError):
+                    await fetch_current_weather_async(47.5, 19.0)
+
+        _run(calls)
+
+        # 4 hívás + a 3 tartalék újrapróbálás
+        assert upstream.requests == 4 + 3
+        assert upstream_stats()["retry_budget"]["exhausted"] > 0
+
+    def test_batch_tick_keeps_healthy_chunks(self, upstream, monkeypatch):
+        """Test that a failed chunk does not discard the others."""
+        monkeypatch.setattr(settings, "open_meteo_batch_size", 1)
+        monkeypatch.setattr(settings, "http_max_retries", 0)
+        upstream.fail_next = 1
+
+        results = _run(lambda: fetch_current_weather_many_async([(47.5, 19.0), (46.2, 20.1)], skip_failed=True))
+
+        assert results.count(None) == 1
+        assert [r for r in results if r is not None][0][0] == 20.0
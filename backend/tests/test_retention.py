@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.orm import Session
+
+from backend.core.migrations import run_migrations
+from backend.models.location import Location
+from backend.models.weather import Weather
+from backend.services.archive_service import archive_old_readings, partition_dates, query_archive
+from backend.services.location_service import seed_locations
+from backend.services.retention_service import enforce_retention, incremental_vacuum, reset_readings
+from backend.services.stats_service import get_rollups, get_stats, rebuild_aggregates
+from backend.services.weather_service import save_weather_records
+
+
+@pytest.fixture
+def db(sqlite_db):
+    seed_locations(sqlite_db)
+    return sqlite_db
+
+
+def _insert_ages(db, days_ago, location_id):
+    """Insert one reading per entry of ``days_ago`` for ``location_id``."""
+    now = datetime.utcnow()
+    for days in days_ago:
+        db.add(Weather(
+            temperature_c=1.0, windspeed_kmh=1.0, latitude=0.0, longitude=0.0,
+            location_id=location_id, fetched_at=now - timedelta(days=days, minutes=1),
+        ))
+    db.commit()
+
+
+def _ages(db, location_id):
+    now = datetime.utcnow()
+    q = db.query(Weather.fetched_at).filter(
+        Weather.location_id.is_(None) if location_id is None else Weather.location_id == location_id
+    )
+    return sorted((now - ts).days for (ts,) in q)
+
+
+class TestEnforceRetention:
+    """Test suite for the retention policy."""
+
+    def test_default_retention_days(self, db):
+        """Test that readings older than the default period are deleted for every location."""
+        _insert_ages(db, [0, 5, 10, 40], location_id=1)
+        _insert_ages(db, [1, 31], location_id=None)
+
+        assert enforce_retention(db, default_days=30) == 2
+
+        assert _ages(db, 1) == [0, 5, 10]
+        assert _ages(db, None) == [1]
+
+    def test_per_location_override(self, db):
+        """Test that Location.retention_days wins over the default."""
+        db.get(Location, 2).retention_days = 3
+        db.commit()
+        _insert_ages(db, [0, 5, 10], location_id=1)
+        _insert_ages(db, [0, 5, 10], location_id=2)
+
+        assert enforce_retention(db, default_days=7) == 3
+
+        assert _ages(db, 1) == [0, 5]
+        assert _ages(db, 2) == [0]
+
+    def test_disabled_by_default(self, db):
+        """Test that nothing is deleted without a retention period."""
+        _insert_ages(db, [100], location_id=1)
+
+        assert enforce_retention(db, default_days=0) == 0
+        assert _ages(db, 1) == [100]
+
+    def test_small_batches(self, db):
+        """Test that batching deletes every expired row and nothing else."""
+        _insert_ages(db, range(10, 30), location_id=1)
+        _insert_ages(db, [0], location_id=1)
+
+        assert enforce_retention(db, default_days=5, batch_size=3) == 20
+        assert _ages(db, 1) == [0]
+
+    def test_aggregates_drop_deleted_readings(self, db):
+        """Test that retention deletes are subtracted from the running aggregates and rollups."""
+        save_weather_records(db, [(10.0, 1.0, 47.4979, 19.0402)] * 3, location_ids=[1] * 3)
+        db.query(Weather).filter(Weather.id <= 2).update({Weather.fetched_at: datetime.utcnow() - timedelta(days=60)})
+        db.commit()
+        save_weather_records(db, [(20.0, 3.0, 47.4979, 19.0402)], location_ids=[1])
+
+        assert enforce_retention(db, default_days=30) == 2
+
+        assert db.query(Weather).count() == 2
+        for location_id in (None, 1):
+            stats = get_stats(db, location_id)
+            assert (stats["count"], stats["avg_temp"], stats["avg_wind"]) == (2, 15.0, 2.0)
+        assert all(r.bucket_start > datetime.utcnow() - timedelta(days=2) for r in get_rollups(db, "day"))
+
+
+    def test_archived_readings_are_pruned(self, db):
+        """Test that expired readings are deleted from the Parquet archive as well as the table."""
+        db.get(Location, 2).retention_days = 0
+        db.commit()
+        _insert_ages(db, [0, 10, 40, 50], location_id=1)
+        _insert_ages(db, [0, 40], location_id=2)
+        rebuild_aggregates(db)
+        assert archive_old_readings(db, older_than_days=5) == 4
+
+        assert enforce_retention(db, default_days=30) == 2
+
+        now = datetime.utcnow()
+        archived = query_archive(db, limit=100, direction="a")
+        assert sorted(((now - r.fetched_at).days, r.location_id) for r in archived) == [(10, 1), (40, 2)]
+        assert len(partition_dates()) == 2
+        assert get_stats(db)["count"] == 4
+        assert get_stats(db, 1)["count"] == 2
+
+
+class TestIncrementalVacuum:
+    """Test suite for reclaiming space after deletes."""
+
+    def test_new_database_uses_incremental_vacuum(self, tmp_path):
+        """Test that a fresh database gets auto_vacuum=INCREMENTAL and shrinks after retention."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+        run_migrations(engine)
+
+        with Session(engine) as db:
+            assert db.execute(text("PRAGMA auto_vacuum")).scalar() == 2
+            _insert_ages(db, [40] * 2000, location_id=1)
+            enforce_retention(db, default_days=30)
+
+            assert db.execute(text("PRAGMA freelist_count")).scalar() == 0
+            assert incremental_vacuum(db) == 0
+        engine.dispose()
+
+    def test_noop_without_incremental_mode(self, db):
+        """Test that files without incremental auto-vacuum are left alone."""
+        assert incremental_vacuum(db) == 0
+
+
+class TestResetReadings:
+    """Test suite for the drop-and-recreate reset."""
+
+    def test_reset_empties_table_and_aggregates(self, db):
+        """Test that the reset reports the count and leaves a working table."""
+        save_weather_records(db, [(10.0, 4.0, 47.4979, 19.0402)] * 4, location_ids=[1] * 4)
+
+        assert reset_readings(db) == 4
+
+        assert db.query(func.count(Weather.id)).scalar() == 0
+        assert get_stats(db)["count"] == 0
+        save_weather_records(db, [(11.0, 4.0, 47.4979, 19.0402)], location_ids=[1])
+        assert db.query(Weather).one().location_id == 1
+
+    def test_reset_count_excludes_retention_deletes(self, db):
+        """Test that readings already removed by retention are not reported again."""
+        _insert_ages(db, [0, 0, 40, 40, 40], location_id=1)
+        rebuild_aggregates(db)
+        assert enforce_retention(db, default_days=30) == 3
+
+        assert reset_readings(db) == 2
@@ -0,0 +1,329 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from backend.api import routes
+from backend.models.weather import Weather
+from backend.schemas.weather import WeatherOut
+from backend.services import history_service
+from backend.services.resilience import CircuitOpenError
+from backend.services.weather_service import save_weather_records
+
+
+class TestStatsRoutes:
+    """Test suite for the statistics endpoints."""
+
+    def test_stats_overall_and_per_location(self, api_client, sqlite_db):
+        """Test /weather/stats with and without a location."""
+        save_weather_records(sqlite_db, [(10.0, 4.0, 47.4979, 19.0402), (20.0, 6.0, 47.902534, 20.377228)], location_ids=[1, 2])
+
+        assert api_client.get("/weather/stats").json() == {
+            "count": 2, "avg_temp": 15.0, "min_temp": 10.0, "max_temp": 20.0, "avg_wind": 5.0,
+        }
+        assert api_client.get("/weather/stats", params={"location": "Eger"}).json()["avg_temp"] == 20.0
+        assert api_client.get("/weather/stats", params={"location": "Atlantis"}).status_code == 404
+
+    def test_aggregate_endpoint(self, api_client, sqlite_db):
+        """Test /weather/aggregate returns hourly rollups for a location."""
+        save_weather_records(sqlite_db, [(10.0, 4.0, 47.4979, 19.0402), (20.0, 6.0, 47.902534, 20.377228)], location_ids=[1, 2])
+
+        body = api_client.get("/weather/aggregate", params={"location": "Budapest", "bucket": "hour"}).json()
+
+        assert len(body) == 1
+        assert body[0]["location_name"] == "Budapest"
+        assert body[0]["count"] == 1
+        assert body[0]["avg_temp"] == 10.0
+        assert datetime.fromisoformat(body[0]["bucket_start"]).minute == 0
+
+    def test_aggregate_rejects_unknown_bucket(self, api_client):
+        """Test that only hour and day buckets are accepted."""
+        assert api_client.get("/weather/aggregate", params={"bucket": "week"}).status_code == 422
+
+
+def _insert_series(db, n, start=datetime(2025, 12, 1), location_ids=(1, 2)):
+    """Insert ``n`` hourly readings alternating between locations."""
+    for i in range(n):
+        db.add(Weather(
+            temperature_c=float(i), windspeed_kmh=1.0, latitude=0.0, longitude=0.0,
+            location_id=location_ids[i % len(location_ids)], fetched_at=start + timedelta(hours=i),
+        ))
+    db.commit()
+
+
+class TestListWeather:
+    """Test suite for keyset pagination and filters on GET /weather."""
+
+    def test_default_returns_latest_in_chronological_order(self, api_client, sqlite_db):
+        """Test the unchanged default: newest ``limit`` rows, oldest first."""
+        _insert_series(sqlite_db, 10)
+
+        r = api_client.get("/weather", params={"limit": 3})
+
+        assert [row["temperature_c"] for row in r.json()] == [7.0, 8.0, 9.0]
+        assert "X-Next-Cursor" in r.headers
+
+    def test_walk_backwards_with_cursor(self, api_client, sqlite_db):
+        """Test that following the cursor visits every row exactly once."""
+        _insert_series(sqlite_db, 10)
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+            r = api_client.get("/weather", params=params)
+            seen = [row["temperature_c"] for row in r.json()] + seen
+            cursor = r.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert seen == [float(i) for i in range(10)]
+
+    def test_after_id_walks_forward(self, api_client, sqlite_db):
+        """Test forward paging from a known id."""
+        _insert_series(sqlite_db, 10)
+        first_id = sqlite_db.query(Weather.id).filter(Weather.temperature_c == 2.0).scalar()
+
+        r = api_client.get("/weather", params={"after_id": first_id, "limit": 3})
+        assert [row["temperature_c"] for row in r.json()] == [3.0, 4.0, 5.0]
+
+        r = api_client.get("/weather", params={"cursor": r.headers["X-Next-Cursor"], "limit": 3})
+        assert [row["temperature_c"] for row in r.json()] == [6.0, 7.0, 8.0]
+
+    def test_before_id(self, api_client, sqlite_db):
+        """Test backward paging from a known id."""
+        _insert_series(sqlite_db, 10)
+        pivot = sqlite_db.query(Weather.id).filter(Weather.temperature_c == 5.0).scalar()
+
+        r = api_client.get("/weather", params={"before_id": pivot, "limit": 2})
+
+        assert [row["temperature_c"] for row in r.json()] == [3.0, 4.0]
+
+    def test_time_range_and_location_filters(self, api_client, sqlite_db):
+        """Test from/to and location filters together."""
+        _insert_series(sqlite_db, 10)
+
+        r = api_client.get("/weather", params={
+            "location": "Eger",
+            "from": "2025-12-01T02:00:00",
+            "to": "2025-12-01T07:00:00",
+        })
+
+        assert [row["temperature_c"] for row in r.json()] == [3.0, 5.0, 7.0]
+        assert {row["location_name"] for row in r.json()} == {"Eger"}
+        assert "X-Next-Cursor" not in r.headers
+
+    def test_invalid_cursor(self, api_client):
+        """Test that garbage cursors and unknown ids are rejected."""
+        assert api_client.get("/weather", params={"cursor": "not-a-cursor"}).status_code == 400
+        assert api_client.get("/weather", params={"after_id": 12345}).status_code == 400
+
+
+class TestExportWeather:
+    """Test suite for the streaming export endpoint."""
+
+    def test_ndjson_export(self, api_client, sqlite_db):
+        """Test that every row is streamed as one JSON line, in time order."""
+        _insert_series(sqlite_db, 5)
+
+        r = api_client.get("/weather/export")
+
+        assert r.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in r.text.splitlines()]
+        assert [line["temperature_c"] for line in lines] == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert lines[0]["location_name"] == "Budapest"
+        assert lines[0]["fetched_at"] == "2025-12-01T00:00:00"
+
+    def test_csv_export_with_filters(self, api_client, sqlite_db):
+        """Test CSV output with a time window and location."""
+        _insert_series(sqlite_db, 10)
+
+        r = api_client.get("/weather/export", params={
+            "format": "csv", "location": "Budapest", "from": "2025-12-01T03:00:00", "to": "2025-12-01T08:00:00",
+        })
+
+        assert r.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(r.text)))
+        assert [float(row["temperature_c"]) for row in rows] == [4.0, 6.0, 8.0]
+        assert {row["location_name"] for row in rows} == {"Budapest"}
+
+    def test_export_spans_several_batches(self, api_client, sqlite_db, monkeypatch):
+        """Test that batching does not drop or duplicate rows."""
+        monkeypatch.setattr(history_service, "EXPORT_BATCH_SIZE", 3)
+        _insert_series(sqlite_db, 10)
+
+        r = api_client.get("/weather/export")
+
+        assert [json.loads(line)["temperature_c"] for line in r.text.splitlines()] == [float(i) for i in range(10)]
+
+
+class TestAsyncWriteRoutes:
+    """Test suite for the async fetch, detail and reset endpoints."""
+
+    def test_fetch_stores_reading_with_location(self, api_client, sqlite_db, monkeypatch):
+        """Test that /weather/fetch saves through the async session and resolves the city."""
+        async def fake_current_weather(lat, lon):
+            return 12.5, 3.0, 47.4979, 19.0402
+
+        monkeypatch.setattr(routes, "get_current_weather", fake_current_weather)
+
+        body = api_client.post("/weather/fetch").json()
+
+        assert body["temperature_c"] == 12.5
+        assert body["location_name"] == "Budapest"
+        assert api_client.get(f"/weather/{body['id']}").json()["location_name"] == "Budapest"
+        assert api_client.get("/weather/stats").json()["count"] == 1
+
+    def test_detail_missing_record(self, api_client):
+        """Test that an unknown id gives 404."""
+        assert api_client.get("/weather/999").status_code == 404
+
+    def test_reset_deletes_everything(self, api_client, sqlite_db):
+        """Test that /weather/reset clears readings and aggregates."""
+        save_weather_records(sqlite_db, [(10.0, 4.0, 47.4979, 19.0402)] * 3, location_ids=[1] * 3)
+
+        r = api_client.delete("/weather/reset")
+
+        assert r.json()["message"].endswith("Deleted 3 records.")
+        assert api_client.get("/weather").json() == []
+        assert api_client.get("/weather/stats").json()["count"] == 0
+
+    def test_fetch_falls_back_to_last_stored_reading(self, api_client, sqlite_db, monkeypatch):
+        """Test that an open breaker serves the newest stored reading instead of failing."""
+        async def breaker_open(lat, lon):
+            raise CircuitOpenError("open")
+
+        monkeypatch.setattr(routes, "get_current_weather", breaker_open)
+        assert api_client.post("/weather/fetch").status_code == 503
+
+        save_weather_records(sqlite_db, [(8.0, 1.0, 47.4979, 19.0402), (9.0, 1.0, 47.4979, 19.0402)], location_ids=[1, 1])
+        r = api_client.post("/weather/fetch")
+
+        assert r.status_code == 200
+        assert r.headers["X-Weather-Source"] == "last-stored"
+        assert r.json()["temperature_c"] == 9.0
+        assert r.json()["location_name"] == "Budapest"
+
+    def test_upstream_stats(self, api_client):
+        """Test that the breaker state is exposed for monitoring."""
+        body = api_client.get("/weather/upstream/stats").json()
+
+        assert body["breaker"]["state"] == "closed"
+        assert {"rate_limiter", "retry_budget"} <= body.keys()
+
+
+class TestConditionalRequests:
+    """Test suite for ETag/304 handling on the read endpoints."""
+
+    def test_unchanged_list_is_not_modified(self, api_client, sqlite_db, monkeypatch):
+        """Test that a matching If-None-Match gets 304 without running the list query."""
+        _insert_series(sqlite_db, 3)
+        first = api_client.get("/weather")
+        etag = first.headers["ETag"]
+        assert first.headers["Last-Modified"].endswith("GMT")
+        assert "max-age" in first.headers["Cache-Control"]
+
+        def must_not_run(*args, **kwargs):
+            raise AssertionError("main query executed")
+
+        monkeypatch.setattr(routes, "list_readings", must_not_run)
+        r = api_client.get("/weather", headers={"If-None-Match": etag})
+
+        assert r.status_code == 304
+        assert r.content == b""
+        assert r.headers["ETag"] == etag
+
+    def test_new_reading_changes_etag(self, api_client, sqlite_db):
+        """Test that any write invalidates the validator of every read endpoint."""
+        save_weather_records(sqlite_db, [(10.0, 4.0, 47.4979, 19.0402)], location_ids=[1])
+        before = {path: api_client.get(path).headers["ETag"] for path in ("/weather", "/weather/stats", "/weather/1")}
+
+        save_weather_records(sqlite_db, [(11.0, 4.0, 47.4979, 19.0402)], location_ids=[1])
+
+        for path, etag in before.items():
+            r = api_client.get(path, headers={"If-None-Match": etag})
+            assert r.status_code == 200, path
+            assert r.headers["ETag"] != etag
+
+    def test_delete_changes_etag(self, api_client, sqlite_db):
+        """Test that removing rows (retention, archive) also changes the validator."""
+        _insert_series(sqlite_db, 3)
+        etag = api_client.get("/weather").headers["ETag"]
+
+        sqlite_db.query(Weather).filter(Weather.id == 1).delete()
+        sqlite_db.commit()
+
+        assert api_client.get("/weather", headers={"If-None-Match": etag}).status_code == 200
+
+    def test_etag_depends_on_query(self, api_client, sqlite_db):
+        """Test that different pages or filters never share a validator."""
+        _insert_series(sqlite_db, 3)
+        etag = api_client.get("/weather", params={"limit": 1}).headers["ETag"]
+
+        assert api_client.get("/weather", params={"limit": 2}).headers["ETag"] != etag
+        assert api_client.get("/weather/stats", params={"location": "Eger"}, headers={"If-None-Match": etag}).status_code == 200
+
+
+class TestListFastPath:
+    """Test suite for the tuple/orjson serialization of GET /weather."""
+
+    def test_matches_weather_out(self, api_client, sqlite_db):
+        """Test that the fast path returns exactly what WeatherOut would."""
+        _insert_series(sqlite_db, 3, start=datetime(2025, 12, 1, 0, 0, 0, 123456))
+        expected = [
+            WeatherOut.model_validate(rec).model_dump(mode="json")
+            for rec in sqlite_db.query(Weather).order_by(Weather.fetched_at)
+        ]
+
+        assert api_client.get("/weather").json() == expected
+
+    def test_fields_projection(self, api_client, sqlite_db):
+        """Test that ?fields= returns only the requested keys, in order."""
+        _insert_series(sqlite_db, 2)
+
+        body = api_client.get("/weather", params={"fields": "fetched_at, temperature_c,location_name"}).json()
+
+        assert [list(row) for row in body] == [["fetched_at", "temperature_c", "location_name"]] * 2
+        assert body[0] == {"fetched_at": "2025-12-01T00:00:00", "temperature_c": 0.0, "location_name": "Budapest"}
+
+    def test_unknown_field_is_rejected(self, api_client):
+        """Test that an unknown field name gives 400."""
+        assert api_client.get("/weather", params={"fields": "id,password"}).status_code == 400
+
+
+class TestDashboard:
+    """Test suite for the combined GET /dashboard endpoint."""
+
+    def test_first_call_returns_stats_latest_and_newest_rows(self, api_client, sqlite_db):
+        """Test the initial snapshot: stats, newest reading per city and the newest ``limit`` rows."""
+        save_weather_records(sqlite_db, [
+            (10.0, 4.0, 47.4979, 19.0402), (20.0, 6.0, 47.902534, 20.377228), (12.0, 2.0, 47.4979, 19.0402),
+        ], location_ids=[1, 2, 1])
+
+        body = api_client.get("/dashboard", params={"limit": 2}).json()
+
+        assert body["stats"]["count"] == 3
+        assert [(r["location_name"], r["temperature_c"]) for r in body["latest"]] == [("Budapest", 12.0), ("Eger", 20.0)]
+        assert [r["id"] for r in body["readings"]] == [2, 3]
+        assert body["last_id"] == 3
+        assert body["has_more"] is False
+
+    def test_incremental_sync_returns_only_newer_rows(self, api_client, sqlite_db):
+        """Test that after_id pages forward by id and reports has_more."""
+        _insert_series(sqlite_db, 5)
+
+        first = api_client.get("/dashboard", params={"after_id": 1, "limit": 2}).json()
+        second = api_client.get("/dashboard", params={"after_id": first["last_id"], "limit": 2}).json()
+        idle = api_client.get("/dashboard", params={"after_id": 5}).json()
+
+        assert [r["id"] for r in first["readings"]] == [2, 3] and first["has_more"] is True
+        assert [r["id"] for r in second["readings"]] == [4, 5] and second["has_more"] is False
+        assert idle["readings"] == [] and idle["last_id"] == 5
+
+    def test_unchanged_snapshot_is_not_modified(self, api_client, sqlite_db):
+        """Test that the dashboard shares the ETag validation of the other GET routes."""
+        _insert_series(sqlite_db, 2)
+        first = api_client.get("/dashboard", params={"after_id": 2})
+
+        again = api_client.get("/dashboard", params={"after_id": 2}, headers={"If-None-Match": first.headers["ETag"]})
+
+        assert again.status_code == 304
@@ -0,0 +1,139 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from prometheus_client import REGISTRY
+from sqlalchemy.orm import sessionmaker
+
+from backend.core.config import settings
+from backend.models.outbox import EmailOutbox
+from backend.models.weather import Weather
+from backend.services import scheduler
+from backend.services.location_service import list_locations, seed_locations
+
+
+@pytest.fixture
+def locations(sqlite_db):
+    seed_locations(sqlite_db)
+    return list_locations(sqlite_db)
+
+
+def _location_jobs(sched):
+    return sorted((job for job in sched.get_jobs() if job.id.startswith(scheduler.LOCATION_JOB_PREFIX)),
+                  key=lambda job: job.trigger.start_date)
+
+
+class TestApplyLocationJobs:
+    """Test suite for the per-location interval jobs."""
+
+    def test_one_job_per_location_spread_over_interval(self, locations, monkeypatch):
+        """Test that start times are evenly spread and jittered."""
+        monkeypatch.setattr(settings, "scheduler_interval_min", 10)
+        sched = AsyncIOScheduler()
+
+        scheduler.apply_location_jobs(sched, locations)
+
+        jobs = _location_jobs(sched)
+        assert [job.args[0].name for job in jobs] == [loc.name for loc in locations]
+        starts = [job.trigger.start_date for job in jobs]
+        assert [b - a for a, b in zip(starts, starts[1:])] == [timedelta(minutes=2)] * 4
+        assert all(job.trigger.jitter == settings.scheduler_jitter_s for job in jobs)
+
+    def test_location_interval_override_and_removal(self, sqlite_db, locations):
+        """Test that a per-location interval is used and removed locations lose their job."""
+        sched = AsyncIOScheduler()
+        scheduler.apply_location_jobs(sched, locations)
+
+        locations[0].fetch_interval_min = 5
+        scheduler.apply_location_jobs(sched, locations[:3])
+
+        jobs = {job.id: job for job in _location_jobs(sched)}
+        assert len(jobs) == 3
+        assert jobs[f"location:{locations[0].id}"].trigger.interval == timedelta(minutes=5)
+
+
+    def test_changed_location_replaces_its_job(self, sqlite_engine, locations):
+        """Test that new coordinates or a new name reach the job without a restart."""
+        def load():
+            # mint a _sync_location_jobs: minden szinkron friss sessionből olvas
+            with sessionmaker(bind=sqlite_engine)() as db:
+                return list_locations(db)
+
+        sched = AsyncIOScheduler()
+        scheduler.apply_location_jobs(sched, load())
+        untouched_start = sched.get_job(f"location:{locations[1].id}").trigger.start_date
+
+        with sessionmaker(bind=sqlite_engine)() as db:
+            loc = db.get(type(locations[0]), locations[0].id)
+            loc.latitude, loc.name = 47.5, "Budapest XI."
+            db.commit()
+        scheduler.apply_location_jobs(sched, load())
+
+        # a nem indított ütemező függő listájában a későbbi job az érvényes
+        jobs = {job.id: job for job in sched.get_jobs()}
+        moved = jobs[f"location:{locations[0].id}"].args[0]
+        assert (moved.latitude, moved.name) == (47.5, "Budapest XI.")
+        assert jobs[f"location:{locations[1].id}"].trigger.start_date == untouched_start
+
+
+class TestLocationJob:
+    """Test suite for running a single location job."""
+
+    @pytest.fixture
+    def worker(self, sqlite_engine, monkeypatch):
+        monkeypatch.setattr(scheduler, "SessionLocal", sessionmaker(bind=sqlite_engine))
+        monkeypatch.setattr(settings, "email_to", None)
+        monkeypatch.setattr(settings, "scheduler_job_timeout_s", 0.2)
+
+    def test_slow_location_does_not_delay_others(self, sqlite_db, locations, worker, monkeypatch):
+        """Test that a hung fetch times out while the other locations are stored."""
+        slow = locations[0]
+
+        async def fake_refresh(lat, lon):
+            if lat == slow.latitude:
+                await asyncio.sleep(10)
+            return 10.0, 2.0, lat, lon
+
+        monkeypatch.setattr(scheduler, "refresh_current_weather", fake_refresh)
+
+        async def run():
+            monkeypatch.setattr(scheduler, "_job_slots", asyncio.Semaphore(len(locations)))
+            await asyncio.gather(*(scheduler._location_job(loc) for loc in locations))
+
+        timeouts_before = REGISTRY.get_sample_value(
+            "scheduler_city_fetches_total", {"city": slow.name, "outcome": "timeout"}
+        ) or 0.0
+
+        asyncio.run(asyncio.wait_for(run(), 5))
+
+        stored = {loc_id for (loc_id,) in sqlite_db.query(Weather.location_id)}
+        assert stored == {loc.id for loc in locations[1:]}
+        assert REGISTRY.get_sample_value(
+            "scheduler_city_fetches_total", {"city": slow.name, "outcome": "timeout"}
+        ) == timeouts_before + 1
+
+    def test_one_report_per_interval(self, sqlite_db, locations, worker, monkeypatch):
+        """Test that per-location jobs queue no email themselves and the report job sends one per interval."""
+        monkeypatch.setattr(settings, "email_to", "ops@example.com")
+        monkeypatch.setattr(scheduler, "_report_since", None)
+
+        async def fake_refresh(lat, lon):
+            return 10.0, 2.0, lat, lon
+
+        monkeypatch.setattr(scheduler, "refresh_current_weather", fake_refresh)
+
+        async def run():
+            monkeypatch.setattr(scheduler, "_job_slots", asyncio.Semaphore(len(locations)))
+            await asyncio.gather(*(scheduler._location_job(loc) for loc in locations))
+
+        asyncio.run(run())
+        assert sqlite_db.query(EmailOutbox).count() == 0
+
+        scheduler._report_job()
+        scheduler._report_job()  # a következő intervallumban nincs új mérés
+
+        reports = sqlite_db.query(EmailOutbox).all()
+        assert len(reports) == 1
+        assert reports[0].subject == scheduler.REPORT_SUBJECT
+        assert all(f"{loc.name}: 10.0°C" in reports[0].body for loc in locations)
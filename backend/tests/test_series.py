@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from backend.models.weather import Weather
+from backend.services.archive_service import archive_old_readings
+from backend.services.location_service import seed_locations
+from backend.services.series_service import lttb
+
+
+@pytest.fixture
+def db(sqlite_db):
+    seed_locations(sqlite_db)
+    return sqlite_db
+
+
+def _insert_hourly(db, n, start, location_id=1, temp=lambda i: float(i % 24)):
+    """Insert ``n`` hourly readings for one location."""
+    for i in range(n):
+        db.add(Weather(
+            temperature_c=temp(i), windspeed_kmh=float(i % 7), latitude=0.0, longitude=0.0,
+            location_id=location_id, fetched_at=start + timedelta(hours=i),
+        ))
+    db.commit()
+
+
+class TestLttb:
+    """Test suite for the Largest-Triangle-Three-Buckets selection."""
+
+    def test_short_series_is_returned_unchanged(self):
+        """Test that a series not longer than the threshold keeps every point."""
+        x = np.arange(5, dtype=float)
+        assert lttb(x, x, 5).tolist() == [0, 1, 2, 3, 4]
+        assert lttb(x, x, 10).tolist() == [0, 1, 2, 3, 4]
+
+    def test_keeps_endpoints_and_one_point_per_bucket(self):
+        """Test the output size, the endpoints and that indexes are strictly increasing."""
+        x = np.arange(1000, dtype=float)
+        y = np.sin(x / 20)
+
+        idx = lttb(x, y, 50)
+
+        assert len(idx) == 50
+        assert idx[0] == 0 and idx[-1] == 999
+        assert np.all(np.diff(idx) > 0)
+
+    def test_keeps_spikes(self):
+        """Test that isolated extremes survive, which plain striding would drop."""
+        x = np.arange(10_000, dtype=float)
+        y = np.zeros(10_000)
+        y[[1234, 5677, 8001]] = [50.0, -40.0, 30.0]
+
+        idx = lttb(x, y, 100)
+
+        assert {1234, 5677, 8001} <= set(idx.tolist())
+
+
+class TestSeriesRoute:
+    """Test suite for GET /weather/series."""
+
+    def test_series_is_bounded_per_location(self, api_client, db):
+        """Test that each location gets at most ``points`` points, in time order, with the raw count."""
+        _insert_hourly(db, 300, datetime(2025, 11, 1), location_id=1)
+        _insert_hourly(db, 20, datetime(2025, 11, 1), location_id=2)
+
+        body = api_client.get("/weather/series", params={"points": 50}).json()
+
+        by_name = {s["location_name"]: s for s in body["series"]}
+        assert set(by_name) == {"Budapest", "Eger"}
+        assert by_name["Budapest"]["total"] == 300 and len(by_name["Budapest"]["fetched_at"]) == 50
+        assert by_name["Eger"]["total"] == 20 and len(by_name["Eger"]["temperature_c"]) == 20
+        stamps = by_name["Budapest"]["fetched_at"]
+        assert stamps == sorted(stamps)
+        assert stamps[0].startswith("2025-11-01T00:00:00") and stamps[-1].startswith("2025-11-13T11:00:00")
+
+    def test_metric_selects_the_preserved_column(self, api_client, db):
+        """Test that a wind spike is kept when downsampling by wind, with matching temperatures."""
+        _insert_hourly(db, 500, datetime(2025, 11, 1), temp=lambda i: 10.0)
+        db.query(Weather).filter(Weather.id == 321).update({"windspeed_kmh": 99.0})
+        db.commit()
+
+        body = api_client.get("/weather/series", params={"points": 20, "metric": "windspeed_kmh"}).json()
+
+        series = body["series"][0]
+        assert body["metric"] == "windspeed_kmh"
+        assert 99.0 in series["windspeed_kmh"]
+        assert set(series["temperature_c"]) == {10.0}
+
+    def test_filters_and_validation(self, api_client, db):
+        """Test location and time window filters, an unknown location and the points bounds."""
+        _insert_hourly(db, 48, datetime(2025, 11, 1), location_id=1)
+        _insert_hourly(db, 48, datetime(2025, 11, 1), location_id=2)
+
+        body = api_client.get("/weather/series", params={
+            "location": "Eger", "from": "2025-11-02T00:00:00", "to": "2025-11-02T05:00:00",
+        }).json()
+
+        assert [s["location_name"] for s in body["series"]] == ["Eger"]
+        assert body["series"][0]["total"] == 6
+        assert api_client.get("/weather/series", params={"location": "Atlantis"}).status_code == 404
+        assert api_client.get("/weather/series", params={"points": 2}).status_code == 422
+
+    def test_includes_archived_readings(self, api_client, db):
+        """Test that the series spans the Parquet archive and the hot table."""
+        start = datetime.utcnow().replace(microsecond=0) - timedelta(days=10)
+        _insert_hourly(db, 240, start)
+        archive_old_readings(db, older_than_days=5)
+
+        series = api_client.get("/weather/series", params={"points": 1000}).json()["series"][0]
+
+        assert series["total"] == 240
+        assert series["fetched_at"][0].startswith(start.isoformat())
+
+    def test_empty_database(self, api_client):
+        """Test that no readings give an empty series list."""
+        assert api_client.get("/weather/series").json()["series"] == []
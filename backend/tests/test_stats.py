@@ -0,0 +1,157 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func
+
+from backend.models.aggregate import WeatherAggregate
+from backend.models.weather import Weather
+from backend.services.location_service import seed_locations
+from backend.services.stats_service import apply_new_readings, clear_aggregates, get_rollups, get_stats, rebuild_aggregates
+from backend.services.weather_service import save_weather_record, save_weather_records
+
+
+def _full_scan_stats(db, location_id=None):
+    q = db.query(
+        func.count(Weather.id),
+        func.avg(Weather.temperature_c),
+        func.min(Weather.temperature_c),
+        func.max(Weather.temperature_c),
+        func.avg(Weather.windspeed_kmh),
+    )
+    if location_id is not None:
+        q = q.filter(Weather.location_id == location_id)
+    count, avg_temp, min_temp, max_temp, avg_wind = q.one()
+    return {
+        "count": count,
+        "avg_temp": round(avg_temp or 0, 2),
+        "min_temp": round(min_temp or 0, 2),
+        "max_temp": round(max_temp or 0, 2),
+        "avg_wind": round(avg_wind or 0, 2),
+    }
+
+
+@pytest.fixture
+def db(sqlite_db):
+    seed_locations(sqlite_db)
+    return sqlite_db
+
+
+class TestRunningAggregates:
+    """Test suite for the incrementally maintained weather statistics."""
+
+    def test_empty_table(self, db):
+        """Test the stats of an empty table."""
+        assert get_stats(db) == {"count": 0, "avg_temp": 0, "min_temp": 0, "max_temp": 0, "avg_wind": 0}
+
+    def test_matches_full_scan_after_mixed_inserts(self, db):
+        """Test that bulk and single inserts keep the aggregates exact."""
+        save_weather_records(db, [(20.0, 10.0, 47.5, 19.0), (-4.5, 3.0, 46.2, 20.1)], location_ids=[1, 4])
+        save_weather_record(db, 31.2, 25.0, 47.5, 19.0, location_id=1)
+        save_weather_records(db, [(7.0, 0.0, 10.0, 10.0)])
+
+        assert get_stats(db) == _full_scan_stats(db)
+        assert get_stats(db, 1) == _full_scan_stats(db, 1)
+        assert get_stats(db, 4) == _full_scan_stats(db, 4)
+        assert get_stats(db)["count"] == 4
+        assert get_stats(db)["min_temp"] == -4.5
+        assert get_stats(db)["max_temp"] == 31.2
+
+    def test_unknown_location_is_empty(self, db):
+        """Test that a location without readings reports zero rows."""
+        save_weather_records(db, [(20.0, 10.0, 47.5, 19.0)], location_ids=[1])
+
+        assert get_stats(db, 2)["count"] == 0
+
+    def test_rebuild_restores_drifted_aggregates(self, db):
+        """Test that a rebuild recomputes the aggregates from the rows."""
+        save_weather_records(db, [(20.0, 10.0, 47.5, 19.0), (10.0, 5.0, 46.2, 20.1)], location_ids=[1, 4])
+        db.query(Weather).filter(Weather.temperature_c == 20.0).delete()
+        db.commit()
+        assert get_stats(db)["count"] == 2  # elcsúszott
+
+        rebuild_aggregates(db)
+
+        assert get_stats(db) == _full_scan_stats(db)
+        assert get_stats(db, 1)["count"] == 0
+        assert get_stats(db, 4) == _full_scan_stats(db, 4)
+
+    def test_clear_aggregates(self, db):
+        """Test that clearing removes every aggregate row."""
+        save_weather_records(db, [(20.0, 10.0, 47.5, 19.0)], location_ids=[1])
+
+        clear_aggregates(db)
+        db.commit()
+
+        assert db.query(WeatherAggregate).count() == 0
+
+
+def _insert_at(db, fetched_at, temp, wind, location_id):
+    """Insert one reading with an explicit timestamp, maintaining the rollups."""
+    db.add(Weather(
+        temperature_c=temp, windspeed_kmh=wind, latitude=0.0, longitude=0.0,
+        location_id=location_id, fetched_at=fetched_at,
+    ))
+    apply_new_readings(db, [{
+        "temperature_c": temp, "windspeed_kmh": wind, "location_id": location_id, "fetched_at": fetched_at,
+    }])
+    db.commit()
+
+
+def _as_tuples(rollups):
+    return [
+        (r.location_id, r.bucket, r.bucket_start, r.count, r.temp_sum, r.temp_min, r.temp_max,
+         r.wind_sum, r.wind_min, r.wind_max)
+        for r in rollups
+    ]
+
+
+class TestRollups:
+    """Test suite for the hourly/daily rollup tables."""
+
+    @pytest.fixture
+    def readings(self, db):
+        _insert_at(db, datetime(2025, 12, 6, 10, 5), 4.0, 10.0, 1)
+        _insert_at(db, datetime(2025, 12, 6, 10, 55), 6.0, 20.0, 1)
+        _insert_at(db, datetime(2025, 12, 6, 11, 0), 8.0, 5.0, 1)
+        _insert_at(db, datetime(2025, 12, 7, 0, 30), -2.0, 1.0, 1)
+        _insert_at(db, datetime(2025, 12, 6, 10, 30), 15.0, 3.0, 2)
+        return db
+
+    def test_hourly_buckets(self, readings):
+        """Test that readings are folded into their hour."""
+        rows = get_rollups(readings, "hour", location_id=1)
+
+        assert [(r.bucket_start, r.count) for r in rows] == [
+            (datetime(2025, 12, 6, 10), 2),
+            (datetime(2025, 12, 6, 11), 1),
+            (datetime(2025, 12, 7, 0), 1),
+        ]
+        first = rows[0]
+        assert (first.temp_sum, first.temp_min, first.temp_max) == (10.0, 4.0, 6.0)
+        assert (first.wind_min, first.wind_max) == (10.0, 20.0)
+
+    def test_daily_buckets_and_time_range(self, readings):
+        """Test daily buckets and the from/to filter."""
+        rows = get_rollups(readings, "day", location_id=1, start=datetime(2025, 12, 6, 12))
+
+        # a 12:00-s kezdet is a 12-06-os napi ablakot adja vissza
+        assert [(r.bucket_start, r.count) for r in rows] == [
+            (datetime(2025, 12, 6), 3),
+            (datetime(2025, 12, 7), 1),
+        ]
+        assert get_rollups(readings, "day", location_id=1, end=datetime(2025, 12, 6, 23))[-1].bucket_start == datetime(2025, 12, 6)
+
+    def test_rows_without_location_are_not_rolled_up(self, db):
+        """Test that only located readings produce rollups."""
+        save_weather_records(db, [(5.0, 5.0, 10.0, 10.0)])
+
+        assert get_rollups(db, "hour") == []
+        assert get_stats(db)["count"] == 1
+
+    def test_rebuild_matches_incremental(self, readings):
+        """Test that a rebuild yields the same rollups as incremental maintenance."""
+        incremental = {b: _as_tuples(get_rollups(readings, b)) for b in ("hour", "day")}
+
+        rebuild_aggregates(readings)
+
+        assert {b: _as_tuples(get_rollups(readings, b)) for b in ("hour", "day")} == incremental
@@ -1,10 +1,24 @@
+import asyncio
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime
+import httpx
 import requests
 from sqlalchemy.orm import Session
 
-from backend.services.weather_service import fetch_current_weather, save_weather_record
+from backend.services import weather_service
+from backend.services.weather_service import (
+    fetch_current_weather,
+    fetch_current_weather_many,
+    fetch_current_weather_async,
+    fetch_current_weather_many_async,
+    get_current_weather,
+    current_weather_cache,
+    open_http_client,
+    close_http_client,
+    save_weather_record,
+    save_weather_records,
+)
 from backend.models.weather import Weather
 from backend.core.config import settings
 
@@ -65,7 +79,7 @@ class TestFetchCurrentWeather:
         assert lat == pytest.approx(settings.default_lat, rel=1e-3)
         assert lon == pytest.approx(10.0, rel=1e-3)
 
-    @patch('backend.services.weather_service.requests.get')
+    @patch('requests.get')
     def test_fetch_current_weather_api_response_structure(self, mock_get):
         """Test that the function correctly parses the API response."""
         # Mock API response
@@ -93,7 +107,7 @@ class TestFetchCurrentWeather:
         assert "longitude=19.0" in call_args[0][0]
         assert call_args[1]['timeout'] == 10
 
-    @patch('backend.services.weather_service.requests.get')
+    @patch('requests.get')
     def test_fetch_current_weather_http_error(self, mock_get):
         """Test handling of HTTP errors from the API."""
         mock_response = Mock()
@@ -103,7 +117,7 @@ class TestFetchCurrentWeather:
         with pytest.raises(requests.exceptions.HTTPError):
             fetch_current_weather(47.5, 19.0)
 
-    @patch('backend.services.weather_service.requests.get')
+    @patch('requests.get')
     def test_fetch_current_weather_timeout(self, mock_get):
         """Test handling of timeout errors."""
         mock_get.side_effect = requests.exceptions.Timeout("Request timed out")
@@ -111,7 +125,7 @@ class TestFetchCurrentWeather:
         with pytest.raises(requests.exceptions.Timeout):
             fetch_current_weather(47.5, 19.0)
 
-    @patch('backend.services.weather_service.requests.get')
+    @patch('requests.get')
     def test_fetch_current_weather_connection_error(self, mock_get):
         """Test handling of connection errors."""
         mock_get.side_effect = requests.exceptions.ConnectionError("Failed to connect")
@@ -119,7 +133,7 @@ class TestFetchCurrentWeather:
         with pytest.raises(requests.exceptions.ConnectionError):
             fetch_current_weather(47.5, 19.0)
 
-    @patch('backend.services.weather_service.requests.get')
+    @patch('requests.get')
     def test_fetch_current_weather_invalid_json(self, mock_get):
         """Test handling of invalid JSON response."""
         mock_response = Mock()
@@ -130,7 +144,7 @@ class TestFetchCurrentWeather:
         with pytest.raises(ValueError):
             fetch_current_weather(47.5, 19.0)
 
-    @patch('backend.services.weather_service.requests.get')
+    @patch('requests.get')
     def test_fetch_current_weather_missing_data_fields(self, mock_get):
         """Test handling of missing data fields in API response."""
         mock_response = Mock()
@@ -143,7 +157,7 @@ class TestFetchCurrentWeather:
         with pytest.raises(KeyError):
             fetch_current_weather(47.5, 19.0)
 
-    @patch('backend.services.weather_service.requests.get')
+    @patch('requests.get')
     def test_fetch_current_weather_extreme_values(self, mock_get):
         """Test handling of extreme weather values."""
         mock_response = Mock()
@@ -162,6 +176,236 @@ class TestFetchCurrentWeather:
         assert wind == 408.0
 
 
+# ============================================================================
+# Tests for fetch_current_weather_many
+# ============================================================================
+
+def _multi_response(values):
+    """Build a mocked multi-location Open-Meteo response."""
+    mock_response = Mock()
+    mock_response.json.return_value = [
+        {"current": {"temperature_2m": t, "wind_speed_10m": w}} for t, w in values
+    ]
+    mock_response.raise_for_status = Mock()
+    return mock_response
+
+
+class TestFetchCurrentWeatherMany:
+    """Test suite for the fetch_current_weather_many function."""
+
+    @patch('requests.get')
+    def test_single_request_for_small_batch(self, mock_get):
+        """Test that all locations of a small batch go out in one request."""
+        mock_get.return_value = _multi_response([(20.0, 10.0), (18.5, 12.5), (15.0, 20.0)])
+        coords = [(47.4979, 19.0402), (48.2082, 16.3738), (52.52, 13.405)]
+
+        results = fetch_current_weather_many(coords)
+
+        mock_get.assert_called_once()
+        url = mock_get.call_args[0][0]
+        assert "latitude=47.4979,48.2082,52.52" in url
+        assert "longitude=19.0402,16.3738,13.405" in url
+        assert results == [
+            (20.0, 10.0, 47.4979, 19.0402),
+            (18.5, 12.5, 48.2082, 16.3738),
+            (15.0, 20.0, 52.52, 13.405),
+        ]
+
+    @patch('requests.get')
+    def test_chunks_by_batch_size(self, mock_get, monkeypatch):
+        """Test that the number of upstream calls grows with chunks, not locations."""
+        monkeypatch.setattr(settings, "open_meteo_batch_size", 2)
+        mock_get.side_effect = [
+            _multi_response([(1.0, 1.0), (2.0, 2.0)]),
+            _multi_response([(3.0, 3.0), (4.0, 4.0)]),
+            _multi_response([(5.0, 5.0)]),
+        ]
+        coords = [(float(i), float(i)) for i in range(1, 6)]
+
+        results = fetch_current_weather_many(coords)
+
+        assert mock_get.call_count == 3
+        assert [r[0] for r in results] == [1.0, 2.0, 3.0, 4.0, 5.0]
+        assert [(r[2], r[3]) for r in results] == coords
+
+    @patch('requests.get')
+    def test_single_location_object_response(self, mock_get):
+        """Test that a single-location (object) response is parsed too."""
+        mock_response = Mock()
+        mock_response.json.return_value = {"current": {"temperature_2m": 22.5, "wind_speed_10m": 15.3}}
+        mock_response.raise_for_status = Mock()
+        mock_get.return_value = mock_response
+
+        assert fetch_current_weather_many([(47.5, 19.0)]) == [(22.5, 15.3, 47.5, 19.0)]
+
+    @patch('requests.get')
+    def test_result_count_mismatch(self, mock_get):
+        """Test that a response with the wrong number of locations is rejected."""
+        mock_get.return_value = _multi_response([(20.0, 10.0)])
+
+        with pytest.raises(ValueError):
+            fetch_current_weather_many([(47.5, 19.0), (48.2, 16.4)])
+
+    @patch('requests.get')
+    def test_empty_coords(self, mock_get):
+        """Test that no request is made for an empty location list."""
+        assert fetch_current_weather_many([]) == []
+        mock_get.assert_not_called()
+
+
+# ============================================================================
+# Tests for the async fetch path
+# ============================================================================
+
+def _run_with_client(handler, coro_factory):
+    """Run a coroutine against a shared client backed by a mock transport."""
+    async def runner():
+        await open_http_client(transport=httpx.MockTransport(handler))
+        try:
+            return await coro_factory()
+        finally:
+            await close_http_client()
+
+    return asyncio.run(runner())
+
+
+class TestFetchCurrentWeatherAsync:
+    """Test suite for the pooled async fetch functions."""
+
+    def test_fetch_single_location(self):
+        """Test parsing a single-location response through the shared client."""
+        seen = []
+
+        def handler(request):
+            seen.append(request.url)
+            return httpx.Response(200, json={"current": {"temperature_2m": 22.5, "wind_speed_10m": 15.3}})
+
+        result = _run_with_client(handler, lambda: fetch_current_weather_async(47.5, 19.0))
+
+        assert result == (22.5, 15.3, 47.5, 19.0)
+        assert seen[0].params["latitude"] == "47.5"
+        assert seen[0].params["longitude"] == "19.0"
+
+    def test_fetch_many_chunks(self, monkeypatch):
+        """Test that locations are chunked and results keep request order."""
+        monkeypatch.setattr(settings, "open_meteo_batch_size", 2)
+        calls = []
+
+        def handler(request):
+            lats = request.url.params["latitude"].split(",")
+            calls.append(lats)
+            return httpx.Response(200, json=[
+                {"current": {"temperature_2m": float(lat), "wind_speed_10m": 1.0}} for lat in lats
+            ])
+
+        coords = [(1.0, 0.0), (2.0, 0.0), (3.0, 0.0)]
+        results = _run_with_client(handler, lambda: fetch_current_weather_many_async(coords))
+
+        assert len(calls) == 2
+        assert [r[0] for r in results] == [1.0, 2.0, 3.0]
+
+    def test_http_error(self):
+        """Test that upstream HTTP errors are raised."""
+        handler = lambda request: httpx.Response(503)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            _run_with_client(handler, lambda: fetch_current_weather_async(47.5, 19.0))
+
+    def test_client_not_open(self):
+        """Test that the async path refuses to run without an open client."""
+        assert weather_service._client is None
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(fetch_current_weather_async(47.5, 19.0))
+
+
+class TestGetCurrentWeather:
+    """Test suite for the cached, single-flight current-weather lookup."""
+
+    @pytest.fixture(autouse=True)
+    def empty_cache(self):
+        current_weather_cache.clear()
+        yield
+        current_weather_cache.clear()
+
+    def test_second_lookup_is_served_from_cache(self):
+        """Test that a repeated lookup does not go upstream again."""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url)
+            return httpx.Response(200, json={"current": {"temperature_2m": 10.0, "wind_speed_10m": 5.0}})
+
+        async def twice():
+            first = await get_current_weather(47.4979, 19.0402)
+            # ugyanarra a kerekített kulcsra esik
+            second = await get_current_weather(47.4981, 19.0399)
+            return first, second
+
+        first, second = _run_with_client(handler, twice)
+
+        assert len(calls) == 1
+        assert first == (10.0, 5.0, 47.4979, 19.0402)
+        assert second == (10.0, 5.0, 47.4981, 19.0399)
+        assert current_weather_cache.stats()["hits"] == 1
+
+    def test_concurrent_misses_share_one_upstream_call(self):
+        """Test single-flight coalescing of concurrent lookups."""
+        calls = []
+
+        async def handler(request):
+            calls.append(request.url)
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json={"current": {"temperature_2m": 10.0, "wind_speed_10m": 5.0}})
+
+        async def burst():
+            return await asyncio.gather(*(get_current_weather(47.5, 19.0) for _ in range(20)))
+
+        results = _run_with_client(handler, burst)
+
+        assert len(calls) == 1
+        assert all(r == (10.0, 5.0, 47.5, 19.0) for r in results)
+        assert weather_service._inflight == {}
+
+    def test_failed_fetch_is_not_cached(self, monkeypatch):
+        """Test that upstream errors reach every waiter and are not cached."""
+        monkeypatch.setattr(settings, "http_max_retries", 0)
+        calls = []
+
+        def handler(request):
+            calls.append(request.url)
+            return httpx.Response(503)
+
+        async def burst():
+            return await asyncio.gather(
+                *(get_current_weather(47.5, 19.0) for _ in range(3)), return_exceptions=True
+            )
+
+        results = _run_with_client(handler, burst)
+
+        assert len(calls) == 1
+        assert all(isinstance(r, httpx.HTTPStatusError) for r in results)
+        assert current_weather_cache.stats()["size"] == 0
+
+    def test_batch_fetch_primes_cache(self):
+        """Test that scheduler batch results are reused by single lookups."""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url)
+            lats = request.url.params["latitude"].split(",")
+            return httpx.Response(200, json=[
+                {"current": {"temperature_2m": 7.0, "wind_speed_10m": 3.0}} for _ in lats
+            ])
+
+        async def scenario():
+            await fetch_current_weather_many_async([(47.5, 19.0), (46.25, 20.14)])
+            return await get_current_weather(46.25, 20.14)
+
+        assert _run_with_client(handler, scenario) == (7.0, 3.0, 46.25, 20.14)
+        assert len(calls) == 1
+
+
 # ============================================================================
 # Tests for save_weather_record
 # ============================================================================
@@ -280,6 +524,59 @@ class TestSaveWeatherRecord:
         assert result.longitude == precise_lon
 
 
+# ============================================================================
+# Tests for save_weather_records
+# ============================================================================
+
+class TestSaveWeatherRecords:
+    """Test suite for the bulk save_weather_records function."""
+
+    def test_inserts_all_rows_and_returns_ids_in_order(self, sqlite_db):
+        """Test that a batch is stored and ids come back in input order."""
+        rows = [(20.0, 10.0, 47.5, 19.0), (18.5, 12.5, 48.2, 16.4), (-3.0, 0.0, 46.3, 20.1)]
+
+        ids = save_weather_records(sqlite_db, rows)
+
+        assert len(ids) == 3
+        stored = {r.id: r for r in sqlite_db.query(Weather).all()}
+        assert [
+            (stored[i].temperature_c, stored[i].windspeed_kmh, stored[i].latitude, stored[i].longitude)
+            for i in ids
+        ] == rows
+        assert all(r.fetched_at is not None for r in stored.values())
+
+    def test_single_commit_per_batch(self):
+        """Test that the whole batch is written in one transaction."""
+        mock_db = Mock(spec=Session)
+        mock_db.scalars.return_value = [1, 2]
+
+        ids = save_weather_records(mock_db, [(1.0, 1.0, 1.0, 1.0), (2.0, 2.0, 2.0, 2.0)])
+
+        assert ids == [1, 2]
+        assert mock_db.scalars.call_count == 1
+        assert mock_db.commit.call_count == 1
+        assert not mock_db.add.called
+        assert not mock_db.refresh.called
+
+    def test_empty_batch(self):
+        """Test that an empty batch does not touch the database."""
+        mock_db = Mock(spec=Session)
+
+        assert save_weather_records(mock_db, []) == []
+        assert not mock_db.commit.called
+
+    def test_rollback_on_error(self):
+        """Test that a failed batch is rolled back and the error re-raised."""
+        mock_db = Mock(spec=Session)
+        mock_db.scalars.side_effect = Exception("disk I/O error")
+
+        with pytest.raises(Exception):
+            save_weather_records(mock_db, [(1.0, 1.0, 1.0, 1.0)])
+
+        assert mock_db.rollback.called
+        assert not mock_db.commit.called
+
+
 # ============================================================================
 # Integration Tests
 # ============================================================================
@@ -287,7 +584,7 @@ class TestSaveWeatherRecord:
 class TestWeatherServiceIntegration:
     """Integration tests combining fetch and save operations."""
 
-    @patch('backend.services.weather_service.requests.get')
+    @patch('requests.get')
     def test_fetch_and_save_workflow(self, mock_get):
         """Test the complete workflow of fetching and saving weather data."""
         # Mock the API response
@@ -315,7 +612,7 @@ class TestWeatherServiceIntegration:
         assert record.longitude == 19.0
         assert mock_db.commit.called
 
-    @patch('backend.services.weather_service.requests.get')
+    @patch('requests.get')
     def test_multiple_locations_workflow(self, mock_get):
         """Test fetching and saving weather for multiple locations."""
         locations = [
@@ -0,0 +1,123 @@
+"""Dashboard reads while the scheduler writes: dev vs. production SQLite profile.
+
+    python -m benchmarks.bench_concurrency --seconds 5 --readers 8
+"""
+import argparse
+import os
+import random
+import multiprocessing as mp
+import statistics
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from backend.core.database import create_db_engine
+from backend.core.migrations import run_migrations
+from backend.services.history_service import list_readings
+from backend.services.stats_service import get_stats
+from backend.services.weather_service import save_weather_records
+
+
+def _batch(rnd: random.Random, n: int):
+    rows = [(round(rnd.uniform(-10, 35), 1), round(rnd.uniform(0, 60), 1), 47.4979, 19.0402) for _ in range(n)]
+    return rows, [rnd.randint(1, 5) for _ in range(n)]
+
+
+def _sessions(url: str, profile: str):
+    engine = create_db_engine(url, profile)
+    read_engine = create_db_engine(url, profile, read_only=True) if profile == "production" else engine
+    return (
+        sessionmaker(autocommit=False, autoflush=False, bind=engine),
+        sessionmaker(autocommit=False, autoflush=False, bind=read_engine),
+    )
+
+
+def _writer(url, profile, batch, stop, out):
+    Write, _ = _sessions(url, profile)
+    rnd = random.Random(2)
+    written = 0
+    with Write() as db:
+        while not stop.is_set():
+            save_weather_records(db, *_batch(rnd, batch))
+            written += batch
+    out.put(("written", written))
+
+
+def _reader(url, profile, stop, out):
+    _, Read = _sessions(url, profile)
+    latencies, errors = [], 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with Read() as db:
+                list_readings(db, 50)
+                get_stats(db)
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            errors += 1
+    out.put(("read", latencies, errors))
+
+
+def run_profile(profile: str, seconds: float, readers: int, batch: int, seed_rows: int) -> dict:
+    # külön processzek: a GIL ne torzítsa az SQLite zárolás mérését
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_db_engine(url, profile)
+        run_migrations(engine)
+        rnd = random.Random(1)
+        with sessionmaker(bind=engine)() as db:
+            for _ in range(seed_rows // 1000):
+                save_weather_records(db, *_batch(rnd, 1000))
+        engine.dispose()
+
+        stop = mp.Event()
+        out = mp.Queue()
+        procs = [mp.Process(target=_writer, args=(url, profile, batch, stop, out))]
+        procs += [mp.Process(target=_reader, args=(url, profile, stop, out)) for _ in range(readers)]
+        for p in procs:
+            p.start()
+        time.sleep(seconds)
+        stop.set()
+
+        latencies, errors, written = [], 0, 0
+        for _ in procs:
+            msg = out.get()
+            if msg[0] == "written":
+                written = msg[1]
+            else:
+                latencies.extend(msg[1])
+                errors += msg[2]
+        for p in procs:
+            p.join()
+
+    latencies.sort()
+    return {
+        "profile": profile,
+        "reads_per_s": len(latencies) / seconds,
+        "read_p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+        "read_p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else None,
+        "read_errors": errors,
+        "rows_written_per_s": written / seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=500, help="rows per write transaction (one tick)")
+    parser.add_argument("--seed-rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    for profile in ("dev", "production"):
+        r = run_profile(profile, args.seconds, args.readers, args.batch, args.seed_rows)
+        print(
+            f"{r['profile']:>10}: {r['reads_per_s']:8.0f} reads/s  "
+            f"p50 {r['read_p50_ms']:7.2f} ms  p99 {r['read_p99_ms']:8.2f} ms  "
+            f"errors {r['read_errors']}  writes {r['rows_written_per_s']:8.0f} rows/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Insert throughput: per-row save_weather_record vs. bulk save_weather_records.
+
+    python -m benchmarks.bench_insert --rows 2000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.core.database import Base
+from backend.services.weather_service import save_weather_record, save_weather_records
+
+
+def _rows(n: int) -> list[tuple[float, float, float, float]]:
+    rnd = random.Random(42)
+    return [
+        (round(rnd.uniform(-10, 35), 1), round(rnd.uniform(0, 60), 1), 47.4979, 19.0402)
+        for _ in range(n)
+    ]
+
+
+def _session_factory(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def bench_per_row(path: str, rows) -> float:
+    engine, Session = _session_factory(path)
+    db = Session()
+    try:
+        start = time.perf_counter()
+        for t, w, la, lo in rows:
+            save_weather_record(db, t, w, la, lo)
+        return len(rows) / (time.perf_counter() - start)
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def bench_bulk(path: str, rows, batch: int) -> float:
+    engine, Session = _session_factory(path)
+    db = Session()
+    try:
+        start = time.perf_counter()
+        for i in range(0, len(rows), batch):
+            save_weather_records(db, rows[i:i + batch])
+        return len(rows) / (time.perf_counter() - start)
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=500, help="rows per bulk transaction")
+    args = parser.parse_args()
+
+    rows = _rows(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        per_row = bench_per_row(os.path.join(tmp, "per_row.db"), rows)
+        bulk = bench_bulk(os.path.join(tmp, "bulk.db"), rows, args.batch)
+
+    print(f"save_weather_record  (per row):     {per_row:12,.0f} rows/s")
+    print(f"save_weather_records (batch={args.batch}): {bulk:12,.0f} rows/s")
+    print(f"speedup: {bulk / per_row:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""List serialization: ORM objects + pydantic vs. column tuples + orjson for GET /weather.
+
+    python -m benchmarks.bench_list --rows 10000
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import tempfile
+import time
+
+import orjson
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.core.database import Base
+from backend.models.location import Location  # noqa: F401  (tábla regisztrálása)
+from backend.schemas.weather import WeatherOut
+from backend.services.history_service import EXPORT_COLUMNS, list_readings
+from backend.services.weather_service import save_weather_records
+
+
+def _session_factory(path: str, rows: int):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    rnd = random.Random(42)
+    db = Session()
+    for i in range(0, rows, 5000):
+        save_weather_records(db, [
+            (round(rnd.uniform(-10, 35), 1), round(rnd.uniform(0, 60), 1), 47.4979, 19.0402)
+            for _ in range(min(5000, rows - i))
+        ])
+    db.close()
+    return engine, Session
+
+
+def bench_pydantic(Session, rows: int, repeat: int) -> tuple[float, bytes]:
+    # a korábbi út: ORM objektumok, response_model validálás, json.dumps
+    best, body = float("inf"), b""
+    for _ in range(repeat):
+        db = Session()
+        start = time.perf_counter()
+        records, _ = list_readings(db, rows)
+        body = json.dumps(
+            [WeatherOut.model_validate(rec).model_dump(mode="json") for rec in records]
+        ).encode()
+        best = min(best, time.perf_counter() - start)
+        db.close()
+    return best, body
+
+
+def bench_tuples(Session, rows: int, repeat: int) -> tuple[float, bytes]:
+    best, body = float("inf"), b""
+    for _ in range(repeat):
+        db = Session()
+        start = time.perf_counter()
+        records, _ = list_readings(db, rows, as_tuples=True)
+        body = orjson.dumps([dict(zip(EXPORT_COLUMNS, row)) for row in records])
+        best = min(best, time.perf_counter() - start)
+        db.close()
+    return best, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5, help="best of N runs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, Session = _session_factory(os.path.join(tmp, "list.db"), args.rows)
+        try:
+            slow, slow_body = bench_pydantic(Session, args.rows, args.repeat)
+            fast, fast_body = bench_tuples(Session, args.rows, args.repeat)
+        finally:
+            engine.dispose()
+
+    print(f"ORM + pydantic + json:  {slow * 1000:8.1f} ms  ({len(slow_body):,} bytes)")
+    print(f"tuples + orjson:        {fast * 1000:8.1f} ms  ({len(fast_body):,} bytes)")
+    print(f"speedup: {slow / fast:.1f}x")
+    print(f"gzip: {len(gzip.compress(fast_body)):,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Cold start: import time of backend.app and time to the first /health response.
+
+    python -m benchmarks.bench_startup --runs 5 --out startup-report.json
+
+Every run is a fresh interpreter against a temporary, already migrated
+database, once as a web-only worker and once with the scheduler. The JSON
+report can be diffed with ``python -m benchmarks.compare``.
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import backend.app; print(time.perf_counter() - t)"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _env(tmp: str, scheduler: bool) -> dict:
+    env = {k: v for k, v in os.environ.items() if k != "ASYNC_DATABASE_URL"}
+    env.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'weather.db')}",
+        ARCHIVE_DIR=os.path.join(tmp, "archive"),
+        SCHEDULER_ENABLED="true" if scheduler else "false",
+        # ütemezett lekérés ne menjen ki a hálózatra
+        OPEN_METEO_URL="http://127.0.0.1:9/v1/forecast",
+        EMAIL_TO="",
+    )
+    return env
+
+
+def import_time(env: dict) -> float:
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def time_to_health(env: dict, timeout_s: float = 60) -> float:
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout_s:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=0.5).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.HTTPError:
+                time.sleep(0.005)
+        raise RuntimeError(f"no /health response in {timeout_s}s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _ms(values: list[float]) -> dict:
+    return {"p50_ms": round(statistics.median(values) * 1000, 1), "min_ms": round(min(values) * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--out", help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+        },
+        "startup": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        # első indulás migrál; a mért indulások már kész sémát találnak
+        time_to_health(_env(tmp, scheduler=False))
+        startup = report["startup"]
+        startup["import"] = _ms([import_time(_env(tmp, scheduler=False)) for _ in range(args.runs)])
+        for mode, scheduler in (("web_only", False), ("with_scheduler", True)):
+            env = _env(tmp, scheduler)
+            startup[f"first_health_{mode}"] = _ms([time_to_health(env) for _ in range(args.runs)])
+
+    for name, result in report["startup"].items():
+        print(f"{name:>28}: p50 {result['p50_ms']:7.1f} ms   min {result['min_ms']:7.1f} ms  ({args.runs} runs)")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Diff two benchmark reports (``benchmarks.suite`` or ``benchmarks.bench_startup``), e.g. last release vs. this branch.
+
+    python -m benchmarks.compare old.json new.json --threshold 10
+"""
+import argparse
+import json
+
+# ezeknél a nagyobb érték a jobb; a többi (ms, s) időtartam
+HIGHER_IS_BETTER = ("rps", "rows_per_s")
+
+
+def _flatten(node, prefix: str = "") -> dict[str, float]:
+    if isinstance(node, dict):
+        flat = {}
+        for key, value in node.items():
+            flat.update(_flatten(value, f"{prefix}.{key}" if prefix else key))
+        return flat
+    if isinstance(node, (int, float)) and not isinstance(node, bool):
+        return {prefix: float(node)}
+    return {}
+
+
+def compare(old: dict, new: dict, threshold: float) -> list[tuple[str, float, float, float, bool]]:
+    """``(metric, old, new, change %, regression)`` for the timing metrics both reports have."""
+    # a meta (commit, gép, argumentumok) nem mérés
+    old_flat = _flatten({k: v for k, v in old.items() if k != "meta"})
+    new_flat = _flatten({k: v for k, v in new.items() if k != "meta"})
+    rows = []
+    for key in sorted(old_flat.keys() & new_flat.keys()):
+        if not key.endswith(("_ms", "rps", "_rows_per_s")) or not old_flat[key]:
+            continue
+        change = (new_flat[key] - old_flat[key]) / old_flat[key] * 100
+        worse = -change if key.endswith(HIGHER_IS_BETTER) else change
+        rows.append((key, old_flat[key], new_flat[key], change, worse > threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10, help="%% change flagged as a regression")
+    args = parser.parse_args()
+
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"old: {old['meta'].get('git_commit', '-')} ({old['meta']['created_at']})")
+    print(f"new: {new['meta'].get('git_commit', '-')} ({new['meta']['created_at']})")
+    rows = compare(old, new, args.threshold)
+    for key, before, after, change, regression in rows:
+        print(f"{'!' if regression else ' '} {key:<48} {before:12.2f} -> {after:12.2f}  {change:+7.1f}%")
+    regressions = sum(1 for row in rows if row[4])
+    print(f"{regressions} regression(s) over {args.threshold:g}%")
+    raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
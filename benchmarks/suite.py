@@ -0,0 +1,317 @@
+"""Release benchmark: every route under concurrent load, inserts and scheduler ticks, as a JSON report.
+
+    python -m benchmarks.suite --sizes 10k,1m,10m --out bench-report.json
+    python -m benchmarks.suite --sizes 10k --requests 100 --upstream-latency-ms 50 --upstream-error-rate 0.05
+
+The API runs under uvicorn (scheduler off) against a copy of a synthetic
+database (see ``benchmarks.synthetic_db``, cached in ``--data-dir``) and a
+local fake Open-Meteo, so nothing touches the network or ``weather.db``.
+Compare two reports with ``python -m benchmarks.compare old.json new.json``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from backend.services.location_service import CITIES
+from backend.tests.fake_open_meteo import FakeOpenMeteo
+from benchmarks.synthetic_db import END_AT, cached_synthetic_db, parse_size
+
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "weather-bench")
+
+# a /weather/reset kimarad: törölné a mért adatbázist
+ROUTES = ("health", "locations", "cache_stats", "upstream_stats", "list", "list_location", "list_fields",
+          "stats", "stats_location", "aggregate", "series", "detail", "export", "fetch")
+
+
+def _route_requests(route: str, n: int, rnd: random.Random, max_id: int, names: list[str]):
+    """``n`` (method, url) pairs for one route; random parts are seeded for repeatability."""
+    recent = (END_AT - timedelta(hours=1)).isoformat()
+    week = (END_AT - timedelta(days=7)).isoformat()
+    coords = {name: (lat, lon) for name, lat, lon in CITIES}
+    urls = {
+        "health": lambda name: ("GET", "/health"),
+        "locations": lambda name: ("GET", "/locations"),
+        "cache_stats": lambda name: ("GET", "/weather/cache/stats"),
+        "upstream_stats": lambda name: ("GET", "/weather/upstream/stats"),
+        "list": lambda name: ("GET", "/weather?limit=50"),
+        "list_location": lambda name: ("GET", f"/weather?limit=50&location={name}"),
+        "list_fields": lambda name: ("GET", "/weather?limit=1000&fields=fetched_at,temperature_c"),
+        "stats": lambda name: ("GET", "/weather/stats"),
+        "stats_location": lambda name: ("GET", f"/weather/stats?location={name}"),
+        "aggregate": lambda name: ("GET", f"/weather/aggregate?bucket=hour&location={name}&from={week}"),
+        "series": lambda name: ("GET", f"/weather/series?location={name}&from={week}&points=500"),
+        "detail": lambda name: ("GET", f"/weather/{rnd.randint(1, max_id)}"),
+        "export": lambda name: ("GET", f"/weather/export?location={name}&from={recent}"),
+        "fetch": lambda name: ("POST", "/weather/fetch?lat={}&lon={}".format(*coords.get(name, CITIES[0][1:]))),
+    }[route]
+    for _ in range(n):
+        yield urls(rnd.choice(names))
+
+
+def _percentile(sorted_values: list[float], p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def _summary(latencies: list[float], errors: int, elapsed: float) -> dict:
+    latencies.sort()
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+
+async def _load(base_url: str, requests: list[tuple[str, str]], concurrency: int) -> dict:
+    latencies, errors = [], 0
+    pending = iter(requests)
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        for method, url in pending:
+            start = time.perf_counter()
+            try:
+                resp = await client.request(method, url)
+                await resp.aread()
+                if resp.status_code >= 400:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return _summary(latencies, errors, elapsed)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _app_env(db_path: str, tmp: str, upstream_url: str, profile: str) -> dict:
+    env = {k: v for k, v in os.environ.items() if k != "ASYNC_DATABASE_URL"}
+    env.update(
+        DATABASE_URL=f"sqlite:///{db_path}",
+        DB_PROFILE=profile,
+        OPEN_METEO_URL=upstream_url,
+        SCHEDULER_ENABLED="false",
+        ARCHIVE_DIR=os.path.join(tmp, "archive"),
+        # a fake upstreamet nem kell kímélni; a mérés ne a token bucketet mérje
+        HTTP_RATE_PER_S="0",
+        EMAIL_TO="",
+    )
+    return env
+
+
+def _start_server(env: dict, port: int) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"API server exited with {proc.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("API server did not start in 120s")
+
+
+def bench_routes(env: dict, args, max_id: int, names: list[str]) -> dict:
+    port = _free_port()
+    proc = _start_server(env, port)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        results = {}
+        for route in args.routes:
+            rnd = random.Random(route)
+            # bemelegítés: kapcsolatok, SQLite page cache, lekérdezés-tervek
+            asyncio.run(_load(base_url, list(_route_requests(route, args.concurrency, rnd, max_id, names)), args.concurrency))
+            requests = list(_route_requests(route, args.requests, rnd, max_id, names))
+            results[route] = asyncio.run(_load(base_url, requests, args.concurrency))
+            r = results[route]
+            print(f"  {route:>15}: p50 {r.get('p50_ms', 0):8.2f} ms  p99 {r.get('p99_ms', 0):8.2f} ms  "
+                  f"{r.get('rps', 0):8.1f} req/s  errors {r['errors']}")
+        return results
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def _in_process(insert_rows: int, batch: int, ticks: int) -> dict:
+    # külön processzben fut (--worker), a mért adatbázisra mutató környezettel
+    from backend.core.database import SessionLocal
+    from backend.models.weather import Weather
+    from backend.services import scheduler
+    from backend.services.weather_service import (
+        close_http_client,
+        open_http_client,
+        save_weather_record,
+        save_weather_records,
+    )
+
+    rnd = random.Random(7)
+    rows = [(round(rnd.uniform(-10, 35), 1), round(rnd.uniform(0, 60), 1), 47.4979, 19.0402) for _ in range(insert_rows)]
+    result = {}
+    with SessionLocal() as db:
+        start = time.perf_counter()
+        for t, w, la, lo in rows:
+            save_weather_record(db, t, w, la, lo, location_id=1)
+        result["insert_per_row_rows_per_s"] = round(len(rows) / (time.perf_counter() - start), 1)
+
+        start = time.perf_counter()
+        for i in range(0, len(rows), batch):
+            save_weather_records(db, rows[i:i + batch], location_ids=[1] * len(rows[i:i + batch]))
+        result["insert_bulk_rows_per_s"] = round(len(rows) / (time.perf_counter() - start), 1)
+        before = db.query(Weather).count()
+
+    async def run_ticks() -> list[float]:
+        await open_http_client()
+        try:
+            durations = []
+            for _ in range(ticks):
+                start = time.perf_counter()
+                await scheduler._job()
+                durations.append(time.perf_counter() - start)
+            return durations
+        finally:
+            await close_http_client()
+
+    durations = sorted(asyncio.run(run_ticks()))
+    with SessionLocal() as db:
+        stored = db.query(Weather).count() - before
+    result["tick"] = {
+        "ticks": ticks,
+        "rows_stored": stored,
+        "p50_ms": round(statistics.median(durations) * 1000, 2),
+        "max_ms": round(durations[-1] * 1000, 2),
+    }
+    return result
+
+
+def bench_in_process(env: dict, args) -> dict:
+    # a backend modulok importkor olvassák a beállításokat, ezért új processz kell
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.suite", "--worker",
+         "--insert-rows", str(args.insert_rows), "--batch", str(args.batch), "--ticks", str(args.ticks)],
+        env=env, stdout=subprocess.PIPE, text=True, check=True,
+    )
+    return json.loads(proc.stdout.splitlines()[-1])
+
+
+def _fixture_facts(path: str) -> tuple[int, list[str]]:
+    conn = sqlite3.connect(path)
+    try:
+        max_id = conn.execute("SELECT max(id) FROM weather").fetchone()[0] or 1
+        names = [name for (name,) in conn.execute("SELECT name FROM locations ORDER BY id")]
+        return max_id, names
+    finally:
+        conn.close()
+
+
+def _meta(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": {k: v for k, v in vars(args).items() if k not in ("out", "data_dir", "worker")},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10k,1m,10m", help="comma-separated row counts (10k, 1m, 10m, 250000 …)")
+    parser.add_argument("--locations", type=int, default=len(CITIES))
+    parser.add_argument("--profile", default="production", choices=("dev", "production"))
+    parser.add_argument("--routes", default=",".join(ROUTES), help="comma-separated subset of: " + ", ".join(ROUTES))
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per route")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--insert-rows", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=500, help="rows per bulk insert transaction")
+    parser.add_argument("--ticks", type=int, default=10, help="scheduler ticks to time")
+    parser.add_argument("--upstream-latency-ms", type=float, default=0)
+    parser.add_argument("--upstream-error-rate", type=float, default=0)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where the synthetic databases are cached")
+    parser.add_argument("--out", default="bench-report.json")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        print(json.dumps(_in_process(args.insert_rows, args.batch, args.ticks)))
+        return
+    args.routes = [r.strip() for r in args.routes.split(",") if r.strip()]
+    unknown = set(args.routes) - set(ROUTES)
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(sorted(unknown))}")
+
+    upstream = FakeOpenMeteo().start()
+    upstream.latency_s = args.upstream_latency_ms / 1000
+    upstream.error_rate = args.upstream_error_rate
+    report = {"meta": _meta(args), "sizes": {}}
+    try:
+        for size in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+            rows = parse_size(size)
+            print(f"== {size} ({rows:,} rows)")
+            fixture, build_s = cached_synthetic_db(args.data_dir, rows, args.locations)
+            if build_s is not None:
+                print(f"  built fixture in {build_s:.1f}s")
+            max_id, names = _fixture_facts(fixture)
+
+            with tempfile.TemporaryDirectory() as tmp:
+                # a mérés ír (fetch, insert, tick): mindig a fixture másolatán
+                work = os.path.join(tmp, "weather.db")
+                shutil.copyfile(fixture, work)
+                env = _app_env(work, tmp, upstream.url, args.profile)
+
+                result = {"rows": rows, "locations": len(names), "fixture_build_s": build_s}
+                result["routes"] = bench_routes(env, args, max_id, names)
+                result.update(bench_in_process(env, args))
+            print(f"  insert: {result['insert_per_row_rows_per_s']:,.0f} rows/s per row, "
+                  f"{result['insert_bulk_rows_per_s']:,.0f} rows/s bulk; tick p50 {result['tick']['p50_ms']:.1f} ms")
+            report["sizes"][size] = result
+    finally:
+        upstream.stop()
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Synthetic weather database for benchmarks (10k … 10M rows), built once and reused.
+
+    python -m benchmarks.synthetic_db --rows 1m --out /tmp/weather-1m.db
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from backend.core.database import create_db_engine
+from backend.core.migrations import run_migrations
+from backend.models.location import Location
+from backend.services.location_service import CITIES
+from backend.services.stats_service import rebuild_aggregates
+
+# a legutolsó mérés időpontja; fix, hogy a fixture bájtra azonos legyen
+END_AT = datetime(2026, 1, 1)
+# egy tranzakcióba ennyi sor kerül
+INSERT_CHUNK = 500_000
+
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# determinisztikus "véletlen" értékek a sorszámból (Knuth-féle multiplikatív hash)
+_INSERT_SQL = """
+WITH RECURSIVE seq(i) AS (SELECT :first UNION ALL SELECT i + 1 FROM seq WHERE i < :last)
+INSERT INTO weather (temperature_c, windspeed_kmh, latitude, longitude, fetched_at, location_id)
+SELECT
+    round(-10 + ((i * 2654435761) % 4500) / 100.0, 1),
+    round(((i * 40503) % 6000) / 100.0, 1),
+    l.latitude,
+    l.longitude,
+    strftime('%Y-%m-%d %H:%M:%S', :start, '+' || ((i / :locations) * :step_s) || ' seconds') || '.000000',
+    l.id
+FROM seq JOIN locations l ON l.id = (i % :locations) + 1
+"""
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().lower()
+    if text in SIZES:
+        return SIZES[text]
+    return int(float(text[:-1]) * {"k": 1_000, "m": 1_000_000}[text[-1]]) if text[-1] in "km" else int(text)
+
+
+def build_synthetic_db(path: str, rows: int, locations: int = len(CITIES), step_min: int = 10) -> float:
+    """Create ``path`` with ``rows`` readings spread over ``locations`` cities.
+
+    Every city gets one reading per ``step_min`` minutes, ending at ``END_AT``;
+    the values are a deterministic function of the row number, so two builds
+    are identical. Aggregates and rollups are rebuilt at the end. Returns the
+    build time in seconds.
+    """
+    start = time.perf_counter()
+    engine = create_db_engine(f"sqlite:///{path}", "production")
+    try:
+        run_migrations(engine)
+        with Session(engine) as db:
+            for n in range(len(CITIES), locations):
+                # a további városok a magyar városok köré szórva
+                db.add(Location(name=f"Bench-{n:04d}", latitude=45.8 + (n % 30) * 0.1, longitude=16.2 + (n // 30) * 0.1))
+            db.commit()
+            count = db.query(Location).count()
+
+        step_s = step_min * 60
+        first_at = END_AT - timedelta(seconds=step_s * ((rows - 1) // count))
+        raw = engine.raw_connection()
+        try:
+            cur = raw.cursor()
+            # egyszeri építés: a tartósság itt nem számít
+            cur.execute("PRAGMA synchronous=OFF")
+            for first in range(0, rows, INSERT_CHUNK):
+                cur.execute(_INSERT_SQL, {
+                    "first": first,
+                    "last": min(rows, first + INSERT_CHUNK) - 1,
+                    "start": first_at.strftime("%Y-%m-%d %H:%M:%S"),
+                    "locations": count,
+                    "step_s": step_s,
+                })
+                raw.commit()
+            cur.close()
+        finally:
+            raw.close()
+
+        with Session(engine) as db:
+            rebuild_aggregates(db)
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.exec_driver_sql("ANALYZE")
+    finally:
+        engine.dispose()
+    return time.perf_counter() - start
+
+
+def cached_synthetic_db(data_dir: str, rows: int, locations: int = len(CITIES)) -> tuple[str, float | None]:
+    """Path of the fixture for ``rows``/``locations`` in ``data_dir``, building it if missing.
+
+    Returns the path and the build time (``None`` when it was already there).
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"synthetic-{rows}-{locations}.db")
+    if os.path.exists(path):
+        return path, None
+    tmp = path + ".building"
+    for leftover in (tmp, tmp + "-wal", tmp + "-shm"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    took = build_synthetic_db(tmp, rows, locations)
+    os.replace(tmp, path)
+    return path, took
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="10k", help="10k, 1m, 10m or a number")
+    parser.add_argument("--locations", type=int, default=len(CITIES))
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    took = build_synthetic_db(args.out, parse_size(args.rows), args.locations)
+    print(f"{args.out}: {parse_size(args.rows):,} rows in {took:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
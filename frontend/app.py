@@ -3,7 +3,7 @@ import requests
 import streamlit as st
 import pandas as pd
 import altair as alt
-from datetime import datetime
+from datetime import datetime, timedelta
 
 BACKEND = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
 
@@ -18,6 +18,56 @@ CITIES = [
 
 CITY_NAME_TO_COORDS = {name: (lat, lon) for name, lat, lon in CITIES}
 
+
+# ennyi másodpercig a dashboard adatai a Streamlit cache-ből jönnek (témaváltás, widgetek)
+DASHBOARD_TTL_S = int(os.getenv("DASHBOARD_TTL_S", 30))
+# városonként legfeljebb ennyi pont a grafikonokon; a backend LTTB-vel ritkít
+CHART_POINTS = int(os.getenv("CHART_POINTS", 500))
+# a grafikonok az utolsó ennyi napot mutatják, nem a teljes előzményt (archívummal együtt)
+CHART_DAYS = int(os.getenv("CHART_DAYS", 30))
+
+
+@st.cache_data(ttl=DASHBOARD_TTL_S, show_spinner=False)
+def fetch_dashboard():
+    """Stats and the newest reading per city in one GET /dashboard call; reruns within the TTL hit the cache."""
+    # a sorok előzménye nem kell: a grafikonok a /weather/series-ből rajzolnak
+    r = requests.get(f"{BACKEND}/dashboard", params={"limit": 1}, timeout=15)
+    r.raise_for_status()
+    snap = r.json()
+    return snap["stats"], snap["latest"]
+
+
+@st.cache_data(ttl=DASHBOARD_TTL_S, show_spinner=False)
+def fetch_series(days=CHART_DAYS, points=CHART_POINTS):
+    """Downsampled chart series of every city over the last ``days`` days; one call serves both charts."""
+    start = datetime.utcnow() - timedelta(days=days)
+    r = requests.get(
+        f"{BACKEND}/weather/series", params={"from": start.isoformat(), "points": points}, timeout=30
+    )
+    r.raise_for_status()
+    return r.json()["series"]
+
+
+def series_frame():
+    """The chart points of every city as one long DataFrame (city, fetched_at, temperature_c, windspeed_kmh)."""
+    frames = [
+        pd.DataFrame({
+            "city": s["location_name"],
+            "fetched_at": pd.to_datetime(s["fetched_at"]),
+            "temperature_c": s["temperature_c"],
+            "windspeed_kmh": s["windspeed_kmh"],
+        })
+        for s in fetch_series()
+    ]
+    if not frames:
+        return pd.DataFrame(columns=["city", "fetched_at", "temperature_c", "windspeed_kmh"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def invalidate_dashboard():
+    fetch_dashboard.clear()
+    fetch_series.clear()
+
 # ===== MODERN CLEAN DESIGN =====
 st.set_page_config(page_title="Időjárás Dashboard", layout="wide", initial_sidebar_state="expanded")
 
@@ -119,6 +169,7 @@ with st.sidebar:
             )
             if r.ok:
                 st.success(f"✅ {selected_city}")
+                invalidate_dashboard()
                 st.rerun()
             else:
                 st.error(f"❌ {r.status_code}")
@@ -132,19 +183,20 @@ with st.sidebar:
             r = requests.delete(f"{BACKEND}/weather/reset", timeout=15)
             if r.ok:
                 st.success("✅ Adatbázis törölve!")
+                invalidate_dashboard()
                 st.rerun()
             else:
                 st.error(f"❌ Hiba: {r.status_code}")
         except Exception as e:
             st.error(f"🔌 Hiba: {e}")
 
-# ===== STATISZTIKÁK =====
+# ===== ADATOK (egy kérés, cache-elve) =====
 try:
-    stats_response = requests.get(f"{BACKEND}/weather/stats", timeout=15)
-    stats = stats_response.json() if stats_response.ok else None
+    stats, latest = fetch_dashboard()
 except Exception:
-    stats = None
+    stats, latest = None, []
 
+# ===== STATISZTIKÁK =====
 if stats and stats.get("count", 0) > 0:
     st.markdown("### 📊 Statisztikák")
     
@@ -182,36 +234,19 @@ if stats and stats.get("count", 0) > 0:
         </div>
         """, unsafe_allow_html=True)
 
-# ===== ADATOK LEKÉRÉSE =====
 st.markdown("### 🏙️ Aktuális időjárás városonként")
 
-try:
-    r = requests.get(f"{BACKEND}/weather", timeout=15)
-    data = r.json() if r.ok else []
-except Exception:
-    data = []
-
-if not data:
+if not stats or stats.get("count", 0) == 0:
     st.info("📭 Még nincsenek adatok. Kattints a bal oldalon a mentésre!")
 else:
-    df = pd.DataFrame(data)
-    df["fetched_at"] = pd.to_datetime(df["fetched_at"])
-    df = df.sort_values("fetched_at")
-    
-    def city_name_from_coords(row):
-        for name, lat, lon in CITIES:
-            if abs(row["latitude"] - lat) < 1e-4 and abs(row["longitude"] - lon) < 1e-4:
-                return name
-        return "Ismeretlen"
-    
-    df["city"] = df.apply(city_name_from_coords, axis=1)
-    df = df[df["city"] != "Ismeretlen"]
-    
-    if df.empty:
+    if not latest:
         st.warning("⚠️ Még nincs mentés az előre beállított városokra.")
     else:
         # ===== WEATHER CARDS =====
-        latest_data = df.sort_values("fetched_at").groupby("city").last().reset_index()
+        # városonként a legutolsó mérés a backendtől
+        latest_data = pd.DataFrame(latest)
+        latest_data["fetched_at"] = pd.to_datetime(latest_data["fetched_at"])
+        latest_data = latest_data.rename(columns={"location_name": "city"})
         
         def get_weather_emoji(temp):
             if temp < 0:
@@ -247,8 +282,10 @@ else:
         # ===== TEMPERATURE CHART =====
         st.markdown("### 📈 Hőmérséklet alakulása")
         
+        # az utolsó CHART_DAYS nap ritkítva, egy lekérés mindkét grafikonhoz
+        chart_data = series_frame()
         temp_chart = (
-            alt.Chart(df)
+            alt.Chart(chart_data)
             .mark_line(point=True, strokeWidth=2.5)
             .encode(
                 x=alt.X("fetched_at:T", title="Időpont", axis=alt.Axis(
@@ -284,7 +321,7 @@ else:
         st.markdown("### 💨 Szélsebesség alakulása")
         
         wind_chart = (
-            alt.Chart(df)
+            alt.Chart(chart_data)
             .mark_line(point=True, strokeWidth=2.5)
             .encode(
                 x=alt.X("fetched_at:T", title="Időpont", axis=alt.Axis(
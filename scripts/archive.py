@@ -0,0 +1,18 @@
+import argparse
+from backend.core.config import settings
+from backend.core.database import SessionLocal, engine
+from backend.core.migrations import run_migrations
+from backend.services.archive_service import archive_old_readings
+
+parser = argparse.ArgumentParser(description="Move old weather readings to the Parquet archive.")
+parser.add_argument("--older-than-days", type=int, default=settings.archive_after_days)
+args = parser.parse_args()
+
+run_migrations(engine)
+
+db = SessionLocal()
+try:
+    moved = archive_old_readings(db, args.older_than_days)
+    print(f"Archiválva: {moved} mérés -> {settings.archive_dir}")
+finally:
+    db.close()
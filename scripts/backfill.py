@@ -0,0 +1,51 @@
+import argparse
+import asyncio
+import sys
+from datetime import date, timedelta
+from backend.core.config import settings
+from backend.core.database import SessionLocal, engine
+from backend.core.migrations import run_migrations
+from backend.services.backfill_service import backfill
+from backend.services.location_service import list_locations
+from backend.services.weather_service import close_http_client, open_http_client
+
+parser = argparse.ArgumentParser(description="Load hourly history from Open-Meteo; re-run the same range to resume.")
+parser.add_argument("--start", type=date.fromisoformat, required=True, help="first day, YYYY-MM-DD")
+parser.add_argument("--end", type=date.fromisoformat, default=date.today() - timedelta(days=1),
+                    help="last day, YYYY-MM-DD (default: yesterday)")
+parser.add_argument("--location", action="append", help="location name, repeatable (default: all)")
+parser.add_argument("--chunk-days", type=int, default=settings.backfill_chunk_days)
+parser.add_argument("--concurrency", type=int, default=settings.backfill_concurrency)
+parser.add_argument("--source", choices=("archive", "forecast"), default="archive",
+                    help="archive API (a few days behind) or the forecast API's recent past")
+args = parser.parse_args()
+if args.end < args.start:
+    parser.error("--end is before --start")
+
+run_migrations(engine)
+
+db = SessionLocal()
+try:
+    locations = list_locations(db)
+finally:
+    db.close()
+if args.location:
+    unknown = set(args.location) - {loc.name for loc in locations}
+    if unknown:
+        parser.error(f"unknown location(s): {', '.join(sorted(unknown))}")
+    locations = [loc for loc in locations if loc.name in args.location]
+
+
+async def main():
+    await open_http_client()
+    try:
+        return await backfill(locations, args.start, args.end, args.chunk_days, args.concurrency, args.source)
+    finally:
+        await close_http_client()
+
+
+results = asyncio.run(main())
+for r in results:
+    status = "kész" if r.next_date is None else f"folytatás innen: {r.next_date}"
+    print(f"{r.location}: {r.rows} mérés, {r.chunks} darab, {status}" + (f" (hiba: {r.error})" if r.error else ""))
+sys.exit(1 if any(r.error for r in results) else 0)
@@ -0,0 +1,5 @@
+from backend.core.database import engine
+from backend.core.migrations import run_migrations
+
+run_migrations(engine)
+print("Migráció kész.")
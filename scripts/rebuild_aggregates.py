@@ -0,0 +1,12 @@
+from backend.core.database import SessionLocal, engine
+from backend.core.migrations import run_migrations
+from backend.services.stats_service import rebuild_aggregates
+
+run_migrations(engine)
+
+db = SessionLocal()
+try:
+    rebuild_aggregates(db)
+    print("Aggregátumok újraszámolva.")
+finally:
+    db.close()
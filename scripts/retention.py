@@ -0,0 +1,36 @@
+import argparse
+from sqlalchemy import text
+from backend.core.database import SessionLocal, engine
+from backend.core.migrations import run_migrations
+from backend.services.location_service import get_location_by_name
+from backend.services.retention_service import enforce_retention
+
+parser = argparse.ArgumentParser(description="Apply the retention policy to stored weather readings.")
+parser.add_argument("--location", help="set the retention period of this location instead of running the policy")
+parser.add_argument("--days", type=int, help="retention period for --location (0 = default)")
+parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                    help="switch an existing SQLite file to auto_vacuum=INCREMENTAL (runs a full VACUUM once)")
+args = parser.parse_args()
+
+run_migrations(engine)
+
+if args.enable_incremental_vacuum:
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+        print(f"auto_vacuum = {conn.execute(text('PRAGMA auto_vacuum')).scalar()}")
+
+db = SessionLocal()
+try:
+    if args.location:
+        loc = get_location_by_name(db, args.location)
+        if loc is None:
+            parser.error(f"unknown location: {args.location}")
+        loc.retention_days = args.days or None
+        db.commit()
+        print(f"{loc.name}: megőrzés {loc.retention_days or 'alapértelmezett'} nap")
+    elif not args.enable_incremental_vacuum:
+        deleted = enforce_retention(db)
+        print(f"Törölve: {deleted} mérés")
+finally:
+    db.close()
@@ -1,12 +1,15 @@
-from backend.core.database import SessionLocal, Base, engine
-from backend.services.weather_service import fetch_current_weather, save_weather_record
+from backend.core.database import SessionLocal, engine
+from backend.core.migrations import run_migrations
+from backend.services.location_service import list_locations
+from backend.services.weather_service import fetch_current_weather_many, save_weather_records
 
-Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 db = SessionLocal()
 try:
-    t, w, la, lo = fetch_current_weather()
-    save_weather_record(db, t, w, la, lo)
-    print("Seed kész.")
+    locations = list_locations(db)
+    rows = fetch_current_weather_many([(loc.latitude, loc.longitude) for loc in locations])
+    save_weather_records(db, rows, location_ids=[loc.id for loc in locations])
+    print(f"Seed kész ({len(rows)} mérés).")
 finally:
-    db.close()
\ No newline at end of file
+    db.close()